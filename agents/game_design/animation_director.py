@@ -112,7 +112,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -127,10 +127,9 @@ Create:
         logger.info("animation_director_completed")
         
         return {
-            **state,
             "animation_plan": animation_plan
         }
     
     except Exception as e:
         logger.exception("animation_director_error", error=str(e))
-        return state
+        return {}
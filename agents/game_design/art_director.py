@@ -92,7 +92,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -110,10 +110,9 @@ Create:
         )
         
         return {
-            **state,
             "art_direction": art_direction
         }
     
     except Exception as e:
         logger.exception("art_director_error", error=str(e))
-        return state
+        return {}
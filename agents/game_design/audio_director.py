@@ -75,7 +75,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
             
         # Result 'output' is now a Pydantic model
         audio_design_model = result.get("output")
@@ -89,10 +89,9 @@ Create:
         logger.info("audio_director_completed")
         
         return {
-            **state,
             "audio_design": audio_design
         }
     
     except Exception as e:
         logger.exception("audio_director_error", error=str(e))
-        return state
+        return {}
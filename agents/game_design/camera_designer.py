@@ -113,7 +113,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -128,10 +128,9 @@ Create:
         logger.info("camera_designer_completed")
         
         return {
-            **state,
             "camera_systems": camera_systems
         }
     
     except Exception as e:
         logger.exception("camera_designer_error", error=str(e))
-        return state
+        return {}
@@ -103,7 +103,7 @@ Create visual specs for protagonist and 2-3 supporting characters.""")
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -118,10 +118,9 @@ Create visual specs for protagonist and 2-3 supporting characters.""")
         logger.info("character_artist_completed")
         
         return {
-            **state,
             "character_visuals": character_visuals
         }
     
     except Exception as e:
         logger.exception("character_artist_error", error=str(e))
-        return state
+        return {}
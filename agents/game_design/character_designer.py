@@ -76,7 +76,7 @@ Create compelling protagonist, antagonist, and supporting cast.""")
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -91,10 +91,9 @@ Create compelling protagonist, antagonist, and supporting cast.""")
         logger.info("character_designer_completed")
         
         return {
-            **state,
             "characters": characters
         }
     
     except Exception as e:
         logger.exception("character_designer_error", error=str(e))
-        return state
+        return {}
@@ -76,7 +76,7 @@ Output JSON:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -94,10 +94,9 @@ Output JSON:
         )
         
         return {
-            **state,
             "dialogue_system": dialogue_system
         }
     
     except Exception as e:
         logger.exception("dialogue_system_designer_error", error=str(e))
-        return state
+        return {}
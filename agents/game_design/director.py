@@ -1,17 +1,8 @@
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
 from core.state import GameDesignState
-from config.settings import settings
+from core.model_factory import create_model
 import json
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.7,
-    api_key=settings.GITHUB_TOKEN,
-    base_url="https://models.inference.ai.azure.com"
-)
-
 async def director_node(state: GameDesignState) -> GameDesignState:
     """
     The Director Agent:
@@ -55,6 +46,7 @@ async def director_node(state: GameDesignState) -> GameDesignState:
     
     user_msg = HumanMessage(content=f"Concept: {state['concept']}")
     
+    llm = create_model(provider="github", model="gpt-4o", temperature=0.7)
     response = await llm.ainvoke([system_msg, user_msg])
     
     try:
@@ -63,22 +55,26 @@ async def director_node(state: GameDesignState) -> GameDesignState:
         
         if data["status"] == "clarification_needed":
             print(f"❓ Director asks: {data['questions']}")
-            state["awaiting_input"] = True
-            state["director_questions"] = data["questions"]
             # We do NOT change the concept yet, we wait for user input
-        else:
-            print(f"✅ Director approved: {data['production_mode']}")
-            state["awaiting_input"] = False
-            state["director_questions"] = []
-            state["production_mode"] = data["production_mode"]
-            state["refined_concept"] = data["refined_concept"]
+            return {
+                "awaiting_input": True,
+                "director_questions": data["questions"],
+            }
+
+        print(f"✅ Director approved: {data['production_mode']}")
+        return {
+            "awaiting_input": False,
+            "director_questions": [],
+            "production_mode": data["production_mode"],
+            "refined_concept": data["refined_concept"],
             # Update the main concept with the refined version for other agents
-            state["concept"] = data["refined_concept"]
+            "concept": data["refined_concept"],
+        }
             
     except Exception as e:
         print(f"❌ Director Error: {e}")
         # Fallback: Assume ready if JSON fails
-        state["awaiting_input"] = False
-        state["production_mode"] = "prototype"
-    
-    return state
+        return {
+            "awaiting_input": False,
+            "production_mode": "prototype",
+        }
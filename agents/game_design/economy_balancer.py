@@ -116,7 +116,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -131,10 +131,9 @@ Create:
         logger.info("economy_balancer_completed")
         
         return {
-            **state,
             "economy_spec": economy_spec
         }
     
     except Exception as e:
         logger.exception("economy_balancer_error", error=str(e))
-        return state
+        return {}
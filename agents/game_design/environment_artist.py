@@ -108,7 +108,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -123,10 +123,9 @@ Create:
         logger.info("environment_artist_completed")
         
         return {
-            **state,
             "environment_design": environment_design
         }
     
     except Exception as e:
         logger.exception("environment_artist_error", error=str(e))
-        return state
+        return {}
@@ -267,7 +267,6 @@ async def gdd_writer_node(state: GameDesignState) -> GameDesignState:
             logger.error("gdd_export_failed", error=str(e))
 
         return {
-            **state,
             "gdd_content": {"full_doc": gdd_content},
             "current_step": "done"
         }
@@ -275,6 +274,5 @@ async def gdd_writer_node(state: GameDesignState) -> GameDesignState:
     except Exception as e:
         logger.error("gdd_writer_failed", error=str(e))
         return {
-            **state,
-            "errors": state.get("errors", []) + [str(e)]
+            "errors": [str(e)]
         }
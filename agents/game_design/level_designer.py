@@ -123,7 +123,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -138,10 +138,9 @@ Create:
         logger.info("level_designer_completed")
         
         return {
-            **state,
             "level_design": level_design
         }
     
     except Exception as e:
         logger.exception("level_designer_error", error=str(e))
-        return state
+        return {}
@@ -153,7 +153,7 @@ async def market_analyst_node(state: GameDesignState) -> GameDesignState:
                 "args": tc["args"],
                 "timestamp": str(time.time()), # Approximation, ideally captured in safe_agent_invoke
                 "result_summary": "Tool executed successfully", # We might want to capture actual result in safe_agent_invoke return
-                "raw_data_ref": None
+                "raw_data_ref": tc.get("raw_data_ref")  # Set when the output was spilled to the tool output store
             })
 
         reasoning_entry: AgentReasoning = {
@@ -167,22 +167,17 @@ async def market_analyst_node(state: GameDesignState) -> GameDesignState:
             "execution_time_ms": execution_time
         }
 
-        # Update State
-        new_reasoning_log = state.get("reasoning_log", []) + [reasoning_entry]
-        new_tool_log = state.get("tool_execution_log", []) + tool_calls_log
-
+        # Update State (list keys are appended by their reducers)
         return {
-            **state,
             "market_analysis": market_data,
             "current_step": "mechanics_designer",
-            "messages": state["messages"] + [HumanMessage(content=result["output"])],
-            "reasoning_log": new_reasoning_log,
-            "tool_execution_log": new_tool_log
+            "messages": [HumanMessage(content=result["output"])],
+            "reasoning_log": [reasoning_entry],
+            "tool_execution_log": tool_calls_log
         }
 
     except Exception as e:
         logger.error("market_analyst_failed", error=str(e))
         return {
-            **state,
-            "errors": state.get("errors", []) + [str(e)]
+            "errors": [str(e)]
         }
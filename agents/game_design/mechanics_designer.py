@@ -108,15 +108,13 @@ async def mechanics_designer_node(state: GameDesignState) -> GameDesignState:
             mechanics = []
 
         return {
-            **state,
             "mechanics": mechanics,
             "current_step": "system_designer",
-            "messages": state["messages"] + [HumanMessage(content=result["output"])]
+            "messages": [HumanMessage(content=result["output"])]
         }
 
     except Exception as e:
         logger.error("mechanics_designer_failed", error=str(e))
         return {
-            **state,
-            "errors": state.get("errors", []) + [str(e)]
+            "errors": [str(e)]
         }
@@ -117,7 +117,7 @@ Output as JSON following the specified schema.""")
         
         if result is None:
             logger.error("narrative_architect_failed")
-            return state
+            return {}
         
         # Parse narrative output
         narrative_output = result.get("content", "{}")
@@ -143,10 +143,9 @@ protagonist_name=narrative_structure.get("protagonist", {}).get("name", "Unknown
         )
         
         return {
-            **state,
             "narrative_structure": narrative_structure
         }
     
     except Exception as e:
         logger.exception("narrative_architect_error", error=str(e))
-        return state
+        return {}
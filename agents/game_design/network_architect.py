@@ -112,7 +112,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -127,10 +127,9 @@ Create:
         logger.info("network_architect_completed")
         
         return {
-            **state,
             "networking_spec": networking_spec
         }
     
     except Exception as e:
         logger.exception("network_architect_error", error=str(e))
-        return state
+        return {}
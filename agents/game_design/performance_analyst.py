@@ -160,7 +160,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -175,10 +175,9 @@ Create:
         logger.info("performance_analyst_completed")
         
         return {
-            **state,
             "performance_spec": performance_spec
         }
     
     except Exception as e:
         logger.exception("performance_analyst_error", error=str(e))
-        return state
+        return {}
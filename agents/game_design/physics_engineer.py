@@ -123,7 +123,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -138,10 +138,9 @@ Create:
         logger.info("physics_engineer_completed")
         
         return {
-            **state,
             "physics_spec": physics_spec
         }
     
     except Exception as e:
         logger.exception("physics_engineer_error", error=str(e))
-        return state
+        return {}
@@ -223,15 +223,13 @@ async def producer_node(state: GameDesignState) -> GameDesignState:
             }
 
         return {
-            **state,
             "production_plan": roadmap,
             "current_step": "gdd_writer",
-            "messages": state["messages"] + [HumanMessage(content=json.dumps(roadmap))]
+            "messages": [HumanMessage(content=json.dumps(roadmap))]
         }
 
     except Exception as e:
         logger.error("producer_failed", error=str(e))
         return {
-            **state,
-            "errors": state.get("errors", []) + [str(e)]
+            "errors": [str(e)]
         }
@@ -143,7 +143,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -158,10 +158,9 @@ Create:
         logger.info("qa_planner_completed")
         
         return {
-            **state,
             "qa_plan": qa_plan
         }
     
     except Exception as e:
         logger.exception("qa_planner_error", error=str(e))
-        return state
+        return {}
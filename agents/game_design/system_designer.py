@@ -94,15 +94,13 @@ async def system_designer_node(state: GameDesignState):
             }
 
         return {
-            **state,
             "technical_stack": tech_stack,
             # "current_step": "producer", # Removed to let graph handle flow
-            # "messages": state["messages"] + [HumanMessage(content=str(tech_stack))] # Optional
+            # "messages": [HumanMessage(content=str(tech_stack))] # Optional
         }
 
     except Exception as e:
         logger.error("system_designer_failed", error=str(e))
         return {
-            **state,
-            "errors": state.get("errors", []) + [str(e)]
+            "errors": [str(e)]
         }
@@ -80,7 +80,7 @@ Assess:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -99,10 +99,9 @@ Assess:
         )
         
         return {
-            **state,
             "technical_feasibility": feasibility_report
         }
     
     except Exception as e:
         logger.exception("technical_feasibility_validator_error", error=str(e))
-        return state
+        return {}
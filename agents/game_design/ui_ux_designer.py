@@ -100,7 +100,7 @@ Create:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -118,10 +118,9 @@ Create:
         )
         
         return {
-            **state,
             "ui_ux_design": ui_ux_design
         }
     
     except Exception as e:
         logger.exception("ui_ux_designer_error", error=str(e))
-        return state
+        return {}
@@ -30,7 +30,7 @@ async def validator_node(state: GameDesignState) -> GameDesignState:
     # Check if validation is enabled
     if not state.get("enable_validation", False):
         logger.info("validation_skipped", reason="enable_validation=False")
-        return state
+        return {}
     
     try:
         llm = create_model(
@@ -46,7 +46,7 @@ async def validator_node(state: GameDesignState) -> GameDesignState:
         # If no data to validate, skip
         if not market_analysis or not raw_data_cache:
             logger.warning("validator_no_data", reason="Missing market_analysis or raw_data_cache")
-            return state
+            return {}
         
         # System prompt for validation
         system_msg = SystemMessage(content="""You are a Data Quality Analyst for game design research.
@@ -125,7 +125,7 @@ async def validator_node(state: GameDesignState) -> GameDesignState:
         
         if result is None:
             logger.error("validator_failed", reason="safe_agent_invoke returned None")
-            return state
+            return {}
         
         # Parse validation output (expecting JSON)
         validation_output = result.get("content", "{}")
@@ -166,13 +166,12 @@ async def validator_node(state: GameDesignState) -> GameDesignState:
             passed=validation_result.get("validation_passed", True)
         )
         
-        return {**state, **state_update}
+        return state_update
     
     except Exception as e:
         logger.exception("validator_error", error=str(e))
         # Don't fail the workflow, just skip validation
         return {
-            **state,
             "validation_warnings": [{
                 "severity": "WARNING",
                 "category": "system",
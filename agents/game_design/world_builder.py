@@ -77,7 +77,7 @@ Output JSON:
         )
         
         if result is None:
-            return state
+            return {}
         
         output = result.get("content", "{}")
         if "```json" in output:
@@ -92,10 +92,9 @@ Output JSON:
         logger.info("world_builder_completed", world_name=world_lore.get("world_name", "Unknown"))
         
         return {
-            **state,
             "world_lore": world_lore
         }
     
     except Exception as e:
         logger.exception("world_builder_error", error=str(e))
-        return state
+        return {}
@@ -52,7 +52,6 @@ def interactive_breakpoint_node(state: SpiralState) -> SpiralState:
     
     # Store summary in state for frontend to display
     return {
-        **state,
         "progress_summary": summary,
         "last_checkpoint": "interactive_breakpoint"
     }
@@ -0,0 +1,195 @@
+"""
+WebSocket fan-out for job events (api/server.py).
+
+Every connection subscribes to topics (job ids, or "*" for all jobs) and owns
+a bounded send queue drained by its own sender task, so:
+
+- publish() never awaits: the graph's astream_events loop only enqueues
+- a slow browser only delays itself; a send that exceeds
+  settings.WS_SEND_TIMEOUT disconnects that client
+- high-frequency events are coalesced while queued (only the latest
+  gdd_update / metrics_update per job is kept)
+- when a queue is full the oldest non-critical event is dropped; status,
+  error and gate events are only dropped if nothing else is queued
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+from fastapi import WebSocket
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+ALL_JOBS = "*"
+
+# Event type -> message fields identifying what a newer event supersedes
+COALESCE_KEYS: Dict[str, Tuple[str, ...]] = {
+    "gdd_update": ("job_id",),
+    "metrics_update": ("job_id",),
+}
+
+# Never dropped in favour of other events
+CRITICAL_TYPES = {"status", "error", "director_questions", "gate_reached"}
+
+
+class ClientConnection:
+    """One WebSocket with its subscriptions and bounded outgoing queue."""
+
+    def __init__(self, websocket: WebSocket, topics: Iterable[str] = (), max_queue: int = settings.WS_SEND_QUEUE_SIZE):
+        self.websocket = websocket
+        self.topics: Set[str] = set(topics)
+        self.max_queue = max(1, max_queue)
+        # Entries are [coalesce_key, message] so a newer event can replace a queued one in place
+        self._queue: Deque[List[Any]] = deque()
+        self._pending: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._ready = asyncio.Event()
+        self._sender: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def wants(self, topic: str) -> bool:
+        return ALL_JOBS in self.topics or topic in self.topics
+
+    def enqueue(self, message: Dict[str, Any]) -> None:
+        msg_type = message.get("type")
+        key = None
+        if msg_type in COALESCE_KEYS:
+            key = (msg_type,) + tuple(message.get(field) for field in COALESCE_KEYS[msg_type])
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[1] = message
+                self.coalesced += 1
+                return
+
+        if len(self._queue) >= self.max_queue:
+            self._drop_one()
+
+        entry = [key, message]
+        self._queue.append(entry)
+        if key is not None:
+            self._pending[key] = entry
+        self._ready.set()
+
+    def _drop_one(self) -> None:
+        victim = next((e for e in self._queue if e[1].get("type") not in CRITICAL_TYPES), self._queue[0])
+        self._queue.remove(victim)
+        if victim[0] is not None:
+            self._pending.pop(victim[0], None)
+        self.dropped += 1
+
+    def start(self, on_failure) -> None:
+        self._sender = asyncio.create_task(self._send_loop(on_failure))
+
+    async def _send_loop(self, on_failure) -> None:
+        try:
+            while True:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                key, message = self._queue.popleft()
+                if key is not None:
+                    self._pending.pop(key, None)
+                try:
+                    text = json.dumps(message, separators=(",", ":"))
+                except (TypeError, ValueError) as e:
+                    # A bad event is the producer's bug, not a reason to drop the client
+                    logger.error("websocket_message_not_serializable", type=message.get("type"), error=str(e))
+                    continue
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=settings.WS_SEND_TIMEOUT)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("websocket_client_dropped", error=str(e) or type(e).__name__, queued=len(self._queue))
+            on_failure(self)
+
+    async def close(self) -> None:
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "topics": sorted(self.topics),
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
+class ConnectionManager:
+    """Topic-based WebSocket fan-out keyed by job id."""
+
+    def __init__(self, max_queue: int = settings.WS_SEND_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+
+    async def connect(self, websocket: WebSocket, topics: Iterable[str] = ()) -> ClientConnection:
+        await websocket.accept()
+        connection = ClientConnection(websocket, topics, self.max_queue)
+        self.active_connections[websocket] = connection
+        connection.start(self._on_send_failure)
+        return connection
+
+    def _on_send_failure(self, connection: ClientConnection) -> None:
+        self.active_connections.pop(connection.websocket, None)
+        asyncio.create_task(self._close_socket(connection.websocket))
+
+    @staticmethod
+    async def _close_socket(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)  # Try again later
+        except Exception:
+            pass
+
+    async def disconnect(self, websocket: WebSocket) -> None:
+        connection = self.active_connections.pop(websocket, None)
+        if connection is not None:
+            await connection.close()
+
+    def subscribe(self, websocket: WebSocket, topic: str) -> None:
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.topics.add(topic)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str) -> None:
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.topics.discard(topic)
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        """
+        Queue `message` for every connection subscribed to `topic`.
+
+        Never blocks on a client.
+
+        Returns:
+            Number of connections the message was queued for
+        """
+        delivered = 0
+        for connection in list(self.active_connections.values()):
+            if connection.wants(topic):
+                connection.enqueue(message)
+                delivered += 1
+        return delivered
+
+    def get_stats(self) -> Dict[str, Any]:
+        connections = [c.get_stats() for c in self.active_connections.values()]
+        return {
+            "connections": len(connections),
+            "queued": sum(c["queued"] for c in connections),
+            "dropped": sum(c["dropped"] for c in connections),
+            "coalesced": sum(c["coalesced"] for c in connections),
+        }
+
+    async def close_all(self) -> None:
+        for websocket in list(self.active_connections):
+            await self.disconnect(websocket)
@@ -17,6 +17,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from api.routes import budget, pipeline
 from core.budget_manager import BudgetManager
+from core.model_factory import close_model_clients
+from core.rag.store_registry import close_vector_stores
+from core.usage_tracking import usage_tracker
 
 
 @asynccontextmanager
@@ -29,6 +32,8 @@ async def lifespan(app: FastAPI):
     try:
         budget_manager = BudgetManager()
         app.state.budget_manager = budget_manager
+        # Charge credits for every LLM response (core/usage_tracking.py)
+        usage_tracker.budget_manager = budget_manager
         print("✅ Budget Manager initialized")
     except Exception as e:
         print(f"⚠️ Budget Manager warning: {e}")
@@ -39,6 +44,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown: Cleanup
     print("🛑 ARA Framework API shutting down...")
+    await pipeline.executor.shutdown()
+    usage_tracker.budget_manager = None
+    if app.state.budget_manager is not None:
+        await app.state.budget_manager.close()
+    await close_model_clients()
+    close_vector_stores()
 
 
 # Create FastAPI app
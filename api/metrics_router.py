@@ -1,19 +1,40 @@
 """
 Metrics API endpoints for LUDEX framework.
 """
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
 from core.metrics import metrics_collector
+from core.tiered_cache import get_cache_stats
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
 @router.get("")
 async def get_metrics():
     """Get current metrics summary."""
     summary = metrics_collector.get_summary()
     return summary
 
+@router.get("/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Metrics in Prometheus text exposition format (scrape target)."""
+    return PlainTextResponse(metrics_collector.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/recent")
+async def get_recent_executions(limit: Optional[int] = Query(None, ge=1)):
+    """Most recent agent executions (bounded ring buffer)."""
+    return metrics_collector.get_recent_executions(limit)
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """Hit rates of the MCP adapter caches (L1 memory / L2 Redis), per adapter."""
+    return get_cache_stats()
+
 @router.post("/reset")
 async def reset_metrics():
     """Reset metrics collector (for testing)."""
-    metrics_collector.metrics = []
+    metrics_collector.reset()
     return {"status": "reset"}
@@ -4,13 +4,14 @@ Pipeline Management API Routes
 Endpoints para gestión del pipeline que conectan con el frontend
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Literal, Optional, List
 from datetime import datetime
 import asyncio
 import sys
 import os
+import uuid
 
 # Agregar path para imports del core
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -22,12 +23,14 @@ except ImportError:
     AnalysisPipeline = None
     BudgetManager = None
 
+from core.job_executor import AdmissionError, Job, JobExecutor
+
 router = APIRouter()
 
 # Pydantic models
 class PipelineRequest(BaseModel):
     niche: str
-    priority: str = "normal"  # "low", "normal", "high"
+    priority: Literal["low", "normal", "high"] = "normal"
     budget_limit: Optional[float] = None
 
 class PipelineStatus(BaseModel):
@@ -50,78 +53,66 @@ class PipelineResult(BaseModel):
     cost: float = 0.0
     tokens_used: int = 0
 
-# Global state para tracking (en producción usaríamos Redis)
-pipeline_state = {
-    "status": "idle",
-    "current_phase": None,
-    "progress": 0.0,
-    "niche": None,
-    "started_at": None
-}
-
-active_pipelines = {}  # job_id -> pipeline_data
-
 @router.get("/pipeline/status", response_model=PipelineStatus)
 async def get_pipeline_status():
     """
     Obtener estado actual del pipeline
     
-    Usado por el dashboard para mostrar progreso en tiempo real
+    Usado por el dashboard para mostrar progreso en tiempo real.
+    Con varios análisis en paralelo refleja el más reciente en ejecución.
     """
+    running = executor.list_jobs("running")
+    if not running:
+        return PipelineStatus(status="idle", updated_at=datetime.now().isoformat())
+    
+    job = max(running, key=lambda j: j.started_at or "")
     return PipelineStatus(
-        status=pipeline_state["status"],
-        current_phase=pipeline_state["current_phase"],
-        progress_percentage=pipeline_state["progress"],
-        niche=pipeline_state["niche"],
-        started_at=pipeline_state["started_at"],
+        status=job.status,
+        current_phase=job.current_phase,
+        progress_percentage=job.progress,
+        niche=job.payload.get("niche"),
+        started_at=job.started_at,
         updated_at=datetime.now().isoformat()
     )
 
 @router.post("/pipeline/run")
-async def run_pipeline(
-    request: PipelineRequest,
-    background_tasks: BackgroundTasks
-):
+async def run_pipeline(request: PipelineRequest):
     """
     Iniciar análisis del pipeline
     
-    Ejecuta el pipeline en background y retorna job_id para tracking
+    Encola el análisis (prioridad según request.priority) y retorna job_id
+    para tracking; varios análisis pueden ejecutarse a la vez.
     """
-    if pipeline_state["status"] == "running":
-        raise HTTPException(
-            status_code=409, 
-            detail="Pipeline is already running. Only one analysis at a time."
-        )
-    
     # Generar job ID
-    job_id = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    
-    # Actualizar estado
-    pipeline_state.update({
-        "status": "running",
-        "current_phase": "initialization",
-        "progress": 0.0,
-        "niche": request.niche,
-        "started_at": datetime.now().isoformat()
-    })
+    job_id = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
     
-    # Agregar job a tracking
-    active_pipelines[job_id] = {
-        "niche": request.niche,
-        "status": "running",
-        "created_at": datetime.now().isoformat(),
-        "progress": 0.0
-    }
-    
-    # Ejecutar pipeline en background
-    background_tasks.add_task(execute_pipeline_task, job_id, request)
+    try:
+        job = executor.submit(
+            {"niche": request.niche, "budget_limit": request.budget_limit},
+            priority=request.priority,
+            job_id=job_id,
+        )
+    except AdmissionError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     
     return {
-        "message": "Pipeline started successfully",
-        "job_id": job_id,
+        "message": "Pipeline started successfully" if job.status == "running" else "Pipeline queued",
+        "job_id": job.id,
         "niche": request.niche,
+        "status": job.status,
+        "queue_position": executor.queue_position(job.id),
         "estimated_duration": "45-60 minutes",
-        "status_url": f"/api/pipeline/jobs/{job_id}"
+        "status_url": f"/api/pipeline/jobs/{job.id}"
+    }
+
+@router.get("/pipeline/jobs")
+async def list_pipeline_jobs(status: Optional[str] = None):
+    """
+    Listar jobs (en cola, en ejecución y terminados recientes) y carga del executor
+    """
+    return {
+        "jobs": [_job_response(job) for job in executor.list_jobs(status)],
+        "stats": executor.get_stats()
     }
 
 @router.get("/pipeline/jobs/{job_id}")
@@ -129,31 +120,22 @@ async def get_pipeline_job(job_id: str):
     """
     Obtener estado de un job específico
     """
-    if job_id not in active_pipelines:
+    job = executor.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Pipeline job not found")
     
-    return active_pipelines[job_id]
+    return _job_response(job)
 
 @router.delete("/pipeline/jobs/{job_id}")
 async def cancel_pipeline_job(job_id: str):
     """
-    Cancelar un job del pipeline
+    Cancelar un job del pipeline (en cola o en ejecución)
     """
-    if job_id not in active_pipelines:
+    if executor.get(job_id) is None:
         raise HTTPException(status_code=404, detail="Pipeline job not found")
     
-    # Marcar como cancelado
-    active_pipelines[job_id]["status"] = "cancelled"
-    
-    # Actualizar estado global si es el job activo
-    if pipeline_state["status"] == "running":
-        pipeline_state.update({
-            "status": "idle",
-            "current_phase": None,
-            "progress": 0.0,
-            "niche": None,
-            "started_at": None
-        })
+    if not executor.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Pipeline job {job_id} already finished")
     
     return {"message": f"Pipeline job {job_id} cancelled successfully"}
 
@@ -227,78 +209,44 @@ async def get_available_models():
         "total_models": 3
     }
 
-async def execute_pipeline_task(job_id: str, request: PipelineRequest):
+def _job_response(job: Job) -> Dict[str, Any]:
+    response = job.to_dict()
+    response["queue_position"] = executor.queue_position(job.id)
+    if job.status == "completed" and isinstance(job.result, dict):
+        response.update(job.result)
+    return response
+
+async def execute_pipeline_task(job: Job):
     """
-    Ejecutar pipeline en background
+    Ejecutar pipeline de un job (llamado por el JobExecutor)
     
-    Simula ejecución del pipeline actual y actualiza el estado
+    Simula ejecución del pipeline actual y actualiza el estado del job
     """
-    try:
-        phases = [
-            ("initialization", 5),
-            ("niche_analysis", 20),
-            ("literature_research", 35), 
-            ("technical_architecture", 55),
-            ("implementation_planning", 75),
-            ("content_synthesis", 90),
-            ("finalization", 100)
-        ]
-        
-        for phase_name, progress in phases:
-            # Actualizar estado global
-            pipeline_state.update({
-                "current_phase": phase_name,
-                "progress": progress
-            })
-            
-            # Actualizar job específico
-            active_pipelines[job_id].update({
-                "status": "running",
-                "progress": progress,
-                "current_phase": phase_name
-            })
-            
-            # Simular trabajo (en producción sería el pipeline real)
-            await asyncio.sleep(2)
-            
-            # Check si fue cancelado
-            if active_pipelines[job_id]["status"] == "cancelled":
-                return
-        
-        # Completar pipeline
-        pipeline_state.update({
-            "status": "completed",
-            "current_phase": "completed",
-            "progress": 100.0
-        })
-        
-        active_pipelines[job_id].update({
-            "status": "completed",
-            "progress": 100.0,
-            "completed_at": datetime.now().isoformat(),
-            "final_report": "# Analysis Complete\n\nDetailed analysis report would go here...",
-            "cost": 3.47,
-            "tokens_used": 23500
-        })
-        
-        # Después de 5 segundos, resetear estado para siguiente job
-        await asyncio.sleep(5)
-        pipeline_state.update({
-            "status": "idle",
-            "current_phase": None,
-            "progress": 0.0,
-            "niche": None,
-            "started_at": None
-        })
-        
-    except Exception as e:
-        # Marcar como fallido
-        pipeline_state.update({
-            "status": "failed",
-            "current_phase": "error"
-        })
+    phases = [
+        ("initialization", 5),
+        ("niche_analysis", 20),
+        ("literature_research", 35), 
+        ("technical_architecture", 55),
+        ("implementation_planning", 75),
+        ("content_synthesis", 90),
+        ("finalization", 100)
+    ]
+    
+    for phase_name, progress in phases:
+        job.current_phase = phase_name
+        job.progress = progress
         
-        active_pipelines[job_id].update({
-            "status": "failed",
-            "error": str(e)
-        })
\ No newline at end of file
+        # Simular trabajo (en producción sería el pipeline real).
+        # La cancelación llega como CancelledError en este await.
+        await asyncio.sleep(2)
+    
+    job.current_phase = "completed"
+    return {
+        "completed_at": datetime.now().isoformat(),
+        "final_report": "# Analysis Complete\n\nDetailed analysis report would go here...",
+        "cost": 3.47,
+        "tokens_used": 23500
+    }
+
+# Executor compartido: cola con prioridad y workers acotados (en producción usaríamos Redis)
+executor = JobExecutor(execute_pipeline_task)
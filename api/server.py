@@ -1,18 +1,52 @@
 import structlog
 import asyncio
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, BackgroundTasks, Header, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional
 from pydantic import BaseModel
 
+from langgraph.checkpoint.memory import MemorySaver
+
 from graphs.game_design_graph import create_game_design_graph
 from core.state import GameDesignState
 from api.metrics_router import router as metrics_router
 from config.settings import settings
+from core.budget_manager import close_budget_manager, get_budget_manager
+from core.model_factory import close_model_clients
+from core.rag.store_registry import close_vector_stores
+from core.job_executor import AdmissionError, Job, JobExecutor, JobInterrupted
+from core.checkpointing import open_checkpointer, thread_config
+from core.langgraph_monitoring import get_monitor
+from core.usage_tracking import usage_tracker
+from api.connection_manager import ALL_JOBS, ConnectionManager
+from api.state_stream import StateStream
 
 logger = structlog.get_logger(__name__)
 
-app = FastAPI(title="LUDEX Studio API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _checkpointer, _job_graph
+    # Charge Copilot credits for every LLM response of the graph (core/usage_tracking.py)
+    try:
+        usage_tracker.budget_manager = await get_budget_manager()
+    except Exception as e:
+        logger.warning("budget_manager_unavailable", error=str(e))
+    # Durable checkpoints: paused or crashed jobs resume from their last completed node
+    async with open_checkpointer() as checkpointer:
+        _checkpointer, _job_graph = checkpointer, None
+        yield
+        # Stop running jobs before the checkpointer closes
+        await executor.shutdown()
+    _checkpointer, _job_graph = None, None
+    usage_tracker.budget_manager = None
+    await close_budget_manager()
+    # Release pooled LLM connections and vector-store handles
+    await manager.close_all()
+    await close_model_clients()
+    close_vector_stores()
+
+app = FastAPI(title="LUDEX Studio API", lifespan=lifespan)
 
 # Include routers
 app.include_router(metrics_router)
@@ -26,47 +60,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# WebSocket Manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: Dict[str, Any]):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error("websocket_send_failed", error=str(e))
-
+# WebSocket Manager (per-job topics, bounded per-connection queues)
 manager = ConnectionManager()
 
 # Request Model
 class GameRequest(BaseModel):
     concept: str
     genre: str = "Unknown"
+    priority: Literal["low", "normal", "high"] = "normal"
+    llm_provider: str = "github"
+
+class ResumeRequest(BaseModel):
+    answer: Optional[str] = None  # Answer to the director's questions, if it asked any
+
+# Graph shared by all jobs; each job runs on its own checkpoint thread
+_checkpointer = None
+_job_graph = None
+
+def get_job_graph():
+    global _job_graph
+    if _job_graph is None:
+        _job_graph = create_game_design_graph(checkpointer=_checkpointer or MemorySaver())
+    return _job_graph
+
+# Last state sent per running job (delta encoding, resync snapshots)
+state_streams: Dict[str, StateStream] = {}
 
 # Graph Runner
-async def run_graph_background(concept: str, genre: str):
-    """Runs the LangGraph workflow and broadcasts updates."""
+async def run_graph_job(job: Job):
+    """Runs the LangGraph workflow for one job and broadcasts updates."""
+    concept = job.payload["concept"]
+    genre = job.payload["genre"]
+    monitor = get_monitor()
     try:
-        logger.info("starting_graph_execution", concept=concept)
+        logger.info("starting_graph_execution", job_id=job.id, concept=concept)
         
         # Notify start
-        await manager.broadcast({
+        manager.publish(job.id, {
             "type": "status",
+            "job_id": job.id,
             "agent": "system",
             "status": "started",
             "message": f"Starting analysis for: {concept}"
         })
 
-        graph = create_game_design_graph()
+        graph = get_job_graph()
+        stream = state_streams[job.id] = StateStream(job.id)
+        
+        # Resumed jobs continue from their checkpoint instead of starting over
+        resume = job.payload.pop("resume", None)
+        if resume is not None and resume.get("state_update"):
+            await graph.aupdate_state(job.config, resume["state_update"], as_node=resume.get("as_node"))
         
         initial_state = GameDesignState(
             concept=concept,
@@ -78,18 +122,29 @@ async def run_graph_background(concept: str, genre: str):
             gdd_content={},
             messages=[],
             current_step="start",
-            errors=[]
+            errors=[],
+            llm_provider=job.provider
         )
 
+        # Per-node timing; LLM tokens/cost are credited by core/usage_tracking.py
+        monitor.start_graph_execution(job.id, job.thread_id, initial_state if resume is None else {})
+
         # Stream events using astream_events for granular transparency
         # version="v1" is standard for LangGraph
-        async for event in graph.astream_events(initial_state, version="v1"):
+        graph_input = None if resume is not None else initial_state
+        async for event in graph.astream_events(graph_input, config=job.config, version="v1"):
             kind = event["event"]
+            node_name = event.get("metadata", {}).get("langgraph_node")
+            
+            # 0. Node start (the node's own runnable carries its name)
+            if kind == "on_chain_start" and node_name and event["name"] == node_name:
+                monitor.start_node_execution(job.id, node_name, event["data"].get("input") or {})
             
             # 1. Handle Tool Execution Events (Real-time Transparency)
-            if kind == "on_tool_start":
-                await manager.broadcast({
+            elif kind == "on_tool_start":
+                manager.publish(job.id, {
                     "type": "tool_call_started",
+                    "job_id": job.id,
                     "agent": event.get("metadata", {}).get("langgraph_node", "unknown"),
                     "tool": event["name"],
                     "args": event["data"].get("input")
@@ -97,8 +152,9 @@ async def run_graph_background(concept: str, genre: str):
                 logger.info("tool_started", tool=event["name"])
                 
             elif kind == "on_tool_end":
-                await manager.broadcast({
+                manager.publish(job.id, {
                     "type": "tool_call_completed",
+                    "job_id": job.id,
                     "agent": event.get("metadata", {}).get("langgraph_node", "unknown"),
                     "tool": event["name"],
                     "result": str(event["data"].get("output"))[:200] + "..." # Truncate for UI
@@ -108,38 +164,130 @@ async def run_graph_background(concept: str, genre: str):
             # 2. Handle Node Completion (State Updates)
             elif kind == "on_chain_end":
                 # We only care about the top-level node completion, which usually matches the node name
-                node_name = event.get("metadata", {}).get("langgraph_node")
                 if node_name and node_name != "__start__":
                     output = event["data"].get("output")
-                    if isinstance(output, dict): # Ensure it's a state update
-                        await manager.broadcast({
-                            "type": "agent_update",
+                    if event["name"] == node_name:
+                        monitor.complete_node_execution(job.id, node_name, output if isinstance(output, dict) else {})
+                        summary = monitor.get_execution_summary(job.id)
+                        manager.publish(job.id, {
+                            "type": "metrics_update",
+                            "job_id": job.id,
                             "agent": node_name,
-                            "status": "done",
-                            "data": output
+                            "total_tokens": summary["total_tokens"],
+                            "total_cost_usd": summary["total_cost_usd"],
                         })
+                    if isinstance(output, dict): # Ensure it's a state update
+                        job.current_phase = node_name
+                        # Only what changed since the last message (periodic full snapshots)
+                        manager.publish(job.id, stream.update(node_name, output))
                         
                         # If GDD is ready, send it
                         if "gdd_content" in output:
-                            await manager.broadcast({
+                            manager.publish(job.id, {
                                 "type": "gdd_update",
+                                "job_id": job.id,
                                 "markdown": output["gdd_content"].get("full_doc", "")
                             })
 
+        # Paused at an interrupt gate: free the worker until the job is resumed
+        snapshot = await graph.aget_state(job.config)
+        if snapshot.next:
+            manager.publish(job.id, {
+                "type": "status",
+                "job_id": job.id,
+                "agent": "system",
+                "status": "interrupted",
+                "message": f"Waiting for approval before: {', '.join(snapshot.next)}"
+            })
+            raise JobInterrupted(snapshot.next)
+        
+        # Director needs clarification: park the job until /jobs/{id}/resume brings an answer
+        if snapshot.values.get("awaiting_input"):
+            manager.publish(job.id, {
+                "type": "director_questions",
+                "job_id": job.id,
+                "questions": snapshot.values.get("director_questions", [])
+            })
+            raise JobInterrupted(("director",))
+
+        monitor.complete_graph_execution(job.id, snapshot.values)
+
         # Notify completion
-        await manager.broadcast({
+        manager.publish(job.id, {
             "type": "status",
+            "job_id": job.id,
             "agent": "system",
             "status": "completed",
             "message": "Game Design Document generated successfully."
         })
 
+    except JobInterrupted:
+        monitor.complete_graph_execution(job.id, {}, "interrupted")
+        raise
+    except asyncio.CancelledError:
+        monitor.complete_graph_execution(job.id, {}, "cancelled")
+        raise
     except Exception as e:
-        logger.error("graph_execution_failed", error=str(e))
-        await manager.broadcast({
+        monitor.complete_graph_execution(job.id, {}, "failed")
+        logger.error("graph_execution_failed", job_id=job.id, error=str(e))
+        manager.publish(job.id, {
             "type": "error",
+            "job_id": job.id,
             "message": str(e)
         })
+        raise
+    finally:
+        state_streams.pop(job.id, None)
+
+executor = JobExecutor(run_graph_job)
+
+async def resume_job(job_id: str, answer: Optional[str] = None) -> Job:
+    """
+    Continue a job from its last checkpoint (also after a server restart).
+    
+    With `answer`, the director's questions and the answer are appended to the
+    concept and the run restarts at the director; otherwise it continues at
+    the next pending node (approved gate, or the node that failed).
+    """
+    if not job_id:
+        raise HTTPException(status_code=400, detail="job_id is required")
+    job = executor.get(job_id)
+    if job is not None and not job.done:
+        raise HTTPException(status_code=409, detail=f"Job is still {job.status}")
+    
+    snapshot = await get_job_graph().aget_state(thread_config(job_id))
+    values = snapshot.values
+    if not values:
+        raise HTTPException(status_code=404, detail="No checkpoint found for this job")
+    
+    if answer:
+        questions = "\n".join(f"Q: {q}" for q in values.get("director_questions", []))
+        resume = {
+            "state_update": {
+                "concept": f"{values['concept']}\n\nClarifications:\n{questions}\nA: {answer}",
+                "awaiting_input": False,
+            },
+            "as_node": "__start__",
+        }
+    elif snapshot.next:
+        resume = {}
+    elif values.get("awaiting_input"):
+        raise HTTPException(status_code=409, detail="The director is waiting for an answer")
+    else:
+        raise HTTPException(status_code=409, detail="Job already completed")
+    
+    try:
+        if job is None:
+            job = executor.submit(
+                {"concept": values["concept"], "genre": values.get("genre", "Unknown"), "resume": resume},
+                provider=values.get("llm_provider", "github"),
+                job_id=job_id,
+            )
+        else:
+            executor.resume(job_id, {"resume": resume})
+    except AdmissionError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job
 
 @app.get("/health")
 async def health_check():
@@ -147,58 +295,155 @@ async def health_check():
     return {"status": "ok", "service": "LUDEX Game Design API"}
 
 @app.post("/start")
-async def start_generation(request: GameRequest, background_tasks: BackgroundTasks):
-    """Starts the game design generation process."""
-    background_tasks.add_task(run_graph_background, request.concept, request.genre)
-    return {"status": "started", "message": "Generation queued"}
+async def start_generation(request: GameRequest):
+    """Queues a game design generation job (runs concurrently with other jobs)."""
+    try:
+        job = executor.submit(
+            {"concept": request.concept, "genre": request.genre},
+            priority=request.priority,
+            provider=request.llm_provider,
+        )
+    except AdmissionError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {
+        "status": "started" if job.status == "running" else "queued",
+        "message": "Generation queued",
+        "job_id": job.id,
+        "queue_position": executor.queue_position(job.id),
+    }
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None):
+    """Lists known jobs plus executor load."""
+    return {
+        "jobs": [job.to_dict() for job in executor.list_jobs(status)],
+        "stats": executor.get_stats(),
+        "websockets": manager.get_stats(),
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = executor.get(job_id)
+    if job is None:
+        # Not in memory (e.g. after a restart): report what the checkpoint allows
+        snapshot = await get_job_graph().aget_state(thread_config(job_id))
+        if not snapshot.values:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {
+            "job_id": job_id,
+            "status": "resumable" if snapshot.next or snapshot.values.get("awaiting_input") else "completed",
+            "next": list(snapshot.next),
+        }
+    return {**job.to_dict(), "queue_position": executor.queue_position(job_id)}
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job_endpoint(job_id: str, request: Optional[ResumeRequest] = None):
+    """Resumes an interrupted, failed or crashed job from its last completed node."""
+    job = await resume_job(job_id, request.answer if request else None)
+    return {"status": job.status, "job_id": job.id, "queue_position": executor.queue_position(job.id)}
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if executor.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not executor.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already finished")
+    return {"status": "cancelled", "job_id": job_id}
+
+def _message_job_id(connection, message: Dict[str, Any]) -> Optional[str]:
+    """Job a client message refers to: explicit job_id, or the single job it follows."""
+    if message.get("job_id"):
+        return message["job_id"]
+    topics = [t for t in connection.topics if t != ALL_JOBS]
+    return topics[0] if len(topics) == 1 else None
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, job_id: Optional[str] = Query(None)):
+    """
+    Job event stream.
+    
+    Connect with ?job_id=<id> (from /start) to receive that job's events, or
+    ?job_id=* for every job; send {"type": "subscribe" | "unsubscribe", "job_id": ...}
+    to change subscriptions later. agent_update events carry a JSON-patch delta
+    and a seq; on a gap send {"type": "resync"} to get a full snapshot.
+    """
+    connection = await manager.connect(websocket, [job_id] if job_id else [])
     try:
         while True:
             # Listen for client messages
             message = await websocket.receive_json()
             message_type = message.get("type")
             
-            if message_type == "director_answer":
-                # Director answer received from client
+            if message_type == "subscribe":
+                topic = message.get("job_id") or ALL_JOBS
+                manager.subscribe(websocket, topic)
+                connection.enqueue({"type": "subscribed", "job_id": topic})
+                
+            elif message_type == "unsubscribe":
+                topic = message.get("job_id") or ALL_JOBS
+                manager.unsubscribe(websocket, topic)
+                connection.enqueue({"type": "unsubscribed", "job_id": topic})
+                
+            elif message_type == "resync":
+                # Client missed a seq: send the full state of the job(s) it follows
+                for topic, stream in list(state_streams.items()):
+                    if message.get("job_id") in (None, topic) and connection.wants(topic):
+                        connection.enqueue(stream.snapshot())
+                
+            elif message_type == "director_answer":
+                # Director answer received from client: re-run the director with it
                 answer = message.get("answer", "")
-                logger.info("director_answer_received", answer=answer)
-                # TODO: Resume graph with this answer
-                # For now, just acknowledge
-                await websocket.send_json({
-                    "type": "director_answer_received",
-                    "status": "processing"
-                })
+                target = _message_job_id(connection, message)
+                logger.info("director_answer_received", job_id=target, answer=answer)
+                try:
+                    await resume_job(target, answer)
+                    connection.enqueue({
+                        "type": "director_answer_received",
+                        "job_id": target,
+                        "status": "processing"
+                    })
+                except HTTPException as e:
+                    connection.enqueue({"type": "error", "job_id": target, "message": e.detail})
                 
             elif message_type == "gate_approve":
-                # Gate approved by user
+                # Gate approved by user: continue from the checkpoint
                 gate = message.get("gate")
-                logger.info("gate_approved", gate=gate)
-                # TODO: Resume graph execution
-                await websocket.send_json({
-                    "type": "gate_approved",
-                    "gate": gate
-                })
+                target = _message_job_id(connection, message)
+                logger.info("gate_approved", job_id=target, gate=gate)
+                try:
+                    await resume_job(target)
+                    connection.enqueue({
+                        "type": "gate_approved",
+                        "job_id": target,
+                        "gate": gate
+                    })
+                except HTTPException as e:
+                    connection.enqueue({"type": "error", "job_id": target, "message": e.detail})
                 
             elif message_type == "gate_reject":
                 # Gate rejected by user
-                logger.info("gate_rejected")
-                await websocket.send_json({
+                target = _message_job_id(connection, message)
+                logger.info("gate_rejected", job_id=target)
+                if target:
+                    executor.cancel(target)
+                connection.enqueue({
                     "type": "gate_rejected",
+                    "job_id": target,
                     "status": "cancelled"
                 })
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        await manager.disconnect(websocket)
 
 
 @app.get("/config/providers")
 async def get_providers():
-    """Get available LLM providers."""
+    """Get available LLM providers (and the live signals used by provider "auto")."""
     from core.model_factory import get_available_providers
-    return {"providers": get_available_providers()}
+    from core.model_router import model_router
+    return {"providers": get_available_providers(), "router": model_router.get_status()}
 
 @app.post("/config/provider")
 async def set_provider(data: dict):
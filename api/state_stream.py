@@ -0,0 +1,141 @@
+"""
+Delta-encoded state streaming for job events (api/server.py).
+
+Sending the graph state after every node means each WebSocket message
+carries the whole, growing GameDesignState. A StateStream per job remembers
+what clients were last sent and encodes each node output as a JSON-patch
+style list of operations instead:
+
+- {"op": "add", "path": "/mechanics", "value": [...]}    new key
+- {"op": "add", "path": "/messages/-", "value": {...}}   appended list item
+- {"op": "replace", "path": "/gdd_content/full_doc", "value": "..."}
+- {"op": "remove", "path": "/awaiting_input"}
+
+Messages carry a `seq`; the first one and every settings.WS_STATE_SNAPSHOT_INTERVAL-th
+one is a full snapshot. A client that sees a gap (events may be dropped under
+back-pressure) sends {"type": "resync", "job_id": ...} and gets a snapshot.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from config.settings import settings
+from core.scheduling import APPEND_KEYS
+
+
+def _escape(key: Any) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _jsonable(state: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-safe copy of a state dict; values that cannot be encoded become strings."""
+    encoded = {}
+    for key, value in state.items():
+        try:
+            encoded[key] = jsonable_encoder(value)
+        except Exception:
+            encoded[key] = str(value)
+    return encoded
+
+
+def diff_state(old: Dict[str, Any], new: Dict[str, Any], path: str = "") -> List[Dict[str, Any]]:
+    """
+    Patch operations turning `old` into `new` (both JSON-like).
+
+    Nested dicts are diffed key by key; a list that only grew becomes one
+    "add .../-" per new item; anything else is replaced whole.
+    """
+    ops: List[Dict[str, Any]] = []
+    for key in sorted(old.keys() - new.keys(), key=str):
+        ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+
+    for key, value in new.items():
+        key_path = f"{path}/{_escape(key)}"
+        if key not in old:
+            ops.append({"op": "add", "path": key_path, "value": value})
+            continue
+        previous = old[key]
+        if previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            ops.extend(diff_state(previous, value, key_path))
+        elif (
+            isinstance(previous, list)
+            and isinstance(value, list)
+            and len(value) > len(previous)
+            and value[: len(previous)] == previous
+        ):
+            ops.extend({"op": "add", "path": f"{key_path}/-", "value": item} for item in value[len(previous):])
+        else:
+            ops.append({"op": "replace", "path": key_path, "value": value})
+    return ops
+
+
+def apply_patch(state: Dict[str, Any], ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply operations from diff_state in place (reference client implementation)."""
+    for op in ops:
+        *parents, last = [_unescape(token) for token in op["path"].split("/")[1:]]
+        target = state
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if op["op"] == "remove":
+            del target[last]
+        elif isinstance(target, list):
+            if last == "-":
+                target.append(op["value"])
+            else:
+                target[int(last)] = op["value"]
+        else:
+            target[last] = op["value"]
+    return state
+
+
+class StateStream:
+    """
+    Tracks the state last sent for one job and encodes node outputs as deltas.
+
+    Args:
+        job_id: Job whose events are encoded
+        snapshot_interval: Send a full snapshot every N updates (0 = first only)
+    """
+
+    def __init__(self, job_id: str, snapshot_interval: int = settings.WS_STATE_SNAPSHOT_INTERVAL):
+        self.job_id = job_id
+        self.snapshot_interval = snapshot_interval
+        self.state: Dict[str, Any] = {}
+        self.seq = 0
+
+    def _message(self, agent: Optional[str]) -> Dict[str, Any]:
+        return {"type": "agent_update", "job_id": self.job_id, "agent": agent, "status": "done", "seq": self.seq}
+
+    def update(self, agent: str, output: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Encode a node's partial update as the next message.
+
+        APPEND_KEYS are appended to, mirroring the graph's reducers.
+
+        Returns:
+            agent_update message with either `patch` (delta) or `state` (snapshot)
+        """
+        update = _jsonable(output)
+        for key in APPEND_KEYS:
+            if isinstance(update.get(key), list) and isinstance(self.state.get(key), list):
+                update[key] = self.state[key] + update[key]
+        new_state = {**self.state, **update}
+        self.seq += 1
+        message = self._message(agent)
+        if self.seq == 1 or (self.snapshot_interval and self.seq % self.snapshot_interval == 0):
+            message.update(encoding="snapshot", state=new_state)
+        else:
+            message.update(encoding="delta", patch=diff_state(self.state, new_state))
+        self.state = new_state
+        return message
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full state at the current seq (for client resync)."""
+        return {"type": "state_snapshot", "job_id": self.job_id, "seq": self.seq, "encoding": "snapshot", "state": self.state}
@@ -1,22 +1,158 @@
 """
 Utilidades para crear y ejecutar agentes con mejor manejo de errores.
 """
+import asyncio
 import structlog
 from typing import List, Dict, Any, Optional, Union
 from langchain_core.messages import BaseMessage, AIMessage, ToolMessage
 from langchain_core.tools import BaseTool
+from pydantic import BaseModel
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 
 logger = structlog.get_logger(__name__)
 
 
-from core.context_manager import ContextManager
+from core.context_manager import ContextManager, message_tokens, tool_schema_tokens
 
 # Instantiate singleton
 context_manager = ContextManager()
 
 from core.contracts import validate_input, BaseContract
+from core.llm_cache import LLMResponseCache, get_llm_cache
+from core.metrics import metrics_collector
+from core.tool_output_store import compact_tool_result
+from core.model_factory import create_model, fit_fallbacks, model_provider
+from core.usage_tracking import InsufficientCreditsError, usage_scope, usage_tracker
+from tools.tool_output_tool import FETCH_TOOL_NAME, fetch_tool_output
+from config.settings import settings
+
+
+async def _cached_ainvoke(
+    runnable: Any,
+    llm: Any,
+    messages: List[BaseMessage],
+    cache: Optional[LLMResponseCache],
+    agent_name: Optional[str],
+    tools: Optional[List[BaseTool]] = None,
+    output_schema: Optional[type[BaseModel]] = None,
+) -> Any:
+    """
+    Invoca `runnable` pasando por el cache de respuestas (si está activo).
+    
+    `llm` es el modelo base (sin tools/structured output) del que se leen
+    provider, modelo y temperatura para construir la clave.
+    
+    Las llamadas que llegan al modelo reservan antes sus créditos
+    (usage_tracker.prepaid_call); un acierto de cache no consume nada.
+    
+    Raises:
+        InsufficientCreditsError: Si el presupuesto no cubre la llamada
+    """
+    async def call() -> Any:
+        async with usage_tracker.prepaid_call(llm, agent_name):
+            return await runnable.ainvoke(messages)
+    
+    if cache is None:
+        return await call()
+    
+    try:
+        key = cache.make_key(llm, tools, output_schema, messages)
+    except Exception as e:
+        logger.warning("llm_cache_key_failed", agent=agent_name, error=str(e))
+        return await call()
+
+    cached = await cache.get(key, output_schema)
+    metrics_collector.record_cache_lookup(agent_name or "unknown", hit=cached is not None)
+    if cached is not None:
+        logger.info("llm_cache_hit", agent=agent_name, key=key[:12])
+        return cached
+    
+    response = await call()
+    await cache.set(key, response)
+    return response
+
+
+async def _budget_fallback_model(llm: Any, model: str, agent_name: Optional[str]) -> Any:
+    """
+    Modelo que sustituye a `llm` cuando el presupuesto no cubre `model`
+    (BudgetManager.get_fallback_model, mismo provider y temperatura).
+    
+    Raises:
+        InsufficientCreditsError: Si `llm` no salió de create_model o no hay alternativa
+    """
+    provider = model_provider(llm)
+    fallback = await usage_tracker.budget_manager.get_fallback_model(model)
+    if provider is None or fallback == model:
+        raise InsufficientCreditsError(model)
+    
+    logger.warning("budget_fallback_model", agent=agent_name, model=model, fallback=fallback)
+    return create_model(provider, model=fallback, temperature=getattr(llm, "temperature", 0.7))
+
+
+async def _execute_tool_call(
+    tool_call: Dict[str, Any],
+    tools_by_name: Dict[str, BaseTool],
+    semaphore: asyncio.Semaphore,
+) -> ToolMessage:
+    """
+    Ejecuta una tool call y devuelve su ToolMessage (nunca lanza excepción).
+    
+    El semáforo limita cuántas tools del mismo agente corren a la vez.
+    """
+    tool_call_id = tool_call.get("id", "unknown")
+    tool = tools_by_name.get(tool_call["name"])
+    
+    if not tool:
+        logger.error(
+            "tool_not_found",
+            tool_name=tool_call["name"],
+            available_tools=list(tools_by_name),
+        )
+        return ToolMessage(
+            content=f"Error: Tool '{tool_call['name']}' not found",
+            tool_call_id=tool_call_id,
+        )
+    
+    try:
+        async with semaphore:
+            logger.info(
+                "executing_tool",
+                tool_name=tool.name,
+                args=tool_call["args"],
+            )
+            result = await tool.ainvoke(tool_call["args"])
+        
+        if tool.name == FETCH_TOOL_NAME:
+            # Already paged to TOOL_OUTPUT_FETCH_MAX_TOKENS; never spill it again
+            content, raw_data_ref = str(result), None
+        else:
+            # Large outputs go to the blob store; the conversation keeps a summary + ref
+            content, raw_data_ref = await compact_tool_result(result)
+        logger.info(
+            "tool_executed_successfully",
+            tool_name=tool.name,
+            result_length=len(content),
+            raw_data_ref=raw_data_ref,
+        )
+        return ToolMessage(
+            content=content,
+            tool_call_id=tool_call_id,
+            artifact={"raw_data_ref": raw_data_ref} if raw_data_ref else None,
+        )
+    
+    except Exception as tool_error:
+        logger.error(
+            "tool_execution_failed",
+            tool_name=tool.name,
+            error=str(tool_error),
+        )
+        # Devolver el error como mensaje para que el agente continúe
+        return ToolMessage(
+            content=f"Error executing {tool.name}: {str(tool_error)}",
+            tool_call_id=tool_call_id,
+        )
+
 
 async def safe_agent_invoke(
     llm: Union[ChatGroq, ChatOpenAI],
@@ -27,6 +163,8 @@ async def safe_agent_invoke(
     output_schema: Optional[type[BaseModel]] = None,
     input_contract: Optional[type[BaseContract]] = None,
     max_iterations: int = 5,
+    use_cache: bool = True,
+    max_tool_concurrency: int = settings.AGENT_MAX_TOOL_CONCURRENCY,
 ) -> Dict[str, Any]:
     """
     Ejecuta un agente con manejo robusto de errores, Context Management, Structured Output y Contratos.
@@ -40,10 +178,41 @@ async def safe_agent_invoke(
         output_schema: Modelo Pydantic para validar la salida (opcional)
         input_contract: Modelo Pydantic para validar la entrada (opcional)
         max_iterations: Máximo de iteraciones tool-calling
+        use_cache: Reutilizar respuestas cacheadas (False para nodos creativos;
+            ver también settings.LLM_CACHE_MAX_TEMPERATURE y LLM_CACHE_EXCLUDED_AGENTS)
+        max_tool_concurrency: Máximo de tool calls ejecutadas a la vez por respuesta
     
     Returns:
         Dict con 'output' y 'tool_calls'.
     """
+    metric = metrics_collector.start_agent(agent_name or "unknown")
+    # Atribuir cada llamada al LLM de esta ejecución al agente (core/usage_tracking.py)
+    with usage_scope(agent_name) as usage:
+        result = await _run_agent(
+            llm, tools, messages, state, agent_name, output_schema, input_contract,
+            max_iterations, use_cache, max_tool_concurrency,
+        )
+    
+    if result.get("error"):
+        metric.fail(result["error"], tokens=usage.total_tokens, cost_usd=usage.cost_usd)
+    else:
+        metric.complete(tokens=usage.total_tokens, cost_usd=usage.cost_usd)
+    return result
+
+
+async def _run_agent(
+    llm: Union[ChatGroq, ChatOpenAI],
+    tools: List[BaseTool],
+    messages: List[BaseMessage],
+    state: Optional[Dict[str, Any]],
+    agent_name: Optional[str],
+    output_schema: Optional[type[BaseModel]],
+    input_contract: Optional[type[BaseContract]],
+    max_iterations: int,
+    use_cache: bool,
+    max_tool_concurrency: int,
+) -> Dict[str, Any]:
+    """Tool-calling loop of safe_agent_invoke."""
     # 0. Contract Validation: Input
     if input_contract and state:
         # We assume 'state' contains the data needed for the contract.
@@ -60,25 +229,66 @@ async def safe_agent_invoke(
             logger.error("input_contract_failed", error=str(e))
             return {"error": f"Input contract violation: {str(e)}"}
 
-    # 1. Context Management: Pruning
-    current_messages = context_manager.prune_messages(messages, max_messages=10)
+    # 1. Context Management: token budget of the target model
+    context_window = context_manager.resolve_context_window(llm)
+    current_messages = list(messages)
+    
+    # 2. Context Management: role view + most recent turns, rebuilt every iteration
+    def build_prompt() -> List[BaseMessage]:
+        return context_manager.build_context(
+            current_messages,
+            state=state,
+            agent_role=agent_name,
+            context_window=context_window,
+            tool_tokens=schema_tokens,
+        )
+    
+    # Bind tools (y structured output si hay schema) al LLM
+    def bind(model: Any) -> Any:
+        nonlocal schema_tokens
+        # Las definiciones de tools/schema van en cada request: descontarlas del presupuesto
+        schema_tokens = tool_schema_tokens(tools, output_schema)
+        bound = model.bind_tools(tools) if tools else model
+        return bound.with_structured_output(output_schema) if output_schema else bound
     
-    # 2. Context Management: View Injection (Future)
-    # ...
+    schema_tokens = 0
+    llm_with_tools = bind(llm)
     
-    # Bind tools al LLM
-    llm_with_tools = llm.bind_tools(tools) if tools else llm
+    async def invoke(with_tools: bool = True) -> Any:
+        """Una llamada al LLM; sin créditos para el modelo pasa a su fallback."""
+        nonlocal llm, llm_with_tools, context_window
+        while True:
+            prompt = build_prompt()
+            # Modelos enrutados: solo fallbacks cuya ventana admite este prompt
+            routed = fit_fallbacks(llm, schema_tokens + sum(message_tokens(m) for m in prompt))
+            try:
+                if with_tools:
+                    return await _cached_ainvoke(
+                        llm_with_tools if routed is llm else bind(routed), llm, prompt, cache, agent_name,
+                        tools=tools, output_schema=output_schema,
+                    )
+                return await _cached_ainvoke(routed, llm, prompt, cache, agent_name)
+            except InsufficientCreditsError as e:
+                llm = await _budget_fallback_model(llm, e.model, agent_name)
+                llm_with_tools = bind(llm)
+                context_window = context_manager.resolve_context_window(llm)
+    
+    cache = None
+    temperature = getattr(llm, "temperature", None)
+    creative = isinstance(temperature, (int, float)) and temperature > settings.LLM_CACHE_MAX_TEMPERATURE
+    if use_cache and not creative and agent_name not in settings.LLM_CACHE_EXCLUDED_AGENTS:
+        cache = get_llm_cache()
     
-    # Bind structured output if schema provided
-    if output_schema:
-        llm_with_tools = llm_with_tools.with_structured_output(output_schema)
+    tools = list(tools or [])
+    tools_by_name = {t.name: t for t in tools}
+    semaphore = asyncio.Semaphore(max(1, max_tool_concurrency))
     
     tool_calls_made = []
     
     for iteration in range(max_iterations):
         try:
             # Invocar LLM
-            response = await llm_with_tools.ainvoke(current_messages)
+            response = await invoke()
             
             # Si no hay tool calls, terminamos
             if not hasattr(response, 'tool_calls') or not response.tool_calls:
@@ -90,75 +300,27 @@ async def safe_agent_invoke(
             # Procesar tool calls
             current_messages.append(response)
             
-            for tool_call in response.tool_calls:
-                tool_calls_made.append({
+            # Ejecutar tool calls en paralelo; gather preserva el orden de los ToolMessages
+            tool_messages = await asyncio.gather(*[
+                _execute_tool_call(tool_call, tools_by_name, semaphore)
+                for tool_call in response.tool_calls
+            ])
+            current_messages.extend(tool_messages)
+            
+            tool_calls_made.extend(
+                {
                     "name": tool_call["name"],
                     "args": tool_call["args"],
-                })
-                
-                # Buscar la tool
-                tool = next((t for t in tools if t.name == tool_call["name"]), None)
-                
-                if not tool:
-                    logger.error(
-                        "tool_not_found",
-                        tool_name=tool_call["name"],
-                        available_tools=[t.name for t in tools],
-                    )
-                    # Agregar mensaje de error
-                    current_messages.append(
-                        ToolMessage(
-                            content=f"Error: Tool '{tool_call['name']}' not found",
-                            tool_call_id=tool_call.get("id", "unknown"),
-                        )
-                    )
-                    continue
-                
-                try:
-                    # Ejecutar tool
-                    logger.info(
-                        "executing_tool",
-                        tool_name=tool.name,
-                        args=tool_call["args"],
-                    )
-                    
-                    result = await tool.ainvoke(tool_call["args"])
-                    
-                    # Convertir resultado a string si es necesario
-                    if isinstance(result, dict):
-                        result_str = str(result)
-                    elif isinstance(result, list):
-                        result_str = str(result)
-                    else:
-                        result_str = str(result)
-                    
-                    # Agregar resultado
-                    current_messages.append(
-                        ToolMessage(
-                            content=result_str,
-                            tool_call_id=tool_call.get("id", "unknown"),
-                        )
-                    )
-                    
-                    logger.info(
-                        "tool_executed_successfully",
-                        tool_name=tool.name,
-                        result_length=len(result_str),
-                    )
-                    
-                except Exception as tool_error:
-                    logger.error(
-                        "tool_execution_failed",
-                        tool_name=tool.name,
-                        error=str(tool_error),
-                    )
-                    # Agregar mensaje de error pero continuar
-                    current_messages.append(
-                        ToolMessage(
-                            content=f"Error executing {tool.name}: {str(tool_error)}",
-                            tool_call_id=tool_call.get("id", "unknown"),
-                        )
-                    )
+                    "raw_data_ref": (message.artifact or {}).get("raw_data_ref"),
+                }
+                for tool_call, message in zip(response.tool_calls, tool_messages)
+            )
+            
+            # Salidas guardadas por referencia: dar al agente la tool para consultarlas
+            if FETCH_TOOL_NAME not in tools_by_name and any(tc["raw_data_ref"] for tc in tool_calls_made):
+                tools.append(fetch_tool_output)
+                tools_by_name[FETCH_TOOL_NAME] = fetch_tool_output
+                llm_with_tools = bind(llm)
         
         except Exception as e:
             error_msg = str(e)
@@ -172,7 +334,7 @@ async def safe_agent_invoke(
             if "tool" in error_msg.lower() or "function" in error_msg.lower():
                 # Reintentar sin tools
                 try:
-                    response = await llm.ainvoke(current_messages)
+                    response = await invoke(with_tools=False)
                     return {
                         "output": response.content,
                         "tool_calls": tool_calls_made,
@@ -201,7 +363,7 @@ async def safe_agent_invoke(
     
     # Hacer una última llamada sin tools para obtener respuesta
     try:
-        final_response = await llm.ainvoke(current_messages)
+        final_response = await invoke(with_tools=False)
         return {
             "output": final_response.content,
             "tool_calls": tool_calls_made,
@@ -10,10 +10,21 @@ Funcionalidades:
 - Fallback automático a modelos más baratos
 - Alerting cuando se acerca al límite (80% = 240 créditos)
 - Integración con Supabase para persistencia
+
+Contabilidad en Redis (hash budget:current): cada registro de uso es un único
+script Lua que comprueba el límite, reserva los créditos, incrementa el
+contador del modelo, renueva el TTL y devuelve el hash actualizado, todo en un
+round-trip y de forma atómica entre procesos. El estado leído se cachea en
+proceso durante settings.BUDGET_STATUS_CACHE_TTL segundos y se invalida con
+keyspace notifications cuando otro proceso modifica el hash (el script guarda
+quién escribió por última vez, así que las escrituras propias no invalidan).
 """
+import ast
 import asyncio
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Literal, Optional, Any
+from typing import Dict, List, Literal, Optional, Any, Tuple
 from dataclasses import dataclass, field
 import structlog
 from redis.asyncio import Redis
@@ -120,6 +131,40 @@ MODEL_COSTS: Dict[ModelType, ModelCost] = {
 }
 
 
+BUDGET_KEY = "budget:current"
+BUDGET_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 días
+MODEL_FIELD_PREFIX = "model:"
+# Flags de notify-keyspace-events necesarios: K (keyspace), g (del/expire), h (hash)
+KEYSPACE_EVENT_FLAGS = "Kgh"
+# Comandos intermedios del script (siempre les sigue su EXPIRE final)
+SCRIPT_HASH_EVENTS = {"hincrbyfloat", "hincrby", "hset"}
+
+# KEYS[1] = hash del presupuesto
+# ARGV = credits, model, credits_limit, ttl, enforce ("1" = rechazar si no alcanza), period_start,
+#        requests (delta del contador del modelo: 1 al usar/reservar, -1 al liberar),
+#        writer (id del proceso, para ignorar sus propias keyspace notifications)
+# Devuelve {1 | 0, HGETALL}: 0 = rechazado por falta de créditos (no se modifica nada)
+RESERVE_CREDITS_LUA = """
+local credits = tonumber(ARGV[1])
+local used = tonumber(redis.call('HGET', KEYS[1], 'credits_used') or '0')
+local limit = tonumber(redis.call('HGET', KEYS[1], 'credits_limit') or ARGV[3])
+if ARGV[5] == '1' and credits > 0 and used + credits > limit then
+    return {0, redis.call('HGETALL', KEYS[1])}
+end
+redis.call('HINCRBYFLOAT', KEYS[1], 'credits_used', ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'model:' .. ARGV[2], ARGV[7])
+redis.call('HSETNX', KEYS[1], 'credits_limit', ARGV[3])
+redis.call('HSETNX', KEYS[1], 'period_start', ARGV[6])
+redis.call('HSET', KEYS[1], 'writer', ARGV[8])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {1, redis.call('HGETALL', KEYS[1])}
+"""
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
 @dataclass
 class BudgetStatus:
     """Estado actual del presupuesto."""
@@ -223,10 +268,14 @@ class BudgetManager:
         self.monthly_limit = monthly_limit
         self.models = MODEL_COSTS  # Diccionario de configuraciones de modelos
         
-        # Locks para evitar race conditions
-        self._locks: Dict[ModelType, asyncio.Lock] = {
-            model: asyncio.Lock() for model in MODEL_COSTS.keys()
-        }
+        # Script Lua registrado (EVALSHA con fallback a EVAL lo gestiona redis-py)
+        self._reserve_script = redis_client.register_script(RESERVE_CREDITS_LUA) if redis_client else None
+        
+        # Cache en proceso del estado: (instante de carga, estado)
+        self._status_cache: Optional[Tuple[float, BudgetStatus]] = None
+        self._invalidation_task: Optional[asyncio.Task] = None
+        # Identifica las escrituras de este proceso en el hash
+        self._writer_id = uuid.uuid4().hex
     
     async def initialize(self) -> None:
         """Inicializa el budget manager."""
@@ -238,6 +287,9 @@ class BudgetManager:
             await self._reset_period()
             self.logger.info("budget_period_reset", status="new_month")
         
+        if self.redis and settings.BUDGET_KEYSPACE_INVALIDATION and self._invalidation_task is None:
+            self._invalidation_task = asyncio.create_task(self._listen_for_invalidations())
+        
         self.logger.info(
             "budget_manager_initialized",
             credits_used=status.credits_used,
@@ -282,7 +334,7 @@ class BudgetManager:
         metadata: Optional[dict] = None,
     ) -> BudgetStatus:
         """
-        Registra el uso de un modelo.
+        Registra el uso de un modelo (ya realizado, así que nunca se rechaza).
         
         Args:
             model: Modelo utilizado
@@ -292,32 +344,50 @@ class BudgetManager:
         Returns:
             Estado actualizado del presupuesto
         """
-        async with self._locks[model]:
-            cost = credits_used or MODEL_COSTS[model].credits_per_request
-            
-            # Actualizar Redis (cache rápido)
-            await self._increment_usage(model, cost)
-            
-            # Actualizar Supabase (persistencia)
-            await self._persist_usage(model, cost, metadata)
-            
-            # Cargar estado actualizado
-            status = await self._load_status()
-            
-            # Log y alertas
-            self.logger.info(
-                "model_usage_recorded",
+        cost = credits_used or MODEL_COSTS[model].credits_per_request
+        _, status = await self._apply_usage(model, cost, metadata, enforce=False)
+        return status
+    
+    async def reserve_credits(
+        self,
+        model: ModelType,
+        credits: Optional[float] = None,
+        metadata: Optional[dict] = None,
+    ) -> bool:
+        """
+        Comprueba y reserva créditos en una sola operación atómica.
+        
+        A diferencia de can_use_model() + record_usage(), dos agentes
+        concurrentes no pueden gastar el mismo saldo: si no alcanza, no se
+        registra nada y se devuelve False.
+        
+        Returns:
+            True si los créditos quedaron reservados
+        """
+        cost = credits or MODEL_COSTS[model].credits_per_request
+        reserved, status = await self._apply_usage(model, cost, metadata, enforce=True)
+        if not reserved:
+            self.logger.warning(
+                "insufficient_budget",
                 model=model,
-                credits=cost,
+                required=cost,
                 remaining=status.credits_remaining,
-                usage_pct=f"{status.usage_percentage:.1f}%",
             )
-            
-            if status.alert_triggered and not status.alert_triggered:
-                # Primera vez que se cruza el threshold
-                await self._send_alert(status)
-            
-            return status
+        return reserved
+    
+    async def release_credits(
+        self,
+        model: ModelType,
+        credits: Optional[float] = None,
+        metadata: Optional[dict] = None,
+    ) -> BudgetStatus:
+        """
+        Devuelve una reserva de reserve_credits() que no llegó a usarse
+        (la llamada falló o la atendió otro modelo).
+        """
+        cost = credits or MODEL_COSTS[model].credits_per_request
+        _, status = await self._apply_usage(model, -cost, metadata, enforce=False, requests=-1)
+        return status
     
     async def get_fallback_model(self, model: ModelType) -> ModelType:
         """
@@ -417,16 +487,121 @@ class BudgetManager:
     # MÉTODOS PRIVADOS
     # ============================================================
     
+    async def close(self) -> None:
+        """Detiene el listener de invalidaciones."""
+        if self._invalidation_task is not None:
+            self._invalidation_task.cancel()
+            await asyncio.gather(self._invalidation_task, return_exceptions=True)
+            self._invalidation_task = None
+    
+    def invalidate_status_cache(self) -> None:
+        self._status_cache = None
+    
+    def _cache_status(self, status: BudgetStatus) -> BudgetStatus:
+        self._status_cache = (time.monotonic(), status)
+        return status
+    
     async def _load_status(self) -> BudgetStatus:
-        """Carga estado desde Redis (cache) o Supabase (source of truth)."""
+        """Carga estado desde la cache en proceso, Redis o Supabase (source of truth)."""
+        if self._status_cache is not None:
+            loaded_at, status = self._status_cache
+            if time.monotonic() - loaded_at < settings.BUDGET_STATUS_CACHE_TTL:
+                return status
+        
         # Intentar Redis primero
         if self.redis:
             cached = await self._load_from_redis()
             if cached:
-                return cached
+                return self._cache_status(cached)
         
         # Cargar desde Supabase
-        return await self._load_from_supabase()
+        return self._cache_status(await self._load_from_supabase())
+    
+    async def _apply_usage(
+        self,
+        model: ModelType,
+        credits: float,
+        metadata: Optional[dict],
+        enforce: bool,
+        requests: int = 1,
+    ) -> Tuple[bool, BudgetStatus]:
+        """Reserva/registra (o libera, con créditos negativos) créditos y persiste el uso; devuelve (aplicado, estado)."""
+        status: Optional[BudgetStatus] = None
+        if self._reserve_script is not None:
+            now = datetime.now()
+            period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            try:
+                applied, data = await self._reserve_script(
+                    keys=[BUDGET_KEY],
+                    args=[
+                        credits,
+                        model,
+                        self.monthly_limit,
+                        BUDGET_TTL_SECONDS,
+                        "1" if enforce else "0",
+                        period_start.isoformat(),
+                        requests,
+                        self._writer_id,
+                    ],
+                )
+                status = self._cache_status(self._parse_status(self._pairs_to_dict(data)))
+                if not int(applied):
+                    return False, status
+            except Exception as e:
+                self.logger.error("redis_increment_error", error=str(e))
+        
+        counted = status is not None
+        if status is None:
+            # Sin Redis (o Redis caído) no hay contador compartido: comprobación local, no atómica
+            status = await self._load_status()
+            if enforce and credits > 0 and status.credits_remaining < credits:
+                return False, status
+        
+        # Actualizar Supabase (persistencia)
+        await self._persist_usage(model, credits, metadata)
+        
+        self.logger.info(
+            "model_usage_recorded",
+            model=model,
+            credits=credits,
+            remaining=status.credits_remaining,
+            usage_pct=f"{status.usage_percentage:.1f}%",
+        )
+        
+        threshold = status.alert_threshold * status.credits_limit
+        if counted and status.credits_used >= threshold > status.credits_used - credits:
+            # Primera vez que se cruza el threshold
+            await self._send_alert(status)
+        
+        return True, status
+    
+    @staticmethod
+    def _pairs_to_dict(data: List[Any]) -> Dict[str, str]:
+        """HGETALL devuelto por Lua es una lista plana [campo, valor, ...]."""
+        return {_decode(data[i]): _decode(data[i + 1]) for i in range(0, len(data) - 1, 2)}
+    
+    def _parse_status(self, data: Dict[str, str]) -> BudgetStatus:
+        """BudgetStatus desde el hash de Redis (contadores por modelo en campos model:<name>)."""
+        requests_by_model: Dict[str, int] = {}
+        legacy = data.get("requests_by_model")
+        if legacy:
+            try:
+                requests_by_model.update(ast.literal_eval(legacy))
+            except (ValueError, SyntaxError):
+                self.logger.warning("redis_requests_by_model_unparseable", value=legacy)
+        for key, value in data.items():
+            if key.startswith(MODEL_FIELD_PREFIX):
+                name = key[len(MODEL_FIELD_PREFIX):]
+                requests_by_model[name] = requests_by_model.get(name, 0) + int(value)
+        
+        return BudgetStatus(
+            credits_used=float(data.get("credits_used", 0)),
+            credits_limit=int(float(data.get("credits_limit", self.monthly_limit))),
+            requests_by_model=requests_by_model,
+            period_start=datetime.fromisoformat(
+                data.get("period_start", datetime.now().isoformat())
+            ),
+        )
     
     async def _load_from_redis(self) -> Optional[BudgetStatus]:
         """Carga estado desde Redis."""
@@ -434,23 +609,64 @@ class BudgetManager:
             return None
         
         try:
-            data = await self.redis.hgetall("budget:current")
+            data = await self.redis.hgetall(BUDGET_KEY)
             
             if not data:
                 return None
             
-            return BudgetStatus(
-                credits_used=float(data.get("credits_used", 0)),
-                credits_limit=int(data.get("credits_limit", 300)),
-                requests_by_model=eval(data.get("requests_by_model", "{}")),
-                period_start=datetime.fromisoformat(
-                    data.get("period_start", datetime.now().isoformat())
-                ),
-            )
+            return self._parse_status({_decode(k): _decode(v) for k, v in data.items()})
         except Exception as e:
             self.logger.error("redis_load_error", error=str(e))
             return None
     
+    async def _listen_for_invalidations(self) -> None:
+        """Vacía la cache de estado cuando otro proceso modifica budget:current."""
+        try:
+            try:
+                await self._enable_keyspace_events()
+            except Exception as e:
+                # Redis gestionado puede prohibir CONFIG: configurar notify-keyspace-events
+                # con al menos "Kgh" en el servidor, o se depende solo del TTL de la cache
+                self.logger.warning("budget_keyspace_config_failed", error=str(e))
+            
+            db = self.redis.connection_pool.connection_kwargs.get("db", 0)
+            pubsub = self.redis.pubsub()
+            await pubsub.subscribe(f"__keyspace@{db}__:{BUDGET_KEY}")
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._on_keyspace_event(_decode(message.get("data")))
+            finally:
+                await pubsub.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.warning("budget_invalidation_listener_stopped", error=str(e))
+    
+    async def _enable_keyspace_events(self) -> None:
+        """Añade KEYSPACE_EVENT_FLAGS a notify-keyspace-events sin quitar los que ya tenga el servidor."""
+        config = await self.redis.config_get("notify-keyspace-events")
+        current = next((_decode(v) for k, v in config.items() if _decode(k) == "notify-keyspace-events"), "")
+        flags = set(current)
+        if "A" in flags:
+            flags |= set("g$lshzxetd")  # "A" es alias de todas las clases de eventos
+        missing = "".join(flag for flag in KEYSPACE_EVENT_FLAGS if flag not in flags)
+        if missing:
+            await self.redis.config_set("notify-keyspace-events", current + missing)
+            self.logger.info("budget_keyspace_events_enabled", flags=current + missing)
+    
+    async def _on_keyspace_event(self, event: str) -> None:
+        """Invalida la cache salvo que el último escritor del hash sea este proceso."""
+        if event in SCRIPT_HASH_EVENTS:
+            return  # Se decide con el EXPIRE con el que termina el script
+        if event == "expire":
+            # El estado devuelto por nuestro propio script ya está en cache e
+            # incluye cualquier escritura anterior de otros procesos
+            writer = await self.redis.hget(BUDGET_KEY, "writer")
+            if writer is not None and _decode(writer) == self._writer_id:
+                return
+        self.invalidate_status_cache()
+    
     async def _load_from_supabase(self) -> BudgetStatus:
         """Carga estado desde Supabase."""
         if not self.supabase:
@@ -485,28 +701,6 @@ class BudgetManager:
             # Fallback to default
             return BudgetStatus()
     
-    async def _increment_usage(self, model: ModelType, credits: float) -> None:
-        """Incrementa el uso en Redis."""
-        if not self.redis:
-            return
-        
-        try:
-            # Incrementar créditos totales
-            await self.redis.hincrbyfloat("budget:current", "credits_used", credits)
-            
-            # Incrementar contador del modelo
-            await self.redis.hincrby(
-                "budget:current",
-                f"model:{model}",
-                1
-            )
-            
-            # Set expiry (30 días)
-            await self.redis.expire("budget:current", 30 * 24 * 60 * 60)
-        
-        except Exception as e:
-            self.logger.error("redis_increment_error", error=str(e))
-    
     async def _persist_usage(
         self,
         model: ModelType,
@@ -533,8 +727,9 @@ class BudgetManager:
     
     async def _reset_period(self) -> None:
         """Resetea el presupuesto para un nuevo período."""
+        self.invalidate_status_cache()
         if self.redis:
-            await self.redis.delete("budget:current")
+            await self.redis.delete(BUDGET_KEY)
         
         # Crear nuevo registro en Supabase solo si está disponible
         if not self.supabase:
@@ -604,3 +799,14 @@ async def get_budget_manager() -> BudgetManager:
         await _budget_manager.initialize()
     
     return _budget_manager
+
+
+async def close_budget_manager() -> None:
+    """Cierra el singleton (listener de invalidaciones y cliente Redis)."""
+    global _budget_manager
+    
+    if _budget_manager is not None:
+        await _budget_manager.close()
+        if _budget_manager.redis is not None:
+            await _budget_manager.redis.aclose()
+        _budget_manager = None
@@ -0,0 +1,82 @@
+"""
+Durable LangGraph checkpointers for resumable runs.
+
+Graphs compiled with a checkpointer save state after every node under the
+run's thread_id (the job id, see core/job_executor.py). A run that pauses at
+a gate, asks the director a question, or dies mid-way can then continue from
+its last completed node instead of paying for every agent again.
+
+Backends (settings.CHECKPOINT_BACKEND):
+- "sqlite": local file settings.CHECKPOINT_SQLITE_PATH (langgraph-checkpoint-sqlite)
+- "postgres": settings.CHECKPOINT_POSTGRES_URL (optional, langgraph-checkpoint-postgres)
+- "memory": in-process only, lost on restart
+
+If the package for the configured backend is missing, the in-memory saver is
+used and a warning is logged, so the API still starts.
+"""
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+import structlog
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+
+def thread_config(thread_id: str) -> Dict[str, Any]:
+    """RunnableConfig selecting one run's checkpoints."""
+    return {"configurable": {"thread_id": thread_id}}
+
+
+@asynccontextmanager
+async def open_checkpointer(backend: Optional[str] = None) -> AsyncIterator[BaseCheckpointSaver]:
+    """
+    Open the configured async checkpointer for the lifetime of the context.
+
+    Args:
+        backend: "sqlite", "postgres" or "memory" (default: settings.CHECKPOINT_BACKEND)
+
+    Example:
+        >>> async with open_checkpointer() as checkpointer:
+        ...     graph = create_game_design_graph(checkpointer=checkpointer)
+    """
+    backend = backend or settings.CHECKPOINT_BACKEND
+
+    if backend == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError:
+            logger.warning("checkpointer_unavailable", backend=backend, fallback="memory",
+                           message="pip install langgraph-checkpoint-sqlite for resumable runs")
+        else:
+            path = Path(settings.CHECKPOINT_SQLITE_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            async with AsyncSqliteSaver.from_conn_string(str(path)) as saver:
+                logger.info("checkpointer_opened", backend=backend, path=str(path))
+                yield saver
+            return
+
+    elif backend == "postgres":
+        try:
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        except ImportError:
+            logger.warning("checkpointer_unavailable", backend=backend, fallback="memory",
+                           message="pip install langgraph-checkpoint-postgres for Postgres checkpoints")
+        else:
+            if not settings.CHECKPOINT_POSTGRES_URL:
+                raise ValueError("CHECKPOINT_POSTGRES_URL is required for the postgres checkpointer")
+            async with AsyncPostgresSaver.from_conn_string(settings.CHECKPOINT_POSTGRES_URL) as saver:
+                await saver.setup()
+                logger.info("checkpointer_opened", backend=backend)
+                yield saver
+            return
+
+    elif backend != "memory":
+        raise ValueError(f"Unsupported checkpoint backend: {backend}")
+
+    yield MemorySaver()
@@ -1,7 +1,101 @@
-from typing import List, Dict, Any, Optional
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
+import json
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+import structlog
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage, ToolMessage
+
+from config.settings import settings
 from core.state_v2 import SpiralState, CoreState, WorkingState
 
+logger = structlog.get_logger(__name__)
+
+# Role/separator tokens every chat message costs on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+VIEW_HEADER = "Project state relevant to your role (JSON per field):"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding, loaded once; None if tiktoken or its BPE file is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("tokenizer_unavailable", fallback="chars/3", error=str(e))
+        return None
+
+
+@lru_cache(maxsize=settings.CONTEXT_TOKEN_CACHE_SIZE)
+def count_tokens(text: str) -> int:
+    """
+    Token count of `text`, cached per string.
+
+    Without tiktoken it falls back to one token per 3 characters, which
+    over-estimates typical English/JSON so budgets stay safe.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` so that count_tokens(result) <= max_tokens."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: (max_tokens - 1) * 3]
+    tokens = encoding.encode(text, disallowed_special=())[:max_tokens]
+    truncated = encoding.decode(tokens)
+    # Decoding can merge tokens differently; shave until the count holds
+    while truncated and count_tokens(truncated) > max_tokens:
+        truncated = truncated[: int(len(truncated) * 0.9)]
+    return truncated
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    return str(content)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Tokens a message costs in a prompt (content, tool calls and overhead)."""
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(_content_text(message.content))
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += count_tokens(tool_call.get("name", "")) + count_tokens(
+            json.dumps(tool_call.get("args", {}), sort_keys=True, default=str)
+        )
+    return tokens
+
+
+def tool_schema_tokens(tools: List[Any], output_schema: Optional[Any] = None) -> int:
+    """Tokens the tool / structured-output definitions bound to a model add to every request."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    schemas = list(tools or []) + ([output_schema] if output_schema is not None else [])
+    return sum(
+        count_tokens(json.dumps(convert_to_openai_tool(schema), sort_keys=True, default=str))
+        for schema in schemas
+    )
+
+
+def _with_content(message: BaseMessage, content: str) -> BaseMessage:
+    return message.model_copy(update={"content": content})
+
+
+def _normalize_role(role: str) -> str:
+    """'EconomyBalancer' and 'economy_balancer' both normalize to 'economybalancer'."""
+    return role.replace("_", "").lower()
+
 class ContextManager:
     """
     Manages the context window for agents by pruning messages and 
@@ -103,16 +197,209 @@ class ContextManager:
             
         return pruned
 
+    def resolve_context_window(self, llm: Any) -> int:
+        """
+        Context window of the model behind `llm`.
+
+        Ollama models report their own `num_ctx`; others are looked up by
+        model name in budget_manager.MODEL_COSTS, then settings.CONTEXT_DEFAULT_WINDOW.
+        """
+        num_ctx = getattr(llm, "num_ctx", None)
+        if isinstance(num_ctx, int) and num_ctx > 0:
+            return num_ctx
+
+        from core.budget_manager import MODEL_COSTS  # Lazy: budget_manager pulls in Redis
+
+        name = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+        if isinstance(name, str):
+            cost = MODEL_COSTS.get(name) or MODEL_COSTS.get(name.split("/")[-1])
+            if cost is not None:
+                return cost.context_window
+        return settings.CONTEXT_DEFAULT_WINDOW
+
+    def view_keys_for(self, agent_role: Optional[str]) -> Optional[List[str]]:
+        """Explicit view mapping of a role ('EconomyBalancer' matches 'economy_balancer')."""
+        if not agent_role:
+            return None
+        if agent_role in self.view_mappings and agent_role != "default":
+            return self.view_mappings[agent_role]
+        wanted = _normalize_role(agent_role)
+        for role, keys in self.view_mappings.items():
+            if role != "default" and _normalize_role(role) == wanted:
+                return keys
+        return None
+
+    def build_context(
+        self,
+        messages: List[BaseMessage],
+        state: Optional[Dict[str, Any]] = None,
+        agent_role: Optional[str] = None,
+        context_window: Optional[int] = None,
+        reserved_tokens: int = settings.CONTEXT_RESERVED_OUTPUT_TOKENS,
+        tool_tokens: int = 0,
+    ) -> List[BaseMessage]:
+        """
+        Assemble a prompt that fits `context_window` minus `reserved_tokens`
+        and `tool_tokens` (the bound tool/JSON-schema definitions, see
+        tool_schema_tokens).
+
+        Filled in priority order:
+        1. Leading system messages and the task (first human message), always kept
+        2. The role's state view (view_mappings), up to settings.CONTEXT_VIEW_MAX_RATIO
+           of the budget, field by field in mapping order
+        3. The most recent conversation turns; an AI tool-call message and its
+           ToolMessages are kept or dropped together. Old tool outputs are
+           summarized (truncated to settings.CONTEXT_TOOL_SUMMARY_TOKENS) before
+           whole turns are dropped, oldest first.
+
+        If the always-kept messages alone exceed the budget their content is
+        truncated, so the result fits as counted by count_tokens; the
+        provider's own tokenizer may differ slightly.
+        """
+        window = context_window or settings.CONTEXT_DEFAULT_WINDOW
+        budget = max(window - min(reserved_tokens, window // 2) - tool_tokens, 0)
+
+        head_end = 0
+        while head_end < len(messages) and isinstance(messages[head_end], SystemMessage):
+            head_end += 1
+        pinned = list(messages[:head_end])
+        history = list(messages[head_end:])
+        task = None
+        if history and isinstance(history[0], HumanMessage):
+            task = history.pop(0)
+            pinned.append(task)
+
+        pinned = self._fit_pinned(pinned, budget)
+        used = sum(message_tokens(m) for m in pinned)
+
+        view_message = None
+        view_keys = self.view_keys_for(agent_role)
+        if state and view_keys:
+            view_budget = min(int(budget * settings.CONTEXT_VIEW_MAX_RATIO), budget - used)
+            view_message = self._view_message(state, agent_role, view_budget)
+            if view_message is not None:
+                used += message_tokens(view_message)
+
+        kept, compacted, dropped = self._fit_history(history, budget - used)
+
+        system = [m for m in pinned if isinstance(m, SystemMessage)]
+        rest = [m for m in pinned if not isinstance(m, SystemMessage)]
+        prompt = system + ([view_message] if view_message else []) + rest + kept
+        if compacted or dropped:
+            logger.info(
+                "context_trimmed",
+                agent=agent_role,
+                tokens=sum(message_tokens(m) for m in prompt),
+                budget=budget,
+                tool_outputs_summarized=compacted,
+                messages_dropped=dropped,
+            )
+        return prompt
+
+    def _fit_pinned(self, pinned: List[BaseMessage], budget: int) -> List[BaseMessage]:
+        """Truncate the largest always-kept messages until they fit in `budget`."""
+        pinned = list(pinned)
+        overflow = sum(message_tokens(m) for m in pinned) - budget
+        while overflow > 0 and pinned:
+            index = max(range(len(pinned)), key=lambda i: message_tokens(pinned[i]))
+            message = pinned[index]
+            content = _content_text(message.content)
+            target = max(count_tokens(content) - overflow, 0)
+            pinned[index] = _with_content(message, truncate_to_tokens(content, target))
+            new_overflow = sum(message_tokens(m) for m in pinned) - budget
+            if new_overflow >= overflow:  # Only overhead left to cut
+                pinned.pop(index)
+                new_overflow = sum(message_tokens(m) for m in pinned) - budget
+            overflow = new_overflow
+        return pinned
+
+    def _view_message(self, state: Dict[str, Any], agent_role: str, budget: int) -> Optional[SystemMessage]:
+        """Role view as a system message, adding fields in mapping order while they fit."""
+        view = self.generate_view(state, agent_role)
+        lines: List[str] = []
+        tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(VIEW_HEADER)
+        for key, value in view.items():
+            line = f"{key}: {json.dumps(value, ensure_ascii=False, default=str)}"
+            line_tokens = count_tokens(line) + 1
+            if tokens + line_tokens > budget:
+                logger.debug("context_view_field_skipped", agent=agent_role, field=key, tokens=line_tokens)
+                continue
+            lines.append(line)
+            tokens += line_tokens
+        if not lines:
+            return None
+        message = SystemMessage(content="\n".join([VIEW_HEADER] + lines))
+        while lines and message_tokens(message) > budget:
+            lines.pop()
+            message = SystemMessage(content="\n".join([VIEW_HEADER] + lines))
+        return message if lines else None
+
+    def _fit_history(self, history: List[BaseMessage], budget: int) -> Tuple[List[BaseMessage], int, int]:
+        """
+        Most recent turns that fit in `budget`.
+
+        Returns:
+            (kept messages, tool outputs summarized, messages dropped)
+        """
+        # Group an AI tool-call message with the ToolMessages answering it
+        turns: List[List[BaseMessage]] = []
+        for message in history:
+            if isinstance(message, ToolMessage) and turns and (
+                getattr(turns[-1][0], "tool_calls", None)
+            ):
+                turns[-1].append(message)
+            else:
+                turns.append([message])
+
+        costs = [sum(message_tokens(m) for m in turn) for turn in turns]
+        total = sum(costs)
+        compacted = 0
+
+        # 1. Summarize tool outputs, oldest first
+        summary_tokens = settings.CONTEXT_TOOL_SUMMARY_TOKENS
+        for i, turn in enumerate(turns):
+            if total <= budget:
+                break
+            for j, message in enumerate(turn):
+                if total <= budget:
+                    break
+                if not isinstance(message, ToolMessage):
+                    continue
+                content = _content_text(message.content)
+                content_tokens = count_tokens(content)
+                if content_tokens <= summary_tokens:
+                    continue
+                summary = (
+                    truncate_to_tokens(content, summary_tokens)
+                    + f"\n[... tool output summarized: {content_tokens} tokens originally]"
+                )
+                turn[j] = _with_content(message, summary)
+                saved = content_tokens - count_tokens(summary)
+                costs[i] -= saved
+                total -= saved
+                compacted += 1
+
+        # 2. Drop whole turns, oldest first
+        dropped = 0
+        while turns and total > budget:
+            total -= costs.pop(0)
+            dropped += len(turns.pop(0))
+
+        return [m for turn in turns for m in turn], compacted, dropped
+
     def generate_view(self, state: SpiralState, agent_role: str) -> Dict[str, Any]:
         """
         Extracts a specific view of the state for a given agent.
         Flattens nested keys (e.g., 'core.concept') into a single dictionary.
         """
-        keys_to_include = self.view_mappings.get(agent_role, self.view_mappings["default"])
+        keys_to_include = self.view_keys_for(agent_role) or self.view_mappings["default"]
         view = {}
         
         for key_path in keys_to_include:
             value = self._get_nested_value(state, key_path)
+            if value is None and "." in key_path:
+                # Flat GameDesignState: 'working.mechanics' lives at state['mechanics']
+                value = state.get(key_path.split(".")[-1])
             if value is not None:
                 # Use the last part of the key as the key in the view
                 # e.g., 'core.concept' -> 'concept'
@@ -0,0 +1,306 @@
+"""
+Concurrent job executor for analyses started through the API servers.
+
+api/routes/pipeline.py used to refuse a second run (409) and api/server.py
+fired every /start through BackgroundTasks with no limit or identity.
+JobExecutor replaces both with:
+
+- a bounded worker pool: at most `max_workers` jobs run at once
+- a priority queue: "high" before "normal" before "low", FIFO within one
+- admission control: a job only starts while its LLM provider is below its
+  concurrency limit (settings.JOB_PROVIDER_MAX_CONCURRENT, sized to the
+  provider's rate limit); jobs for other providers are not held behind it,
+  and submissions beyond `max_queued` are rejected with AdmissionError
+- job identity: the job id doubles as the LangGraph thread_id, so runs that
+  share one compiled graph keep separate checkpoints (`job.config`), and
+  resume() re-queues a parked or failed job on that same thread
+
+All methods must be called from the event loop that runs the jobs.
+"""
+
+import asyncio
+import bisect
+import itertools
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from config.settings import settings
+from core.checkpointing import thread_config
+
+logger = structlog.get_logger(__name__)
+
+PRIORITY_RANK: Dict[str, int] = {"high": 0, "normal": 1, "low": 2}
+FINAL_STATUSES = ("completed", "failed", "cancelled", "interrupted")
+
+
+class AdmissionError(Exception):
+    """The job was not queued (queue full or invalid request)."""
+
+
+class JobInterrupted(Exception):
+    """Raised by a runner when the graph paused at an interrupt (awaiting input)."""
+
+    def __init__(self, next_nodes: Tuple[str, ...] = ()):
+        super().__init__(f"Interrupted before: {', '.join(next_nodes)}")
+        self.next_nodes = list(next_nodes)
+
+
+@dataclass
+class Job:
+    id: str
+    payload: Dict[str, Any]
+    priority: str = "normal"
+    provider: str = "github"
+    status: str = "queued"  # queued | running | completed | failed | cancelled | interrupted
+    current_phase: Optional[str] = None
+    progress: float = 0.0
+    result: Any = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @property
+    def thread_id(self) -> str:
+        return self.id
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """RunnableConfig selecting this job's checkpoint thread."""
+        return thread_config(self.thread_id)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "thread_id": self.thread_id,
+            "status": self.status,
+            "priority": self.priority,
+            "provider": self.provider,
+            "current_phase": self.current_phase,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **self.payload,
+        }
+
+
+Runner = Callable[[Job], Awaitable[Any]]
+
+
+class JobExecutor:
+    """
+    Priority-queued, provider-aware pool of concurrent jobs.
+
+    Args:
+        runner: Coroutine function executing one job; its return value is
+            stored in `job.result`. Raise JobInterrupted to park the job.
+        max_workers: Jobs running at once
+        max_queued: Jobs waiting at once
+        provider_limits: Max running jobs per provider (missing = unlimited)
+        history_size: Finished jobs kept for status queries
+    """
+
+    def __init__(
+        self,
+        runner: Runner,
+        max_workers: int = settings.JOB_MAX_WORKERS,
+        max_queued: int = settings.JOB_MAX_QUEUED,
+        provider_limits: Optional[Dict[str, int]] = None,
+        history_size: int = settings.JOB_HISTORY_SIZE,
+    ):
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self.provider_limits = dict(
+            settings.JOB_PROVIDER_MAX_CONCURRENT if provider_limits is None else provider_limits
+        )
+        self.history_size = history_size
+        self._jobs: Dict[str, Job] = {}
+        self._queue: List[Tuple[int, int, str]] = []  # sorted (rank, seq, job_id)
+        self._seq = itertools.count()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._provider_running: Counter = Counter()
+        self._finished: deque = deque()
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _has_capacity(self, provider: str) -> bool:
+        limit = self.provider_limits.get(provider)
+        return limit is None or self._provider_running[provider] < limit
+
+    def _dispatch(self) -> None:
+        """Start queued jobs, best priority first, while workers and providers allow."""
+        index = 0
+        while len(self._tasks) < self.max_workers and index < len(self._queue):
+            job = self._jobs[self._queue[index][2]]
+            if not self._has_capacity(job.provider):
+                index += 1
+                continue
+            del self._queue[index]
+            self._start(job)
+
+    def _start(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        self._provider_running[job.provider] += 1
+        self._tasks[job.id] = asyncio.create_task(self._run(job), name=f"job-{job.id}")
+        logger.info("job_started", job_id=job.id, provider=job.provider, running=len(self._tasks))
+
+    async def _run(self, job: Job) -> None:
+        try:
+            job.result = await self.runner(job)
+            job.status = "completed"
+            job.progress = 100.0
+        except JobInterrupted as e:
+            job.status = "interrupted"
+            job.current_phase = ",".join(e.next_nodes) or job.current_phase
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error("job_failed", job_id=job.id, error=str(e))
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            self._tasks.pop(job.id, None)
+            self._provider_running[job.provider] -= 1
+            self._retire(job)
+            logger.info("job_finished", job_id=job.id, status=job.status)
+            self._dispatch()
+
+    def _retire(self, job: Job) -> None:
+        self._finished.append(job.id)
+        while len(self._finished) > self.history_size:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        payload: Dict[str, Any],
+        priority: str = "normal",
+        provider: str = "github",
+        job_id: Optional[str] = None,
+    ) -> Job:
+        """
+        Queue a job and start it if a worker and its provider are free.
+
+        Raises:
+            AdmissionError: Unknown priority, duplicate id or queue full
+        """
+        if priority not in PRIORITY_RANK:
+            raise AdmissionError(f"Unknown priority '{priority}' (expected one of {list(PRIORITY_RANK)})")
+        if len(self._queue) >= self.max_queued:
+            raise AdmissionError(f"Job queue is full ({self.max_queued} waiting)")
+        job_id = job_id or uuid.uuid4().hex[:12]
+        if job_id in self._jobs:
+            raise AdmissionError(f"Job '{job_id}' already exists")
+
+        job = Job(id=job_id, payload=dict(payload), priority=priority, provider=provider)
+        self._jobs[job.id] = job
+        bisect.insort(self._queue, (PRIORITY_RANK[priority], next(self._seq), job.id))
+        logger.info("job_queued", job_id=job.id, priority=priority, provider=provider, queued=len(self._queue))
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Job]:
+        return [job for job in self._jobs.values() if status is None or job.status == status]
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position among queued jobs, or None if not queued."""
+        for position, (_, _, queued_id) in enumerate(self._queue, start=1):
+            if queued_id == job_id:
+                return position
+        return None
+
+    def resume(self, job_id: str, payload: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        Re-queue a finished job (interrupted, failed or cancelled) on the same
+        thread_id, so its runner can continue from the last checkpoint.
+
+        Raises:
+            KeyError: Unknown job (use submit() with job_id after a restart)
+            AdmissionError: Job still queued/running, or queue full
+        """
+        job = self._jobs[job_id]
+        if not job.done:
+            raise AdmissionError(f"Job '{job_id}' is still {job.status}")
+        if len(self._queue) >= self.max_queued:
+            raise AdmissionError(f"Job queue is full ({self.max_queued} waiting)")
+
+        self._finished.remove(job_id)
+        job.payload.update(payload or {})
+        job.status = "queued"
+        job.error = None
+        job.finished_at = None
+        bisect.insort(self._queue, (PRIORITY_RANK[job.priority], next(self._seq), job.id))
+        logger.info("job_resumed", job_id=job.id, queued=len(self._queue))
+        self._dispatch()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued, running or interrupted job; False if unknown or already finished."""
+        job = self._jobs.get(job_id)
+        if job is not None and job.status == "interrupted":
+            job.status = "cancelled"
+            return True
+        if job is None or job.done:
+            return False
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            return True
+        self._queue = [entry for entry in self._queue if entry[2] != job_id]
+        job.status = "cancelled"
+        job.finished_at = datetime.now().isoformat()
+        self._retire(job)
+        return True
+
+    async def wait(self, job_id: str) -> Job:
+        """Wait until a job leaves the queue and finishes running."""
+        job = self._jobs[job_id]
+        while not job.done:
+            task = self._tasks.get(job_id)
+            if task is not None:
+                await asyncio.wait({task})
+            else:
+                await asyncio.sleep(0.05)
+        return job
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._tasks),
+            "queued": len(self._queue),
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "running_by_provider": {p: n for p, n in self._provider_running.items() if n},
+            "provider_limits": dict(self.provider_limits),
+        }
+
+    async def shutdown(self) -> None:
+        """Cancel queued and running jobs (app shutdown)."""
+        for _, _, job_id in list(self._queue):
+            self.cancel(job_id)
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
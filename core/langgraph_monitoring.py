@@ -27,22 +27,25 @@ Usage:
 
 import asyncio
 import time
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 import structlog
 from dataclasses import dataclass
 
+from config.settings import settings
+
 logger = structlog.get_logger(__name__)
 
 
 @dataclass
 class NodeExecution:
-    """Tracking data for individual node executions."""
+    """Tracking data for individual node executions (state keys only, never state copies)."""
     node_name: str
     start_time: datetime
     end_time: Optional[datetime] = None
-    input_state: Optional[Dict] = None
-    output_state: Optional[Dict] = None
+    input_keys: Tuple[str, ...] = ()
+    output_keys: Tuple[str, ...] = ()
     error: Optional[str] = None
     duration_ms: Optional[float] = None
     tokens_used: int = 0
@@ -56,8 +59,8 @@ class GraphExecution:
     thread_id: str
     start_time: datetime
     end_time: Optional[datetime] = None
-    initial_state: Optional[Dict] = None
-    final_state: Optional[Dict] = None
+    initial_keys: Tuple[str, ...] = ()
+    final_keys: Tuple[str, ...] = ()
     nodes_executed: List[NodeExecution] = None
     total_tokens: int = 0
     total_cost_usd: float = 0.0
@@ -80,11 +83,16 @@ class LangGraphMonitor:
     - Error handling y recovery
     """
 
-    def __init__(self, enable_langsmith: bool = False):
+    def __init__(self, enable_langsmith: bool = False, max_history: int = settings.MONITOR_MAX_HISTORY):
         self.enable_langsmith = enable_langsmith
         self.active_executions: Dict[str, GraphExecution] = {}
-        self.completed_executions: List[GraphExecution] = []
-        self.max_history = 100
+        self.max_history = max_history
+        self.completed_executions: deque = deque(maxlen=max_history)
+        # Lifetime totals of finished executions (the history above is bounded)
+        self.finished_count: Dict[str, int] = {}
+        self.finished_tokens = 0
+        self.finished_cost_usd = 0.0
+        self.completed_duration_seconds = 0.0
         
         if enable_langsmith:
             self._setup_langsmith()
@@ -110,7 +118,7 @@ class LangGraphMonitor:
             execution_id=execution_id,
             thread_id=thread_id,
             start_time=datetime.now(),
-            initial_state=initial_state.copy()
+            initial_keys=tuple(initial_state)
         )
         
         self.active_executions[execution_id] = execution
@@ -138,7 +146,7 @@ class LangGraphMonitor:
         node_exec = NodeExecution(
             node_name=node_name,
             start_time=datetime.now(),
-            input_state=input_state.copy()
+            input_keys=tuple(input_state)
         )
         
         self.active_executions[execution_id].nodes_executed.append(node_exec)
@@ -170,9 +178,9 @@ class LangGraphMonitor:
         for node_exec in reversed(execution.nodes_executed):
             if node_exec.node_name == node_name and node_exec.end_time is None:
                 node_exec.end_time = datetime.now()
-                node_exec.output_state = output_state.copy()
-                node_exec.tokens_used = tokens_used
-                node_exec.cost_usd = cost_usd
+                node_exec.output_keys = tuple(output_state)
+                node_exec.tokens_used += tokens_used
+                node_exec.cost_usd += cost_usd
                 node_exec.duration_ms = (
                     node_exec.end_time - node_exec.start_time
                 ).total_seconds() * 1000
@@ -186,11 +194,33 @@ class LangGraphMonitor:
                     execution_id=execution_id,
                     node_name=node_name,
                     duration_ms=node_exec.duration_ms,
-                    tokens_used=tokens_used,
-                    cost_usd=cost_usd
+                    tokens_used=node_exec.tokens_used,
+                    cost_usd=node_exec.cost_usd
                 )
                 break
 
+    def add_node_usage(
+        self,
+        thread_id: str,
+        node_name: str,
+        tokens_used: int,
+        cost_usd: float
+    ):
+        """
+        Credit LLM usage to the running execution of `node_name` on `thread_id`
+        (called by core.usage_tracking for every LLM response).
+        """
+        for execution in self.active_executions.values():
+            if execution.thread_id != thread_id:
+                continue
+            for node_exec in reversed(execution.nodes_executed):
+                if node_exec.node_name == node_name and node_exec.end_time is None:
+                    node_exec.tokens_used += tokens_used
+                    node_exec.cost_usd += cost_usd
+                    execution.total_tokens += tokens_used
+                    execution.total_cost_usd += cost_usd
+                    return
+
     def fail_node_execution(
         self,
         execution_id: str,
@@ -232,7 +262,7 @@ class LangGraphMonitor:
 
         execution = self.active_executions[execution_id]
         execution.end_time = datetime.now()
-        execution.final_state = final_state.copy()
+        execution.final_keys = tuple(final_state)
         execution.status = status
         
         # Calculate total duration
@@ -248,13 +278,15 @@ class LangGraphMonitor:
             nodes_executed=len(execution.nodes_executed)
         )
         
-        # Move to completed executions
+        # Move to completed executions (oldest drop out of the bounded history)
         self.completed_executions.append(execution)
         del self.active_executions[execution_id]
         
-        # Maintain history limit
-        if len(self.completed_executions) > self.max_history:
-            self.completed_executions = self.completed_executions[-self.max_history:]
+        self.finished_count[status] = self.finished_count.get(status, 0) + 1
+        self.finished_tokens += execution.total_tokens
+        self.finished_cost_usd += execution.total_cost_usd
+        if status == "completed":
+            self.completed_duration_seconds += total_duration
 
     def get_execution_summary(self, execution_id: str) -> Optional[Dict]:
         """Get summary of execution metrics."""
@@ -294,38 +326,25 @@ class LangGraphMonitor:
 
     def get_performance_metrics(self) -> Dict:
         """Get aggregate performance metrics across all executions."""
-        all_executions = list(self.active_executions.values()) + self.completed_executions
+        finished = sum(self.finished_count.values())
+        active = list(self.active_executions.values())
+        total = finished + len(active)
         
-        if not all_executions:
+        if not total:
             return {"total_executions": 0}
 
-        completed_executions = [e for e in all_executions if e.status == "completed"]
-        failed_executions = [e for e in all_executions if e.status == "failed"]
-        
-        total_tokens = sum(e.total_tokens for e in all_executions)
-        total_cost = sum(e.total_cost_usd for e in all_executions)
-        
-        # Calculate average duration for completed executions
-        avg_duration = 0
-        if completed_executions:
-            durations = [
-                (e.end_time - e.start_time).total_seconds() 
-                for e in completed_executions if e.end_time
-            ]
-            avg_duration = sum(durations) / len(durations) if durations else 0
+        completed = self.finished_count.get("completed", 0)
+        avg_duration = self.completed_duration_seconds / completed if completed else 0
 
         return {
-            "total_executions": len(all_executions),
-            "completed": len(completed_executions),
-            "failed": len(failed_executions),
-            "active": len(self.active_executions),
-            "total_tokens_used": total_tokens,
-            "total_cost_usd": total_cost,
+            "total_executions": total,
+            "completed": completed,
+            "failed": self.finished_count.get("failed", 0),
+            "active": len(active),
+            "total_tokens_used": self.finished_tokens + sum(e.total_tokens for e in active),
+            "total_cost_usd": self.finished_cost_usd + sum(e.total_cost_usd for e in active),
             "average_duration_seconds": round(avg_duration, 2),
-            "success_rate": (
-                len(completed_executions) / len(all_executions) * 100
-                if all_executions else 0
-            )
+            "success_rate": completed / total * 100
         }
 
 
@@ -0,0 +1,237 @@
+"""
+Content-addressed LLM response cache for safe_agent_invoke.
+
+Responses are keyed by a SHA-256 of everything that determines the model
+output: provider, model, temperature, base_url, bound tool schemas, the
+structured output schema and the normalized message list. Re-running the same
+concept, resuming after a gate or re-running tests then replays stored
+responses instead of paying for the tokens again.
+
+Backends:
+- SQLiteCacheBackend: local file, LRU eviction by last access + TTL
+- RedisCacheBackend: shared cache on settings.REDIS_URL, sliding TTL
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import structlog
+from langchain_core.messages import BaseMessage, ToolMessage, message_to_dict, messages_from_dict
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class SQLiteCacheBackend:
+    """Local SQLite backend with TTL expiry and LRU eviction beyond max_entries."""
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl: int = 604800):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)"
+            )
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCacheBackend:
+    """
+    Redis backend (reuses settings.REDIS_URL).
+
+    Reads refresh the TTL (GETEX), so rarely used entries expire first; with a
+    maxmemory-policy of allkeys-lru Redis also evicts least recently used keys.
+    """
+
+    def __init__(self, redis_client: Any, ttl: int = 604800, prefix: str = "llm_cache"):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_settings(cls) -> "RedisCacheBackend":
+        from redis.asyncio import Redis
+
+        client = Redis.from_url(settings.REDIS_URL, **settings.redis_client_kwargs)
+        return cls(client, ttl=settings.LLM_CACHE_TTL)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.redis.getex(f"{self.prefix}:{key}", ex=self.ttl)
+
+    async def set(self, key: str, value: str) -> None:
+        await self.redis.setex(f"{self.prefix}:{key}", self.ttl, value)
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def _describe_llm(llm: Any) -> Dict[str, Any]:
+    """Provider/model parameters that change the output of a chat model."""
+    return {
+        "provider": type(llm).__name__,
+        "model": getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "base_url": getattr(llm, "openai_api_base", None) or getattr(llm, "base_url", None),
+    }
+
+
+def _normalize_message(message: BaseMessage) -> Dict[str, Any]:
+    """Keep only the fields the model sees (drops ids, metadata, usage)."""
+    normalized = {"type": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        normalized["tool_calls"] = [
+            {"name": tc["name"], "args": tc["args"], "id": tc.get("id")} for tc in tool_calls
+        ]
+    if isinstance(message, ToolMessage):
+        normalized["tool_call_id"] = message.tool_call_id
+    return normalized
+
+
+class LLMResponseCache:
+    """Content-addressed cache of chat model responses."""
+
+    def __init__(self, backend: Any):
+        self.backend = backend
+
+    def make_key(
+        self,
+        llm: Any,
+        tools: Optional[List[BaseTool]],
+        output_schema: Optional[type[BaseModel]],
+        messages: List[BaseMessage],
+    ) -> str:
+        """SHA-256 over model parameters, tool/output schemas and messages."""
+        payload = {
+            "llm": _describe_llm(llm),
+            "tools": [convert_to_openai_tool(tool) for tool in tools or []],
+            "output_schema": output_schema.model_json_schema() if output_schema else None,
+            "messages": [_normalize_message(m) for m in messages],
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, output_schema: Optional[type[BaseModel]] = None) -> Optional[Any]:
+        """Return the cached response, or None on miss or backend error."""
+        try:
+            raw = await self.backend.get(key)
+            if raw is None:
+                return None
+            entry = json.loads(raw)
+            if entry["kind"] == "structured" and output_schema:
+                return output_schema.model_validate(entry["data"])
+            if entry["kind"] == "message":
+                return messages_from_dict([entry["data"]])[0]
+            return entry["data"]
+        except Exception as e:
+            logger.warning("llm_cache_get_failed", error=str(e))
+            return None
+
+    async def set(self, key: str, response: Any) -> None:
+        """Store a response; unserializable responses are skipped."""
+        try:
+            # BaseMessage is itself a pydantic model, so check it first
+            if isinstance(response, BaseMessage):
+                entry = {"kind": "message", "data": message_to_dict(response)}
+            elif isinstance(response, BaseModel):
+                entry = {"kind": "structured", "data": response.model_dump(mode="json")}
+            else:
+                entry = {"kind": "json", "data": response}
+            await self.backend.set(key, json.dumps(entry))
+        except Exception as e:
+            logger.warning("llm_cache_set_failed", error=str(e))
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Lazily build the process-wide cache from settings.
+
+    Returns:
+        LLMResponseCache, or None if caching is disabled
+    """
+    global _llm_cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        if settings.LLM_CACHE_BACKEND == "redis":
+            backend = RedisCacheBackend.from_settings()
+        else:
+            backend = SQLiteCacheBackend(
+                settings.LLM_CACHE_PATH,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl=settings.LLM_CACHE_TTL,
+            )
+        _llm_cache = LLMResponseCache(backend)
+        logger.info("llm_cache_initialized", backend=settings.LLM_CACHE_BACKEND)
+    return _llm_cache
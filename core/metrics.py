@@ -1,13 +1,22 @@
 """
 Metrics tracking module for LUDEX framework.
 Tracks token usage, latency, and other operational metrics.
+
+Memory is fixed for the life of the process: every execution is folded into
+per-agent counters and streaming histograms when it finishes, and only the
+last settings.METRICS_RECENT_EXECUTIONS executions are kept in full.
+Summaries and the Prometheus exposition read the aggregates, never the
+execution history.
 """
+import math
 import time
-from typing import Dict, Any, Optional
+from collections import deque
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime
 import structlog
 
+from config.settings import settings
+
 logger = structlog.get_logger(__name__)
 
 @dataclass
@@ -17,15 +26,23 @@ class AgentMetrics:
     start_time: float = field(default_factory=time.time)
     end_time: Optional[float] = None
     tokens_used: int = 0
+    cost_usd: float = 0.0
     latency_ms: Optional[float] = None
     status: str = "running"  # running, completed, failed
     error: Optional[str] = None
+    on_finish: Optional[Callable[["AgentMetrics"], None]] = field(default=None, repr=False, compare=False)
+    
+    def _finish(self) -> None:
+        if self.on_finish is not None:
+            callback, self.on_finish = self.on_finish, None  # Aggregate once
+            callback(self)
     
-    def complete(self, tokens: int = 0):
+    def complete(self, tokens: int = 0, cost_usd: float = 0.0):
         """Mark the agent execution as complete."""
         self.end_time = time.time()
         self.latency_ms = (self.end_time - self.start_time) * 1000
         self.tokens_used = tokens
+        self.cost_usd = cost_usd
         self.status = "completed"
         
         logger.info(
@@ -33,13 +50,17 @@ class AgentMetrics:
             agent=self.agent_name,
             latency_ms=self.latency_ms,
             tokens=self.tokens_used,
+            cost_usd=round(self.cost_usd, 6),
             status=self.status
         )
+        self._finish()
     
-    def fail(self, error: str):
-        """Mark the agent execution as failed."""
+    def fail(self, error: str, tokens: int = 0, cost_usd: float = 0.0):
+        """Mark the agent execution as failed (tokens spent before failing still count)."""
         self.end_time = time.time()
         self.latency_ms = (self.end_time - self.start_time) * 1000
+        self.tokens_used = tokens
+        self.cost_usd = cost_usd
         self.status = "failed"
         self.error = error
         
@@ -49,6 +70,139 @@ class AgentMetrics:
             latency_ms=self.latency_ms,
             error=error
         )
+        self._finish()
+
+
+class StreamingHistogram:
+    """
+    Fixed-memory histogram of non-negative values with log-spaced buckets
+    (DDSketch-style).
+
+    Quantiles are within `relative_accuracy` of the true value. When more than
+    `max_buckets` buckets are in use the lowest ones are merged, which only
+    degrades the smallest quantiles.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = settings.METRICS_HISTOGRAM_ACCURACY,
+        max_buckets: int = settings.METRICS_HISTOGRAM_MAX_BUCKETS,
+    ):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}  # index i counts values in (gamma^(i-1), gamma^i]
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float) -> None:
+        value = max(float(value), 0.0)
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 1e-9:
+            self.zero_count += 1
+            return
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            lowest = min(self.buckets)
+            merged = self.buckets.pop(lowest)
+            second = min(self.buckets)
+            self.buckets[second] += merged
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0 <= q <= 1); 0 when empty."""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def count_le(self, bound: float) -> int:
+        """Approximate number of values <= bound (Prometheus cumulative bucket)."""
+        if bound <= 0:
+            return self.zero_count
+        limit = self._index(bound)
+        return self.zero_count + sum(n for index, n in self.buckets.items() if index <= limit)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": self.mean,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+@dataclass
+class AgentStats:
+    """Running aggregates of the executions of one agent (or of all of them)."""
+    started: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_latency_ms: float = 0.0
+    total_tokens: int = 0
+    total_cost_usd: float = 0.0
+    latency_ms: StreamingHistogram = field(default_factory=StreamingHistogram)
+    tokens: StreamingHistogram = field(default_factory=StreamingHistogram)
+
+    def record(self, metric: AgentMetrics) -> None:
+        """Fold a finished execution in; latency and tokens describe completed runs only."""
+        self.total_cost_usd += metric.cost_usd
+        if metric.status == "failed":
+            self.failed += 1
+            return
+        self.completed += 1
+        self.total_tokens += metric.tokens_used
+        self.tokens.add(metric.tokens_used)
+        if metric.latency_ms:
+            self.total_latency_ms += metric.latency_ms
+            self.latency_ms.add(metric.latency_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "executions": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "total_tokens": self.total_tokens,
+            "total_cost_usd": self.total_cost_usd,
+            "latency_ms": self.latency_ms.summary(),
+            "tokens": self.tokens.summary(),
+        }
+
+
+# Prometheus histogram buckets
+LATENCY_BUCKETS_MS = (100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000, 60_000, 120_000, 300_000)
+TOKEN_BUCKETS = (100, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000)
+
+
+def _labels(**labels: Any) -> str:
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
 
 class MetricsCollector:
     """Singleton metrics collector for the framework."""
@@ -58,36 +212,183 @@ class MetricsCollector:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.metrics = []
+            cls._instance.reset()
         return cls._instance
     
     def start_agent(self, agent_name: str) -> AgentMetrics:
         """Start tracking an agent execution."""
-        metric = AgentMetrics(agent_name=agent_name)
+        metric = AgentMetrics(agent_name=agent_name, on_finish=self._record_execution)
         self.metrics.append(metric)
+        for stats in (self._agent_stats(agent_name), self.totals):
+            stats.started += 1
         logger.info("agent_execution_started", agent=agent_name)
         return metric
     
+    def _agent_stats(self, agent_name: str) -> AgentStats:
+        stats = self.agents.get(agent_name)
+        if stats is None:
+            stats = self.agents[agent_name] = AgentStats()
+        return stats
+    
+    def _record_execution(self, metric: AgentMetrics) -> None:
+        for stats in (self._agent_stats(metric.agent_name), self.totals):
+            stats.record(metric)
+    
+    def get_recent_executions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent executions first (at most settings.METRICS_RECENT_EXECUTIONS)."""
+        recent = list(self.metrics)[::-1][:limit]
+        return [
+            {
+                "agent_name": m.agent_name,
+                "status": m.status,
+                "latency_ms": m.latency_ms,
+                "tokens_used": m.tokens_used,
+                "cost_usd": m.cost_usd,
+                "error": m.error,
+            }
+            for m in recent
+        ]
+    
+    def record_cache_lookup(self, agent_name: str, hit: bool) -> None:
+        """Count an LLM response cache hit or miss for an agent."""
+        counters = self.cache_hits if hit else self.cache_misses
+        counters[agent_name] = counters.get(agent_name, 0) + 1
+    
+    def record_llm_usage(
+        self,
+        agent_name: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+        cost_usd: float = 0.0,
+    ) -> None:
+        """Add one LLM call's usage to the agent's totals (fed by core.usage_tracking)."""
+        usage = self.llm_usage.setdefault(agent_name, {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+        })
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+        usage["cached_tokens"] += cached_tokens
+        usage["cost_usd"] += cost_usd
+    
+    def get_usage_summary(self) -> Dict[str, Any]:
+        """LLM token/cost totals, with agents ordered by cost (hot-spots first)."""
+        by_agent = dict(sorted(
+            self.llm_usage.items(),
+            key=lambda item: (item[1]["cost_usd"], item[1]["prompt_tokens"] + item[1]["completion_tokens"]),
+            reverse=True,
+        ))
+        return {
+            "calls": sum(u["calls"] for u in by_agent.values()),
+            "prompt_tokens": sum(u["prompt_tokens"] for u in by_agent.values()),
+            "completion_tokens": sum(u["completion_tokens"] for u in by_agent.values()),
+            "cached_tokens": sum(u["cached_tokens"] for u in by_agent.values()),
+            "cost_usd": sum(u["cost_usd"] for u in by_agent.values()),
+            "by_agent": by_agent,
+        }
+    
+    def get_cache_summary(self) -> Dict[str, Any]:
+        """LLM response cache hit/miss counters (total and per agent)."""
+        hits = sum(self.cache_hits.values())
+        misses = sum(self.cache_misses.values())
+        agents = sorted(set(self.cache_hits) | set(self.cache_misses))
+        
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0,
+            "by_agent": {
+                agent: {
+                    "hits": self.cache_hits.get(agent, 0),
+                    "misses": self.cache_misses.get(agent, 0),
+                }
+                for agent in agents
+            },
+        }
+    
+    def reset(self) -> None:
+        """Clear all tracked executions and counters."""
+        self.metrics = deque(maxlen=settings.METRICS_RECENT_EXECUTIONS)  # Recent executions (ring buffer)
+        self.agents: Dict[str, AgentStats] = {}
+        self.totals = AgentStats()
+        self.cache_hits = {}
+        self.cache_misses = {}
+        self.llm_usage = {}
+    
     def get_summary(self) -> Dict[str, Any]:
         """Get summary statistics for all tracked executions."""
-        if not self.metrics:
-            return {"total_executions": 0}
-        
-        completed = [m for m in self.metrics if m.status == "completed"]
-        failed = [m for m in self.metrics if m.status == "failed"]
-        
-        total_latency = sum(m.latency_ms for m in completed if m.latency_ms)
-        total_tokens = sum(m.tokens_used for m in completed)
+        if not self.totals.started:
+            return {
+                "total_executions": 0,
+                "llm_cache": self.get_cache_summary(),
+                "llm_usage": self.get_usage_summary(),
+            }
         
+        totals = self.totals
         return {
-            "total_executions": len(self.metrics),
-            "completed": len(completed),
-            "failed": len(failed),
-            "total_latency_ms": total_latency,
-            "avg_latency_ms": total_latency / len(completed) if completed else 0,
-            "total_tokens": total_tokens,
-            "avg_tokens_per_agent": total_tokens / len(completed) if completed else 0
+            "total_executions": totals.started,
+            "completed": totals.completed,
+            "failed": totals.failed,
+            "total_latency_ms": totals.total_latency_ms,
+            "avg_latency_ms": totals.total_latency_ms / totals.completed if totals.completed else 0,
+            "latency_ms": totals.latency_ms.summary(),
+            "total_tokens": totals.total_tokens,
+            "avg_tokens_per_agent": totals.total_tokens / totals.completed if totals.completed else 0,
+            "total_cost_usd": totals.total_cost_usd,
+            "agents": {name: stats.summary() for name, stats in self.agents.items()},
+            "llm_cache": self.get_cache_summary(),
+            "llm_usage": self.get_usage_summary(),
         }
+    
+    def render_prometheus(self, prefix: str = "ludex") -> str:
+        """Prometheus text exposition (format 0.0.4) of the aggregated metrics."""
+        lines: List[str] = []
+        
+        def family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[str, str, float]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.extend(f"{prefix}_{name}{suffix}{labels} {value:g}" for suffix, labels, value in samples)
+        
+        def histogram(hist: StreamingHistogram, bounds: Tuple[int, ...], agent: str):
+            for bound in bounds:
+                yield "_bucket", _labels(agent=agent, le=bound), hist.count_le(bound)
+            yield "_bucket", _labels(agent=agent, le="+Inf"), hist.count
+            yield "_sum", _labels(agent=agent), hist.sum
+            yield "_count", _labels(agent=agent), hist.count
+        
+        agents = sorted(self.agents.items())
+        family("agent_executions_total", "counter", "Agent executions by outcome.", (
+            ("", _labels(agent=name, status=status), count)
+            for name, stats in agents
+            for status, count in (("completed", stats.completed), ("failed", stats.failed))
+        ))
+        family("agent_executions_running", "gauge", "Agent executions in progress.", (
+            ("", _labels(agent=name), stats.started - stats.completed - stats.failed) for name, stats in agents
+        ))
+        family("agent_latency_ms", "histogram", "Latency of completed agent executions (ms).", (
+            sample for name, stats in agents for sample in histogram(stats.latency_ms, LATENCY_BUCKETS_MS, name)
+        ))
+        family("agent_tokens", "histogram", "Tokens used per completed agent execution.", (
+            sample for name, stats in agents for sample in histogram(stats.tokens, TOKEN_BUCKETS, name)
+        ))
+        family("llm_calls_total", "counter", "LLM calls.", (
+            ("", _labels(agent=name), usage["calls"]) for name, usage in sorted(self.llm_usage.items())
+        ))
+        family("llm_tokens_total", "counter", "LLM tokens by type.", (
+            ("", _labels(agent=name, type=kind), usage[f"{kind}_tokens"])
+            for name, usage in sorted(self.llm_usage.items())
+            for kind in ("prompt", "completion", "cached")
+        ))
+        family("llm_cost_usd_total", "counter", "LLM cost in USD.", (
+            ("", _labels(agent=name), usage["cost_usd"]) for name, usage in sorted(self.llm_usage.items())
+        ))
+        family("llm_cache_lookups_total", "counter", "LLM response cache lookups.", (
+            ("", _labels(agent=name, result=result), counters.get(name, 0))
+            for name in sorted(set(self.cache_hits) | set(self.cache_misses))
+            for result, counters in (("hit", self.cache_hits), ("miss", self.cache_misses))
+        ))
+        return "\n".join(lines) + "\n"
 
 # Singleton instance
 metrics_collector = MetricsCollector()
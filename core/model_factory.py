@@ -3,20 +3,137 @@ Model Factory - Create LLM instances for different providers.
 
 This module centralizes LLM creation logic to make it easy to switch
 between providers (GitHub Models, Ollama, Groq, etc.) for testing and production.
+
+Clients are long-lived: HTTP connection pools are shared per (provider, base_url)
+and create_model() returns one registered model instance per configuration, so
+agent nodes don't pay a new TCP/TLS handshake on every invocation. Async pools
+are kept per event loop (pooled connections cannot outlive the loop that opened
+them), so models keep working across asyncio.run calls.
 """
 
+import asyncio
+import threading
+import weakref
+import httpx
 import structlog
-from typing import Optional, List, Literal
+from typing import Any, Dict, Optional, List, Literal, Tuple
 from langchain_core.language_models import BaseChatModel
 from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from langchain_ollama import ChatOllama
 
 from config.settings import settings
+from core.model_router import failover_exceptions, make_candidate, model_router
+from core.usage_tracking import model_name_of, usage_tracker
 
 logger = structlog.get_logger(__name__)
 
 
+# ============================================================
+# CLIENT REGISTRY (shared connection pools)
+# ============================================================
+
+_http_clients: Dict[Tuple[str, str], Tuple[httpx.Client, httpx.AsyncClient]] = {}
+_model_registry: Dict[Tuple[Any, ...], BaseChatModel] = {}
+_registry_lock = threading.Lock()
+
+
+def _connection_limits() -> httpx.Limits:
+    """Pool limits from settings (LLM_MAX_CONNECTIONS, LLM_KEEPALIVE_*)."""
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+async def _close_on_loop_shutdown(pool: httpx.AsyncHTTPTransport):
+    """Suspended async generator; the loop's shutdown_asyncgens (asyncio.run) closes it and the pool."""
+    try:
+        yield
+    finally:
+        await pool.aclose()
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport with one connection pool per running event loop.
+    
+    A pool shared across loops hands a new loop connections whose loop is
+    closed ("Event loop is closed" on the second asyncio.run). Each loop's
+    pool is closed when that loop shuts down.
+    """
+    
+    def __init__(self, limits: httpx.Limits):
+        self._limits = limits
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncHTTPTransport, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+    
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._pools.get(loop)
+            if entry is None:
+                for closed in [other for other in self._pools if other.is_closed()]:
+                    del self._pools[closed]
+                pool = httpx.AsyncHTTPTransport(limits=self._limits)
+                closer = _close_on_loop_shutdown(pool)
+                # Run it up to its yield now: the loop starts tracking it on first iteration
+                try:
+                    closer.asend(None).send(None)
+                except StopIteration:
+                    pass
+                entry = self._pools[loop] = (pool, closer)
+        return entry[0]
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        """Close the current loop's pool; the others close with their loop."""
+        with self._lock:
+            entry = self._pools.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].aclose()
+
+
+def get_http_clients(provider: str, base_url: Optional[str]) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Get the shared sync/async HTTP clients for a provider endpoint.
+    
+    Args:
+        provider: Provider name ("github", "groq", ...)
+        base_url: API base URL (one pool per distinct endpoint)
+    
+    Returns:
+        (httpx.Client, httpx.AsyncClient) sharing the configured pool limits;
+        the async client keeps one pool per event loop
+    """
+    key = (provider, base_url or "")
+    with _registry_lock:
+        clients = _http_clients.get(key)
+        if clients is None:
+            limits = _connection_limits()
+            clients = (httpx.Client(limits=limits), httpx.AsyncClient(transport=_PerLoopTransport(limits)))
+            _http_clients[key] = clients
+            logger.info("http_pool_created", provider=provider, base_url=base_url)
+        return clients
+
+
+async def close_model_clients() -> None:
+    """Close every pooled HTTP client and forget registered models (app shutdown)."""
+    with _registry_lock:
+        clients = list(_http_clients.values())
+        _http_clients.clear()
+        _model_registry.clear()
+    
+    for sync_client, async_client in clients:
+        sync_client.close()
+        await async_client.aclose()
+
+
 def create_github_model(
     model: Optional[str] = None,
     temperature: float = 0.7,
@@ -34,11 +151,14 @@ def create_github_model(
     Example:
         >>> llm = create_github_model(model="gpt-4o", temperature=0.7)
     """
+    http_client, http_async_client = get_http_clients("github", settings.GITHUB_MODELS_BASE_URL)
     return ChatOpenAI(
         model=model or settings.GITHUB_MODEL,
         temperature=temperature,
         api_key=settings.GITHUB_TOKEN,
         base_url=settings.GITHUB_MODELS_BASE_URL,
+        http_client=http_client,
+        http_async_client=http_async_client,
     )
 
 
@@ -74,6 +194,7 @@ def create_ollama_model(
         model=model_name,
         base_url=settings.OLLAMA_BASE_URL,
         num_ctx=num_ctx or settings.OLLAMA_NUM_CTX,
+        client_kwargs={"limits": _connection_limits()},
     )
     
     return ChatOllama(
@@ -81,6 +202,7 @@ def create_ollama_model(
         temperature=temperature or settings.OLLAMA_TEMPERATURE,
         base_url=settings.OLLAMA_BASE_URL,
         num_ctx=num_ctx or settings.OLLAMA_NUM_CTX,
+        client_kwargs={"limits": _connection_limits()},
     )
 
 
@@ -100,10 +222,13 @@ def create_groq_model(
     """
     from langchain_groq import ChatGroq
     
+    http_client, http_async_client = get_http_clients("groq", settings.GROQ_BASE_URL)
     return ChatGroq(
         model=model or settings.GROQ_MODEL,
         temperature=temperature,
         api_key=settings.GROQ_API_KEY,
+        http_client=http_client,
+        http_async_client=http_async_client,
     )
 
 
@@ -114,6 +239,9 @@ def create_anthropic_model(
     """
     Create a ChatAnthropic instance.
     
+    ChatAnthropic manages its own HTTP client; reusing the registered instance
+    (see create_model) is what keeps its connection pool alive.
+    
     Args:
         model: Model name (default: settings.ANTHROPIC_MODEL)
         temperature: Temperature for sampling (default: 0.7)
@@ -131,7 +259,7 @@ def create_anthropic_model(
 
 
 def create_model(
-    provider: Literal["github", "ollama", "groq", "anthropic"] = "github",
+    provider: Literal["github", "ollama", "groq", "anthropic", "auto"] = "github",
     model: Optional[str] = None,
     temperature: float = 0.7,
     **kwargs,
@@ -139,11 +267,18 @@ def create_model(
     """
     Universal model factory - create LLM for any provider.
     
+    Returns the registered long-lived instance for this (provider, model,
+    temperature, num_ctx) combination, creating it on first use.
+    
+    With provider="auto" the model router picks provider and model for this
+    call (core/model_router.py) and `model` is ignored.
+    
     Args:
-        provider: Provider name ("github", "ollama", "groq", or "anthropic")
+        provider: Provider name ("github", "ollama", "groq", "anthropic" or "auto")
         model: Model name (provider-specific)
         temperature: Temperature for sampling
         **kwargs: Additional provider-specific arguments
+            (min_context: prompt tokens the routed model must fit, "auto" only)
     
     Returns:
         Configured LLM instance
@@ -158,6 +293,95 @@ def create_model(
     Raises:
         ValueError: If provider is not supported
     """
+    if provider == "auto":
+        return create_routed_model(temperature=temperature, min_context=kwargs.get("min_context", 0))
+    
+    key = (provider, model, temperature, kwargs.get("num_ctx"))
+    with _registry_lock:
+        llm = _model_registry.get(key)
+    if llm is not None:
+        return llm
+    
+    llm = _build_model(provider, model, temperature, **kwargs)
+    # Token/cost accounting and router latency/error feedback for every response
+    model_name = getattr(llm, "model_name", None) or getattr(llm, "model", None) or ""
+    llm.callbacks = [*(llm.callbacks or []), usage_tracker, model_router.feedback_for(provider, model_name)]
+    with _registry_lock:
+        # Another caller may have registered it first; keep a single instance
+        return _model_registry.setdefault(key, llm)
+
+
+def model_provider(llm: Any) -> Optional[str]:
+    """Provider of a model returned by create_model (the primary one if routed), else None."""
+    llm = getattr(llm, "runnable", llm)
+    with _registry_lock:
+        for key, registered in _model_registry.items():
+            if registered is llm:
+                return key[0]
+    return None
+
+
+def create_routed_model(temperature: float = 0.7, min_context: int = 0) -> BaseChatModel:
+    """
+    Best candidate by live signals, with the next ones as fallbacks on 429/5xx.
+    
+    Raises:
+        ValueError: If no candidate is configured or fits min_context
+    """
+    ranked = model_router.rank(min_context)
+    if not ranked:
+        raise ValueError(f"No model router candidate available for {min_context} context tokens")
+    
+    chosen = ranked[:settings.MODEL_ROUTER_MAX_FALLBACKS + 1]
+    logger.info("model_routed", model=chosen[0].key, fallbacks=[c.key for c in chosen[1:]])
+    models = [create_model(c.provider, c.model, temperature) for c in chosen]
+    if len(models) == 1:
+        return models[0]
+    return models[0].with_fallbacks(models[1:], exceptions_to_handle=failover_exceptions())
+
+
+def fit_fallbacks(llm: Any, min_context: int) -> Any:
+    """
+    `llm` keeping only the fallbacks whose context window holds `min_context` tokens.
+    
+    A routed model is ranked before its prompt exists, and the prompt is sized
+    to the primary model's window; a smaller fallback would reject it.
+    Models without fallbacks are returned unchanged.
+    """
+    fallbacks = getattr(llm, "fallbacks", None)
+    if not fallbacks:
+        return llm
+    
+    fitting, skipped = [], []
+    for model in fallbacks:
+        (fitting if _context_window(model) >= min_context else skipped).append(model)
+    if not skipped:
+        return llm
+    logger.info(
+        "model_fallbacks_skipped",
+        min_context=min_context,
+        skipped=[model_name_of(model) for model in skipped],
+    )
+    if not fitting:
+        return llm.runnable
+    return llm.runnable.with_fallbacks(fitting, exceptions_to_handle=llm.exceptions_to_handle)
+
+
+def _context_window(llm: Any) -> int:
+    """Context window the router assumes for a model returned by create_model."""
+    num_ctx = getattr(llm, "num_ctx", None)
+    if isinstance(num_ctx, int) and num_ctx > 0:
+        return num_ctx
+    return make_candidate(model_provider(llm) or "", model_name_of(llm) or "").context_window
+
+
+def _build_model(
+    provider: str,
+    model: Optional[str],
+    temperature: float,
+    **kwargs,
+) -> BaseChatModel:
+    """Instantiate a provider model (no registry lookup)."""
     if provider == "github":
         return create_github_model(model=model, temperature=temperature)
     elif provider == "ollama":
@@ -181,7 +405,7 @@ def get_available_providers() -> List[str]:
     Returns:
         List of provider names
     """
-    return ["github", "ollama", "groq", "anthropic"]
+    return ["github", "ollama", "groq", "anthropic", "auto"]
 
 
 def bind_tools_safe(
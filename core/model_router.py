@@ -0,0 +1,258 @@
+"""
+Provider-aware model routing from live latency, error and quota signals.
+
+create_model(provider="auto") asks the router for a ranking of the
+configured candidates (settings.MODEL_ROUTER_CANDIDATES, "provider:model")
+and returns the best one wrapped with the next ones as fallbacks, so a 429,
+5xx or connection error fails over within the same call.
+
+Every model built by create_model carries a RouterFeedback callback, so the
+signals come from all LLM traffic, routed or not:
+
+- rolling p50/p95 latency and error rate over the last
+  settings.MODEL_ROUTER_WINDOW calls
+- rpm headroom: a token bucket sized to the candidate's rpm_limit that every
+  request draws from
+- a cooldown after a 429 (Retry-After when the provider sends it)
+
+The static inputs are MODEL_COSTS credits_per_request, rpm_limit and
+context_window. A candidate is scored as its expected latency in ms
+(errors and quota pressure inflate it, credits add a fixed penalty) and
+candidates whose context window cannot hold `min_context` are skipped.
+"""
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Type
+from uuid import UUID
+
+import httpx
+import structlog
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config.settings import settings
+from core.rate_limiting import TokenBucket
+from core.usage_tracking import match_model
+
+logger = structlog.get_logger(__name__)
+
+# Credentials a provider needs before it is routed to
+_PROVIDER_CREDENTIALS = {
+    "github": "GITHUB_TOKEN",
+    "groq": "GROQ_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+}
+
+
+@dataclass(frozen=True)
+class Candidate:
+    provider: str
+    model: str
+    rpm_limit: float
+    context_window: int
+    credits_per_request: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+def _model_cost(model: str) -> Any:
+    from core.budget_manager import MODEL_COSTS
+    name = match_model(model, MODEL_COSTS)
+    return MODEL_COSTS[name] if name else None
+
+
+def make_candidate(provider: str, model: str) -> Candidate:
+    """Candidate with limits from MODEL_COSTS, else from provider defaults."""
+    cost = _model_cost(model)
+    if provider == "ollama":
+        context_window = settings.OLLAMA_NUM_CTX
+    elif cost is not None:
+        context_window = cost.context_window
+    else:
+        context_window = settings.CONTEXT_DEFAULT_WINDOW
+    rpm_limit = cost.rpm_limit if cost is not None else settings.MODEL_ROUTER_DEFAULT_RPM.get(provider, 60)
+    return Candidate(
+        provider=provider,
+        model=model,
+        rpm_limit=rpm_limit,
+        context_window=context_window,
+        credits_per_request=cost.credits_per_request if cost is not None else 0.0,
+    )
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error (openai/anthropic/groq/ollama/httpx), if any."""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def failover_exceptions() -> Tuple[Type[BaseException], ...]:
+    """Provider errors that move a routed call to its next candidate (429, 5xx, connection)."""
+    exceptions: List[Type[BaseException]] = [httpx.TransportError]
+    for module_name in ("openai", "anthropic", "groq"):
+        try:
+            module = __import__(module_name)
+        except ImportError:
+            continue
+        exceptions += [module.RateLimitError, module.InternalServerError, module.APIConnectionError]
+    try:
+        from ollama import ResponseError
+        exceptions.append(ResponseError)
+    except ImportError:
+        pass
+    return tuple(exceptions)
+
+
+class CandidateStats:
+    """Rolling signals for one provider:model."""
+
+    def __init__(self, rpm_limit: float, window: int = settings.MODEL_ROUTER_WINDOW):
+        self.latencies_ms: Deque[float] = deque(maxlen=window)
+        self.errors: Deque[bool] = deque(maxlen=window)
+        self.requests = TokenBucket(rate=rpm_limit / 60.0, capacity=max(rpm_limit, 1))
+        self.cooldown_until = 0.0
+
+    def latency_ms(self, q: float) -> Optional[float]:
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def headroom(self) -> float:
+        """Fraction of the rpm budget left (0 when requests are already queued ahead)."""
+        return max(self.requests.available(), 0.0) / self.requests.capacity
+
+    def quota_wait_ms(self) -> float:
+        """Time until the next request fits in the rpm budget."""
+        missing = 1.0 - self.requests.available()
+        return max(missing, 0.0) / self.requests.rate * 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "p50_ms": self.latency_ms(0.5),
+            "p95_ms": self.latency_ms(0.95),
+            "error_rate": self.error_rate,
+            "headroom": round(self.headroom(), 3),
+            "cooldown_seconds": max(self.cooldown_until - time.monotonic(), 0.0),
+        }
+
+
+class RouterFeedback(BaseCallbackHandler):
+    """Feeds one candidate's CandidateStats from its LLM callbacks."""
+
+    run_inline = True
+
+    def __init__(self, key: str, stats: CandidateStats):
+        self.key = key
+        self.stats = stats
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.monotonic()
+        self.stats.requests.reserve()
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.stats.latencies_ms.append((time.monotonic() - started) * 1000)
+            self.stats.errors.append(False)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+        self.stats.errors.append(True)
+        code = status_code(error)
+        if code == 429:
+            cooldown = retry_after(error) or settings.MODEL_ROUTER_COOLDOWN_SECONDS
+            self.stats.cooldown_until = time.monotonic() + cooldown
+            logger.warning("model_rate_limited", candidate=self.key, cooldown_seconds=cooldown)
+        else:
+            logger.warning("model_call_failed", candidate=self.key, status_code=code, error=str(error))
+
+
+class ModelRouter:
+    """Ranks provider:model candidates by live signals (see module docstring)."""
+
+    def __init__(self, candidates: Optional[Iterable[str]] = None):
+        self._candidate_specs = list(candidates) if candidates is not None else None
+        self._stats: Dict[str, CandidateStats] = {}
+        self._feedback: Dict[str, RouterFeedback] = {}
+
+    def candidates(self) -> List[Candidate]:
+        """Configured candidates whose provider has credentials."""
+        specs = self._candidate_specs if self._candidate_specs is not None else settings.MODEL_ROUTER_CANDIDATES
+        candidates = []
+        for spec in specs:
+            provider, _, model = spec.partition(":")
+            credential = _PROVIDER_CREDENTIALS.get(provider)
+            if credential and not getattr(settings, credential, None):
+                continue
+            candidates.append(make_candidate(provider, model))
+        return candidates
+
+    def stats_for(self, provider: str, model: str) -> CandidateStats:
+        key = f"{provider}:{model}"
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = CandidateStats(make_candidate(provider, model).rpm_limit)
+        return stats
+
+    def feedback_for(self, provider: str, model: str) -> RouterFeedback:
+        """Callback handler to attach to a model so its calls feed the router."""
+        key = f"{provider}:{model}"
+        feedback = self._feedback.get(key)
+        if feedback is None:
+            feedback = self._feedback[key] = RouterFeedback(key, self.stats_for(provider, model))
+        return feedback
+
+    def score(self, candidate: Candidate) -> float:
+        """Expected cost of a call in ms-equivalents (lower is better)."""
+        stats = self.stats_for(candidate.provider, candidate.model)
+        if stats.cooling_down:
+            return math.inf
+        p50, p95 = stats.latency_ms(0.5), stats.latency_ms(0.95)
+        latency = (p50 + p95) / 2 if p50 is not None else settings.MODEL_ROUTER_PRIOR_LATENCY_MS
+        latency *= 1 + 4 * stats.error_rate
+        latency *= 1.5 - 0.5 * stats.headroom()
+        credits = candidate.credits_per_request * settings.MODEL_ROUTER_CREDIT_PENALTY_MS
+        return latency + stats.quota_wait_ms() + credits
+
+    def rank(self, min_context: int = 0) -> List[Candidate]:
+        """Candidates that fit `min_context` tokens, best first (cooling ones last)."""
+        fitting = [c for c in self.candidates() if c.context_window >= min_context]
+        scored = sorted(((self.score(c), c) for c in fitting), key=lambda item: item[0])
+        ranked = [c for _, c in scored]
+        logger.debug(
+            "model_router_ranked",
+            ranking=[(c.key, round(s, 1) if s != math.inf else "cooldown") for s, c in scored],
+        )
+        return ranked
+
+    def get_status(self) -> Dict[str, Any]:
+        return {key: stats.snapshot() for key, stats in self._stats.items()}
+
+
+model_router = ModelRouter()
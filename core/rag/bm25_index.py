@@ -0,0 +1,155 @@
+"""
+Persistent BM25 inverted index kept alongside a Chroma collection.
+
+Dense embeddings blur exact API names (`Rigidbody.AddForce`,
+`UCharacterMovementComponent`); a lexical index matches them verbatim.
+The index is a small SQLite file next to the Chroma directory
+(data/chroma_db_bm25/<collection>.sqlite) and is updated on every
+upsert/delete made through RealRAGEngine, so it is built during ingestion.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, List, Sequence, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Identifiers, optionally dotted/scoped: Rigidbody.AddForce, std::vector, UCharacterMovementComponent
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:(?:\.|::)[A-Za-z_][A-Za-z0-9_]*)*|\d+")
+_CAMEL_RE = re.compile(r"[a-z0-9][A-Z]|[A-Z][A-Z][a-z]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms; dotted identifiers are kept whole and also split.
+
+    'Rigidbody.AddForce()' -> ['rigidbody.addforce', 'rigidbody', 'addforce']
+    """
+    terms = []
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group().lower()
+        terms.append(token)
+        if "." in token or "::" in token:
+            terms.extend(part for part in re.split(r"\.|::", token) if part)
+    return terms
+
+
+def contains_identifier(text: str) -> bool:
+    """True if the text names a code identifier (dotted, snake_case or CamelCase)."""
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group()
+        if "." in token or "::" in token or "_" in token.strip("_") or _CAMEL_RE.search(token):
+            return True
+    return False
+
+
+class BM25Index:
+    """
+    SQLite-backed inverted index with Okapi BM25 scoring.
+
+    Args:
+        path: SQLite file
+        k1, b: BM25 parameters
+    """
+
+    def __init__(self, path: Path, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, length INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL, "
+                "PRIMARY KEY (term, doc_id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id)")
+
+    def _delete_locked(self, ids: Sequence[str]) -> None:
+        rows = [(doc_id,) for doc_id in ids]
+        self._conn.executemany("DELETE FROM postings WHERE doc_id = ?", rows)
+        self._conn.executemany("DELETE FROM docs WHERE id = ?", rows)
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str]) -> None:
+        """Index (or re-index) documents in one transaction."""
+        with self._lock, self._conn:
+            self._delete_locked(ids)
+            docs, postings = [], []
+            for doc_id, text in zip(ids, documents):
+                counts = Counter(tokenize(text or ""))
+                docs.append((doc_id, sum(counts.values())))
+                postings.extend((term, doc_id, tf) for term, tf in counts.items())
+            self._conn.executemany("INSERT INTO docs (id, length) VALUES (?, ?)", docs)
+            self._conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)", postings)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock, self._conn:
+            self._delete_locked(ids)
+
+    def count(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()
+        return count
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (doc_id, score) by BM25; empty if no query term is indexed."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        scores: Counter = Counter()
+        with self._lock:
+            total, avg_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            if not total:
+                return []
+            avg_length = avg_length or 1.0
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id "
+                    "WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log((total - len(rows) + 0.5) / (len(rows) + 0.5) + 1.0)
+                for doc_id, tf, length in rows:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+
+        return scores.most_common(k)
+
+    def rebuild(self, batches: Iterable[Tuple[Sequence[str], Sequence[str]]]) -> int:
+        """Re-index from (ids, documents) batches, e.g. pages of an existing collection."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM docs")
+        indexed = 0
+        for ids, documents in batches:
+            self.upsert(ids, documents)
+            indexed += len(ids)
+        logger.info("bm25_index_rebuilt", path=str(self.path), documents=indexed)
+        return indexed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def iter_collection_pages(collection: Any, page_size: int = 500) -> Iterable[Tuple[List[str], List[str]]]:
+    """Yield (ids, documents) pages from a chromadb collection."""
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=["documents"])
+        if not page["ids"]:
+            return
+        yield page["ids"], page["documents"]
+        offset += len(page["ids"])
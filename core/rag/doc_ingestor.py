@@ -1,48 +1,82 @@
 import os
-from typing import List, Dict
+from pathlib import Path
+from typing import List, Dict, Optional
 from core.rag.rag_engine import RAGEngine
-# We'll use a simple text splitter for now, or markitdown if installed
-# Assuming markitdown is for converting files, we might just read text files for now.
+from core.rag.ingestion_pipeline import (
+    IngestionManifest,
+    IngestionPipeline,
+    IngestionStats,
+    default_manifest_path,
+    iter_file_documents,
+    iter_source_files,
+)
 
 class DocIngestor:
     """
     Ingests documentation into the RAG Engine.
+
+    Files are streamed through IngestionPipeline: chunks are grouped into
+    batches and bulk-upserted instead of one add_documents call per file.
+    The collection's own embedding function embeds each batch on upsert.
+
+    Re-ingesting only writes new or changed chunks and deletes the ones an
+    edit removed. The manifest defaults to one next to the engine's store
+    (data/chroma_db_manifests/<collection>.json); engines without a
+    persist_directory (MockRAGEngine) ingest without one.
     """
-    
-    def __init__(self, rag_engine: RAGEngine):
+
+    def __init__(self, rag_engine: RAGEngine, manifest_path: Optional[str] = None, **pipeline_kwargs):
         self.rag_engine = rag_engine
+        persist_directory = getattr(rag_engine, "persist_directory", None)
+        if manifest_path is None and persist_directory:
+            manifest_path = default_manifest_path(Path(persist_directory), rag_engine.collection_name)
+        self.manifest = IngestionManifest(Path(manifest_path)) if manifest_path else None
+        if self.manifest and self.manifest.documents and rag_engine.count_documents() == 0:
+            # A wiped/recreated store invalidates the manifest
+            self.manifest.clear()
+        self.pipeline = IngestionPipeline(
+            rag_engine.upsert_documents,
+            delete=rag_engine.delete_documents,
+            manifest=self.manifest,
+            **pipeline_kwargs,
+        )
 
-    def ingest_text_file(self, file_path: str, source_type: str = "unity_docs"):
+    def _ingest_paths(self, paths, root: Path, source_type: str) -> IngestionStats:
+        # Documents are keyed by their path relative to the ingested root's
+        # parent ("unity/Manual/index.md"), so same-named files in different
+        # subdirectories get distinct chunk ids and manifest entries.
+        base = root.resolve().parent
+        documents = iter_file_documents(
+            paths,
+            metadata={"source": source_type},
+            doc_id=lambda path: Path(path).resolve().relative_to(base).as_posix(),
+        )
+        return self.pipeline.run(documents)
+
+    def ingest_text_file(self, file_path: str, source_type: str = "unity_docs") -> Optional[IngestionStats]:
         """
         Ingests a single text/markdown file.
         """
         if not os.path.exists(file_path):
             print(f"File not found: {file_path}")
-            return
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Simple chunking (can be improved with LangChain TextSplitter)
-        chunk_size = 1000
-        chunks = [content[i:i+chunk_size] for i in range(0, len(content), chunk_size)]
-        
-        ids = [f"{os.path.basename(file_path)}_{i}" for i in range(len(chunks))]
-        metadatas = [{"source": source_type, "filename": os.path.basename(file_path), "chunk_index": i} for i in range(len(chunks))]
-        
-        self.rag_engine.add_documents(chunks, metadatas, ids)
-        print(f"Ingested {len(chunks)} chunks from {file_path}")
-
-    def ingest_directory(self, directory_path: str, source_type: str):
+            return None
+
+        stats = self._ingest_paths([Path(file_path)], Path(file_path).parent, source_type)
+        print(f"Ingested {stats.chunks} chunks from {file_path}")
+        return stats
+
+    def ingest_directory(self, directory_path: str, source_type: str) -> Optional[IngestionStats]:
         """
         Ingests all .md and .txt files in a directory.
         """
         if not os.path.exists(directory_path):
             print(f"Directory not found: {directory_path}")
-            return
+            return None
 
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                if file.endswith(".md") or file.endswith(".txt"):
-                    full_path = os.path.join(root, file)
-                    self.ingest_text_file(full_path, source_type)
+        stats = self._ingest_paths(iter_source_files(Path(directory_path)), Path(directory_path), source_type)
+        print(
+            f"Ingested {stats.chunks} chunks from {stats.documents} files in {directory_path} "
+            f"({stats.documents_skipped} unchanged, {stats.chunks_reused} chunks reused, "
+            f"{stats.chunks_deleted} deleted)"
+        )
+        return stats
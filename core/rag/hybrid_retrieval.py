@@ -0,0 +1,74 @@
+"""
+Rank fusion and optional reranking for hybrid (BM25 + dense) retrieval.
+
+- reciprocal_rank_fusion: merges ranked id lists, score = sum(1 / (k + rank))
+- CrossEncoderReranker: optional local cross-encoder (sentence-transformers)
+  enabled with settings.RAG_RERANK_MODEL; skipped if the package is missing
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = settings.RAG_RRF_K) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of document ids (best first).
+
+    Documents found by more than one retriever, or ranked high by any of
+    them, come first; raw scores are never compared across retrievers.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class CrossEncoderReranker:
+    """Scores (query, passage) pairs with a local cross-encoder model."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name)
+
+    def rerank(self, query: str, passages: Sequence[str]) -> List[int]:
+        """Indices of `passages` ordered by relevance."""
+        if not passages:
+            return []
+        scores = self.model.predict([(query, passage) for passage in passages])
+        return sorted(range(len(passages)), key=lambda i: float(scores[i]), reverse=True)
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+_reranker_failed = False
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    Lazily load the reranker configured in settings.RAG_RERANK_MODEL.
+
+    Returns:
+        CrossEncoderReranker, or None if disabled or sentence-transformers
+        is not installed
+    """
+    global _reranker, _reranker_failed
+    if not settings.RAG_RERANK_MODEL or _reranker_failed:
+        return None
+    with _reranker_lock:
+        if _reranker is None and not _reranker_failed:
+            try:
+                _reranker = CrossEncoderReranker(settings.RAG_RERANK_MODEL)
+                logger.info("reranker_loaded", model=settings.RAG_RERANK_MODEL)
+            except Exception as e:
+                _reranker_failed = True
+                logger.warning("reranker_unavailable", model=settings.RAG_RERANK_MODEL, error=str(e))
+        return _reranker
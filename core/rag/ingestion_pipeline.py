@@ -0,0 +1,457 @@
+"""
+Streaming ingestion pipeline for the RAG collections.
+
+Documents are pulled lazily from a generator, split into chunks and grouped
+into fixed-size batches. Embeddings for each batch are computed on a worker
+pool while earlier batches are bulk-upserted into Chroma, so the embedding
+model and the vector store stay busy at the same time.
+
+- Back-pressure: at most `max_pending_batches` batches are in flight; the
+  source generator is only advanced when a slot frees up, so memory stays
+  bounded regardless of corpus size.
+- Progress: IngestionStats is updated after every committed batch and logged.
+- Incremental: an IngestionManifest stores a content hash per document and
+  per chunk. Chunk ids are derived from the chunk hash, so an edit only
+  re-embeds the chunks that changed; unchanged documents are skipped (which
+  also makes an interrupted run resumable) and orphaned chunks are deleted.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import structlog
+from langchain_core.documents import Document
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+Metadata = Dict[str, Any]
+# upsert(ids=..., documents=..., metadatas=..., embeddings=...)
+UpsertFn = Callable[..., Any]
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def iter_source_files(root: Path, extensions: Sequence[str] = (".md", ".txt")) -> Iterator[Path]:
+    """Yield matching files under `root` in a stable (sorted) order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(tuple(extensions)):
+                yield Path(dirpath) / filename
+
+
+def iter_file_documents(
+    paths: Iterable[Path],
+    metadata: Optional[Metadata] = None,
+    doc_id: Optional[Callable[[Path], str]] = None,
+) -> Iterator[Document]:
+    """
+    Read files one at a time as Documents.
+
+    Args:
+        paths: Files to read (typically from iter_source_files)
+        metadata: Extra metadata added to every document
+        doc_id: Document id for a path (default: the path itself); chunk ids
+            are derived from it, so it must be stable across runs
+    """
+    for path in paths:
+        try:
+            content = Path(path).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning("ingestion_read_failed", path=str(path), error=str(e))
+            continue
+        yield Document(
+            id=doc_id(path) if doc_id else str(path),
+            page_content=content,
+            metadata={**(metadata or {}), "filename": Path(path).name, "source_path": str(path)},
+        )
+
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_ids(doc_key: str, chunk_hashes: Sequence[str]) -> List[str]:
+    """
+    Content-addressed chunk ids: '<doc_key>#<chunk_hash>'.
+
+    Unlike positional ids ('<file>_<i>'), inserting a line only changes the
+    ids of the chunks whose text changed. Repeated chunks get a '-n' suffix.
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for chunk_hash in chunk_hashes:
+        n = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = n + 1
+        ids.append(f"{doc_key}#{chunk_hash}" + (f"-{n}" if n else ""))
+    return ids
+
+
+class IngestionManifest:
+    """
+    JSON record of what is indexed: {doc_key: {"hash": ..., "chunks": [chunk_hash, ...]}}.
+
+    A document is written to the manifest only after all of its chunks have
+    been upserted, so an entry always describes rows present in the store.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self.documents = json.loads(self.path.read_text(encoding="utf-8"))["documents"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("ingestion_manifest_unreadable", path=str(self.path), error=str(e))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.documents.get(key)
+
+    def chunk_ids(self, key: str) -> List[str]:
+        entry = self.documents.get(key)
+        return chunk_ids(key, entry["chunks"]) if entry else []
+
+    def update(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        self.documents.update(entries)
+
+    def remove(self, key: str) -> None:
+        self.documents.pop(key, None)
+
+    def save(self) -> None:
+        """Write atomically so an interrupted run never leaves a corrupt file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"documents": self.documents}), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.documents = {}
+        if self.path.exists():
+            self.path.unlink()
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+@dataclass
+class IngestionStats:
+    """Progress counters and change report for one pipeline run."""
+
+    documents: int = 0  # new + changed
+    documents_new: int = 0
+    documents_changed: int = 0
+    documents_skipped: int = 0  # unchanged since the last run
+    documents_deleted: int = 0
+    chunks: int = 0  # embedded and upserted
+    chunks_reused: int = 0
+    chunks_deleted: int = 0
+    batches: int = 0
+    embed_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "documents_new": self.documents_new,
+            "documents_changed": self.documents_changed,
+            "documents_skipped": self.documents_skipped,
+            "documents_deleted": self.documents_deleted,
+            "chunks": self.chunks,
+            "chunks_reused": self.chunks_reused,
+            "chunks_deleted": self.chunks_deleted,
+            "batches": self.batches,
+            "embed_seconds": round(self.embed_seconds, 3),
+            "upsert_seconds": round(self.upsert_seconds, 3),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "chunks_per_second": round(self.chunks_per_second, 2),
+        }
+
+
+@dataclass
+class _Batch:
+    ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    metadatas: List[Metadata] = field(default_factory=list)
+    # Manifest entries of documents whose last new chunk is in this batch
+    # (or an earlier one), and their chunks that no longer exist
+    completes: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    stale_ids: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _document_key(doc: Document) -> str:
+    return doc.id or doc.metadata.get("source_path") or doc.metadata.get("url") or content_hash(doc.page_content)
+
+
+def _default_splitter() -> Any:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len)
+
+
+class IngestionPipeline:
+    """
+    Chunk -> batch -> embed (worker pool) -> bulk upsert, streaming.
+
+    Args:
+        upsert: Bulk write, called as upsert(ids=, documents=, metadatas=,
+            embeddings=); e.g. a chromadb Collection's `upsert`
+        delete: Bulk delete, called as delete(ids=); required to drop stale
+            chunks of changed/removed documents (e.g. Collection.delete)
+        embeddings: LangChain Embeddings used to embed each batch; None lets
+            the vector store embed on upsert (collection embedding function)
+        splitter: Object with `split_text(str) -> List[str]`
+            (default: RecursiveCharacterTextSplitter(1000, 200))
+        batch_size: Chunks per embedding call / upsert
+        max_workers: Concurrent embedding calls
+        max_pending_batches: Batches in flight before the source is paused
+            (default: 2 * max_workers)
+        manifest: Content hashes of what is already indexed; saved every
+            `manifest_every` batches
+        reembed_all: Embed every chunk even if unchanged (e.g. after
+            switching embedding model); stale chunks are still removed
+        on_progress: Called with IngestionStats after every committed batch
+    """
+
+    def __init__(
+        self,
+        upsert: UpsertFn,
+        delete: Optional[Callable[..., Any]] = None,
+        embeddings: Optional[Any] = None,
+        splitter: Optional[Any] = None,
+        batch_size: int = settings.RAG_INGEST_BATCH_SIZE,
+        max_workers: int = settings.RAG_INGEST_MAX_WORKERS,
+        max_pending_batches: Optional[int] = None,
+        manifest: Optional[IngestionManifest] = None,
+        manifest_every: int = 10,
+        reembed_all: bool = False,
+        on_progress: Optional[Callable[[IngestionStats], None]] = None,
+    ):
+        self.upsert = upsert
+        self.delete = delete
+        self.embeddings = embeddings
+        self.splitter = splitter or _default_splitter()
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.max_pending_batches = max(1, max_pending_batches or 2 * self.max_workers)
+        self.manifest = manifest
+        self.manifest_every = max(1, manifest_every)
+        self.reembed_all = reembed_all
+        self.on_progress = on_progress
+
+    def _iter_batches(
+        self, documents: Iterable[Document], stats: IngestionStats, seen: Set[str]
+    ) -> Iterator[_Batch]:
+        batch = _Batch()
+        for doc in documents:
+            key = _document_key(doc)
+            seen.add(key)
+            doc_hash = content_hash(doc.page_content)
+            previous = self.manifest.get(key) if self.manifest else None
+            if previous and previous["hash"] == doc_hash and not self.reembed_all:
+                stats.documents_skipped += 1
+                continue
+
+            texts = self.splitter.split_text(doc.page_content)
+            hashes = [content_hash(text) for text in texts]
+            ids = chunk_ids(key, hashes)
+            existing = set(self.manifest.chunk_ids(key)) if previous else set()
+
+            for i, (chunk_id, chunk_hash, text) in enumerate(zip(ids, hashes, texts)):
+                if chunk_id in existing and not self.reembed_all:
+                    stats.chunks_reused += 1
+                    continue
+                # Flush lazily so a document ending exactly at a batch boundary
+                # is recorded with that batch rather than the next one
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = _Batch()
+                batch.ids.append(chunk_id)
+                batch.texts.append(text)
+                batch.metadatas.append({**doc.metadata, "chunk_index": i, "chunk_hash": chunk_hash})
+
+            batch.completes[key] = {"hash": doc_hash, "chunks": hashes}
+            batch.stale_ids.extend(existing.difference(ids))
+
+            stats.documents += 1
+            if previous:
+                stats.documents_changed += 1
+                logger.info("ingestion_document_changed", key=key, chunks=len(ids))
+            else:
+                stats.documents_new += 1
+
+        if len(batch) or batch.completes:
+            yield batch
+
+    def _embed(self, batch: _Batch) -> Tuple[Optional[List[List[float]]], float]:
+        if self.embeddings is None or not batch.texts:
+            return None, 0.0
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(batch.texts)
+        return vectors, time.perf_counter() - start
+
+    def _delete(self, ids: List[str], stats: IngestionStats) -> None:
+        if not ids:
+            return
+        if self.delete is None:
+            logger.warning("ingestion_stale_chunks_kept", count=len(ids))
+            return
+        for start in range(0, len(ids), self.batch_size):
+            self.delete(ids=ids[start:start + self.batch_size])
+        stats.chunks_deleted += len(ids)
+
+    def _commit(self, batch: _Batch, future: "Future", stats: IngestionStats) -> None:
+        vectors, embed_seconds = future.result()
+        if len(batch):
+            start = time.perf_counter()
+            self.upsert(ids=batch.ids, documents=batch.texts, metadatas=batch.metadatas, embeddings=vectors)
+            stats.upsert_seconds += time.perf_counter() - start
+        # Stale chunks go only after their replacements are written
+        self._delete(batch.stale_ids, stats)
+
+        stats.embed_seconds += embed_seconds
+        stats.chunks += len(batch)
+        stats.batches += 1
+
+        if self.manifest:
+            self.manifest.update(batch.completes)
+            if stats.batches % self.manifest_every == 0:
+                self.manifest.save()
+
+        logger.info("ingestion_progress", **stats.to_dict())
+        if self.on_progress:
+            self.on_progress(stats)
+
+    def _prune(self, seen: Set[str], stats: IngestionStats) -> None:
+        """Delete documents that are in the manifest but no longer in the source."""
+        for key in [key for key in self.manifest.documents if key not in seen]:
+            self._delete(self.manifest.chunk_ids(key), stats)
+            if self.delete is not None:
+                self.manifest.remove(key)
+                stats.documents_deleted += 1
+                logger.info("ingestion_document_deleted", key=key)
+
+    def run(self, documents: Iterable[Document], prune_missing: bool = False) -> IngestionStats:
+        """
+        Ingest `documents` (consumed lazily) and return the run statistics.
+
+        Batches are upserted in submission order, so a document is only
+        recorded in the manifest once every batch holding its chunks has been
+        written.
+
+        Args:
+            prune_missing: `documents` is the complete source; delete manifest
+                documents that were not seen (only after a successful run)
+        """
+        stats = IngestionStats()
+        seen: Set[str] = set()
+        pending: deque = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest") as pool:
+            try:
+                for batch in self._iter_batches(documents, stats, seen):
+                    pending.append((batch, pool.submit(self._embed, batch)))
+                    # Back-pressure: wait for the oldest batch before reading more
+                    while len(pending) >= self.max_pending_batches:
+                        self._commit(*pending.popleft(), stats)
+                while pending:
+                    self._commit(*pending.popleft(), stats)
+                if prune_missing and self.manifest:
+                    self._prune(seen, stats)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+                if self.manifest:
+                    self.manifest.save()
+
+        logger.info("ingestion_complete", **stats.to_dict())
+        return stats
+
+
+# ============================================================================
+# CHROMA HELPERS
+# ============================================================================
+
+def open_chroma_collection(persist_directory: Path, collection_name: str) -> Any:
+    """
+    Open (or create) a collection compatible with langchain's Chroma wrapper.
+
+    No embedding function is attached: vectors are supplied by the pipeline,
+    the same way `Chroma(embedding_function=OllamaEmbeddings(...))` stores them.
+    """
+    from core.rag.store_registry import get_collection
+
+    return get_collection(collection_name, persist_directory)
+
+
+def default_manifest_path(persist_directory: Path, name: str) -> Path:
+    """Manifests live next to the Chroma directory: data/chromadb_manifests/<name>.json"""
+    persist_directory = Path(persist_directory)
+    return persist_directory.parent / f"{persist_directory.name}_manifests" / f"{name}.json"
+
+
+def ingest_into_chroma(
+    documents: Iterable[Document],
+    persist_directory: Path,
+    collection_name: str,
+    embeddings: Any,
+    splitter: Optional[Any] = None,
+    manifest_name: Optional[str] = None,
+    incremental: bool = True,
+    prune_missing: bool = False,
+    **pipeline_kwargs: Any,
+) -> IngestionStats:
+    """
+    Stream `documents` into a persistent Chroma collection.
+
+    Args:
+        manifest_name: One manifest per source feeding the collection
+            (default: the collection name); pruning only affects documents
+            recorded in this manifest
+        incremental: Only embed new/changed chunks; False re-embeds
+            everything (stale chunks are still deleted)
+        prune_missing: Delete documents no longer present in `documents`
+    """
+    manifest = IngestionManifest(default_manifest_path(persist_directory, manifest_name or collection_name))
+    collection = open_chroma_collection(persist_directory, collection_name)
+    if manifest.documents and collection.count() == 0:
+        # A wiped/recreated store invalidates the manifest
+        manifest.clear()
+
+    pipeline = IngestionPipeline(
+        collection.upsert,
+        delete=collection.delete,
+        embeddings=embeddings,
+        splitter=splitter,
+        manifest=manifest,
+        reembed_all=not incremental,
+        **pipeline_kwargs,
+    )
+    return pipeline.run(documents, prune_missing=prune_missing)
@@ -1,7 +1,20 @@
+import asyncio
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import structlog
 
+from config.settings import settings
+from core.rag.bm25_index import contains_identifier, iter_collection_pages
+from core.rag.hybrid_retrieval import get_reranker, reciprocal_rank_fusion
+from core.rag.retrieval_cache import get_retrieval_cache
+from core.rag.store_registry import (
+    get_bm25_index,
+    get_chroma_client,
+    get_collection,
+    get_default_embedding_function,
+    get_rag_executor,
+)
+
 logger = structlog.get_logger(__name__)
 
 try:
@@ -12,22 +25,138 @@ except ImportError:
     CHROMADB_AVAILABLE = False
     logger.warning("chromadb_not_found", message="ChromaDB not installed. Using MockRAGEngine.")
 
-class RealRAGEngine:
+class AsyncQueryMixin:
+    """
+    Async query API on top of a blocking `query`.
+
+    Store and embedding I/O runs on the shared bounded RAG executor, so the
+    event loop (WebSocket broadcasts, other agents) keeps running meanwhile.
+    """
+
+    async def aquery(self, query_text: str, n_results: int = 3) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_rag_executor(), self.query, query_text, n_results)
+
+    async def aquery_many(self, queries: List[str], n_results: int = 3) -> List[List[Dict[str, Any]]]:
+        """Resolve several lookups concurrently; results are in the order of `queries`."""
+        return list(await asyncio.gather(*[self.aquery(q, n_results) for q in queries]))
+
+
+class RealRAGEngine(AsyncQueryMixin):
     """
     Retrieval-Augmented Generation Engine for ARA Framework.
     Stores and retrieves technical documentation (Unity/Unreal) to prevent hallucinations.
+
+    Queries are hybrid: dense Chroma results and a BM25 index (kept in sync
+    on every write) are fused with reciprocal rank fusion, then optionally
+    reranked by a local cross-encoder (settings.RAG_RERANK_MODEL).
     """
     
     def __init__(self, persist_directory: str = "./data/chroma_db"):
-        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.client = get_chroma_client(persist_directory)
+        self.persist_directory = persist_directory
         self.collection_name = "game_engine_docs"
-        self.collection = self.client.get_or_create_collection(name=self.collection_name)
+        self.embedding_function = get_default_embedding_function()
+        self.collection = get_collection(
+            self.collection_name, persist_directory, default_embedding_function=True
+        )
+        self.cache_namespace = f"{persist_directory}:{self.collection_name}"
+        self.lexical_index = (
+            get_bm25_index(self.collection_name, persist_directory) if settings.RAG_HYBRID_ENABLED else None
+        )
+        self._lexical_checked = False
+
+    def _ensure_lexical_index(self):
+        """Backfill the BM25 index for collections ingested before it existed."""
+        if self._lexical_checked:
+            return
+        if self.lexical_index.count() == 0 and self.collection.count() > 0:
+            self.lexical_index.rebuild(iter_collection_pages(self.collection))
+        self._lexical_checked = True
+
+    def _invalidate_cache(self):
+        cache = get_retrieval_cache()
+        if cache:
+            cache.invalidate(self.cache_namespace)
 
     def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]):
         self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
+        if self.lexical_index:
+            self.lexical_index.upsert(ids, documents)
+        self._invalidate_cache()
+
+    def upsert_documents(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: Optional[List[List[float]]] = None,
+    ):
+        """Bulk insert-or-replace; used by the ingestion pipeline (idempotent on resume)."""
+        self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+        if self.lexical_index:
+            self.lexical_index.upsert(ids, documents)
+        self._invalidate_cache()
+
+    def delete_documents(self, ids: List[str]):
+        self.collection.delete(ids=ids)
+        if self.lexical_index:
+            self.lexical_index.delete(ids)
+        self._invalidate_cache()
 
     def query(self, query_text: str, n_results: int = 3) -> List[Dict[str, Any]]:
-        results = self.collection.query(query_texts=[query_text], n_results=n_results)
+        """Top-n chunks for a query, served from the retrieval cache when possible."""
+        embed = lambda text: self.embedding_function([text])[0]
+        search = lambda embedding, k: self._hybrid_search(query_text, embedding, k)
+
+        cache = get_retrieval_cache()
+        if cache is None:
+            return search(embed(query_text), n_results)
+        return cache.retrieve(
+            namespace=self.cache_namespace,
+            query=query_text,
+            k=n_results,
+            embed=embed,
+            search=search,
+            version=self.collection.count(),
+            embed_key="chroma_default",
+            # 'Rigidbody.AddForce' vs 'Rigidbody.AddTorque' embed almost identically
+            allow_semantic=not contains_identifier(query_text),
+        )
+
+    def _hybrid_search(self, query_text: str, embedding: List[float], n_results: int) -> List[Dict[str, Any]]:
+        if self.lexical_index is None:
+            return self._format_results(self.collection.query(query_embeddings=[embedding], n_results=n_results))
+
+        self._ensure_lexical_index()
+        candidates = max(n_results, settings.RAG_HYBRID_CANDIDATES)
+        dense = self._format_results(self.collection.query(query_embeddings=[embedding], n_results=candidates))
+        lexical_ids = [doc_id for doc_id, _ in self.lexical_index.search(query_text, candidates)]
+
+        fused = [doc_id for doc_id, _ in reciprocal_rank_fusion([[r["id"] for r in dense], lexical_ids])]
+        reranker = get_reranker()
+        pool = fused[:max(n_results, settings.RAG_RERANK_CANDIDATES) if reranker else n_results]
+
+        by_id = {r["id"]: r for r in dense}
+        missing = [doc_id for doc_id in pool if doc_id not in by_id]
+        if missing:
+            # Lexical-only hits: fetch their text/metadata from the collection
+            fetched = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            for i, doc_id in enumerate(fetched["ids"]):
+                by_id[doc_id] = {
+                    "content": fetched["documents"][i],
+                    "metadata": fetched["metadatas"][i] if fetched["metadatas"] else {},
+                    "id": doc_id,
+                }
+        results = [by_id[doc_id] for doc_id in pool if doc_id in by_id]
+
+        if reranker:
+            order = reranker.rerank(query_text, [r["content"] for r in results])
+            results = [results[i] for i in order]
+        return results[:n_results]
+
+    @staticmethod
+    def _format_results(results: Dict[str, Any]) -> List[Dict[str, Any]]:
         formatted_results = []
         if results['documents']:
             for i, doc in enumerate(results['documents'][0]):
@@ -41,7 +170,7 @@ class RealRAGEngine:
     def count_documents(self) -> int:
         return self.collection.count()
 
-class MockRAGEngine:
+class MockRAGEngine(AsyncQueryMixin):
     """
     Mock RAG Engine for environments where ChromaDB cannot be installed.
     Returns simulated results to keep the system functional.
@@ -52,6 +181,18 @@ class MockRAGEngine:
     def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]):
         logger.info("mock_add_documents", count=len(documents))
 
+    def upsert_documents(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: Optional[List[List[float]]] = None,
+    ):
+        logger.info("mock_upsert_documents", count=len(documents))
+
+    def delete_documents(self, ids: List[str]):
+        logger.info("mock_delete_documents", count=len(ids))
+
     def query(self, query_text: str, n_results: int = 3) -> List[Dict[str, Any]]:
         logger.info("mock_query", query=query_text)
         # Return simulated results based on query keywords
@@ -0,0 +1,310 @@
+"""
+Retrieval cache for RAG lookups (RAGEngine.query and the Chroma-backed tools).
+
+Agents tend to ask the knowledge base nearly the same question several times
+in one run ("How to implement X" per mechanic, retries inside a tool loop).
+RetrievalCache sits in front of the vector search and answers, in order:
+
+1. exact hit: same normalized query, collection and k -> no embedding call
+2. semantic hit: the query embedding (memoized) has cosine similarity
+   >= threshold with a cached query of the same collection -> no search
+3. miss: search with the already computed embedding and store the result
+
+Entries are evicted LRU and tagged with the collection's index version (its
+document count); writes through RealRAGEngine invalidate the collection
+explicitly, and a TTL bounds staleness after out-of-process re-indexing.
+
+Query embeddings are stored L2-normalized and stacked into one matrix per
+collection, so a semantic lookup is a single dot product, computed outside
+the cache lock.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+Vector = Sequence[float]
+
+
+@dataclass
+class _Entry:
+    namespace: str
+    query: str
+    k: int
+    version: Any
+    unit: Optional[np.ndarray]  # L2-normalized query embedding
+    results: List[Any]
+    created_at: float
+
+
+@dataclass
+class _NamespaceIndex:
+    """Unit vectors of one collection's entries, one row per entry."""
+    entries: List[_Entry]
+    matrix: np.ndarray
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _unit(vector: Vector) -> Optional[np.ndarray]:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm else None
+
+
+class RetrievalCache:
+    """
+    LRU cache of query embeddings and top-k results, per collection.
+
+    Args:
+        max_entries: Cached result sets (and, separately, query embeddings)
+        similarity_threshold: Minimum cosine similarity for a near-duplicate hit
+        ttl: Seconds before a cached result set expires (0 disables)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.RAG_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = settings.RAG_CACHE_SIMILARITY_THRESHOLD,
+        ttl: int = settings.RAG_CACHE_TTL,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self._results: "OrderedDict[Tuple[str, str, int], _Entry]" = OrderedDict()
+        self._vectors: "OrderedDict[Tuple[str, str], Vector]" = OrderedDict()
+        self._indexes: Dict[str, _NamespaceIndex] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self.embeddings_computed = 0
+
+    # ------------------------------------------------------------------
+    # Internals (call with the lock held)
+    # ------------------------------------------------------------------
+
+    def _fresh(self, entry: _Entry, version: Any, now: float) -> bool:
+        return entry.version == version and not (self.ttl and now - entry.created_at > self.ttl)
+
+    def _changed(self, namespace: str) -> None:
+        """Entries of `namespace` were added or removed: its matrix must be rebuilt."""
+        self._indexes.pop(namespace, None)
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def _remove(self, key: Tuple[str, str, int]) -> None:
+        del self._results[key]
+        self._changed(key[0])
+
+    def _find_exact(self, key: Tuple[str, str, int], version: Any, now: float) -> Optional[_Entry]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if not self._fresh(entry, version, now):
+            self._remove(key)
+            return None
+        self._results.move_to_end(key)
+        return entry
+
+    def _namespace_index(self, namespace: str) -> Optional[_NamespaceIndex]:
+        """Matrix of `namespace`'s entries; built outside the lock when missing."""
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is not None:
+                return index
+            generation = self._generations.get(namespace, 0)
+            entries = [e for e in self._results.values() if e.namespace == namespace and e.unit is not None]
+        if not entries:
+            return None
+
+        index = _NamespaceIndex(entries, np.stack([e.unit for e in entries]))
+        with self._lock:
+            if self._generations.get(namespace, 0) == generation:
+                self._indexes[namespace] = index
+        return index
+
+    def _find_similar(self, namespace: str, unit: np.ndarray, k: int, version: Any, now: float) -> Optional[_Entry]:
+        """Most similar fresh entry above the threshold (no lock held while scoring)."""
+        index = self._namespace_index(namespace)
+        if index is None or index.matrix.shape[1] != unit.shape[0]:
+            return None
+        scores = index.matrix @ unit
+        candidates = np.flatnonzero(scores >= self.similarity_threshold)
+        for i in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            entry = index.entries[i]
+            if entry.k >= k and self._fresh(entry, version, now):
+                return entry
+        return None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def embed(self, embed_key: str, query: str, embed: Callable[[str], Vector]) -> Vector:
+        """Return the memoized embedding of `query` for embedder `embed_key`."""
+        key = (embed_key, _normalize_query(query))
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+                return vector
+
+        vector = list(embed(query))
+        with self._lock:
+            self.embeddings_computed += 1
+            self._vectors[key] = vector
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def retrieve(
+        self,
+        namespace: str,
+        query: str,
+        k: int,
+        embed: Callable[[str], Vector],
+        search: Callable[[Vector, int], List[Any]],
+        version: Any = None,
+        embed_key: Optional[str] = None,
+        allow_semantic: bool = True,
+    ) -> List[Any]:
+        """
+        Top-k results for `query`, served from cache when possible.
+
+        Args:
+            namespace: Collection identity (e.g. "<path>:<collection>")
+            query: Natural language query
+            k: Number of results
+            embed: Query text -> embedding
+            search: (embedding, k) -> results, run only on a miss
+            version: Index version; entries with another version are stale
+            embed_key: Embedding model identity (default: namespace), so
+                collections sharing a model share query embeddings
+            allow_semantic: Permit near-duplicate hits; disable for queries
+                where one token changes the answer (e.g. exact API names)
+        """
+        key = (namespace, _normalize_query(query), k)
+        now = time.time()
+        with self._lock:
+            entry = self._find_exact(key, version, now)
+            if entry is not None:
+                self.hits["exact"] += 1
+                return list(entry.results)
+
+        vector = self.embed(embed_key or namespace, query, embed)
+        unit = _unit(vector)
+
+        entry = self._find_similar(namespace, unit, k, version, now) if allow_semantic and unit is not None else None
+        with self._lock:
+            if entry is not None:
+                self.hits["semantic"] += 1
+                cached_key = (entry.namespace, entry.query, entry.k)
+                if self._results.get(cached_key) is entry:
+                    self._results.move_to_end(cached_key)
+            else:
+                self.misses += 1
+        if entry is not None:
+            logger.debug("retrieval_cache_semantic_hit", query=query, cached_query=entry.query)
+            return list(entry.results[:k])
+
+        results = search(vector, k)
+
+        with self._lock:
+            if key in self._results:
+                self._remove(key)
+            self._results[key] = _Entry(namespace, key[1], k, version, unit, list(results), now)
+            self._changed(namespace)
+            while len(self._results) > self.max_entries:
+                evicted, _ = self._results.popitem(last=False)
+                self._changed(evicted[0])
+        return results
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drop cached results for one collection (or all of them)."""
+        with self._lock:
+            for key in [key for key in self._results if namespace is None or key[0] == namespace]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._vectors.clear()
+            self._indexes.clear()
+            self._generations.clear()
+            self.hits = {"exact": 0, "semantic": 0}
+            self.misses = 0
+            self.embeddings_computed = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits["exact"] + self.hits["semantic"] + self.misses
+            return {
+                "entries": len(self._results),
+                "embeddings_cached": len(self._vectors),
+                "exact_hits": self.hits["exact"],
+                "semantic_hits": self.hits["semantic"],
+                "misses": self.misses,
+                "embeddings_computed": self.embeddings_computed,
+                "hit_rate": (self.hits["exact"] + self.hits["semantic"]) / lookups if lookups else 0.0,
+            }
+
+
+_retrieval_cache: Optional[RetrievalCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> Optional[RetrievalCache]:
+    """
+    Process-wide retrieval cache.
+
+    Returns:
+        RetrievalCache, or None if settings.RAG_CACHE_ENABLED is False
+    """
+    global _retrieval_cache
+    if not settings.RAG_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _retrieval_cache is None:
+            _retrieval_cache = RetrievalCache()
+        return _retrieval_cache
+
+
+def cached_similarity_search(
+    vectorstore: Any,
+    collection_name: str,
+    persist_directory: Any,
+    query: str,
+    k: int,
+) -> List[Tuple[Any, float]]:
+    """
+    `vectorstore.similarity_search_with_score(query, k)` through the retrieval cache.
+
+    For the langchain Chroma wrappers returned by store_registry.get_vectorstore.
+    """
+    cache = get_retrieval_cache()
+    if cache is None:
+        return vectorstore.similarity_search_with_score(query, k=k)
+
+    from core.rag.store_registry import get_collection
+
+    embeddings = vectorstore.embeddings
+    return cache.retrieve(
+        namespace=f"{persist_directory}:{collection_name}",
+        query=query,
+        k=k,
+        embed=embeddings.embed_query,
+        search=lambda vector, n: vectorstore.similarity_search_by_vector_with_relevance_scores(vector, k=n),
+        version=get_collection(collection_name, persist_directory).count(),
+        embed_key=f"{type(embeddings).__name__}:{getattr(embeddings, 'model', '')}",
+    )
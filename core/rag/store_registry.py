@@ -0,0 +1,188 @@
+"""
+Process-wide registry of vector-store handles for the RAG tools.
+
+Opening a Chroma PersistentClient re-reads its SQLite catalog, and building an
+OllamaEmbeddings client sets up a new HTTP session. The RAG tools used to do
+both on every call; they now get long-lived handles from here instead:
+
+- get_chroma_client(path): one PersistentClient per persist directory
+- get_collection(name, path): raw chromadb collection (RealRAGEngine, ingestion)
+- get_embeddings(model): one embeddings client per (model, base_url)
+- get_vectorstore(name, path, model): langchain Chroma wrapper for the tools
+- get_bm25_index(name, path): lexical index stored next to the Chroma directory
+- get_rag_executor(): bounded thread pool that runs blocking store/embedding
+  work for async callers (RAGEngine.aquery)
+
+Handles are opened lazily on first use, creation is serialized by a lock so
+concurrent tool calls never open the same store twice, and
+close_vector_stores() releases everything (app shutdown, tests).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_CHROMADB_PATH = Path("data/chromadb")
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+
+_clients: Dict[str, Any] = {}
+_default_embedding_function: Any = None
+_collections: Dict[Tuple[str, str, bool], Any] = {}
+_embeddings: Dict[Tuple[str, str], Any] = {}
+_vectorstores: Dict[Tuple[str, str, str], Any] = {}
+_bm25_indexes: Dict[Tuple[str, str], Any] = {}
+_rag_executor: Optional[ThreadPoolExecutor] = None
+_registry_lock = threading.RLock()
+
+
+def _path_key(persist_directory: Any) -> str:
+    return str(Path(persist_directory).resolve())
+
+
+def get_chroma_client(persist_directory: Any = DEFAULT_CHROMADB_PATH) -> Any:
+    """Get the shared chromadb PersistentClient for a directory."""
+    key = _path_key(persist_directory)
+    with _registry_lock:
+        client = _clients.get(key)
+        if client is None:
+            import chromadb
+
+            client = chromadb.PersistentClient(path=str(persist_directory))
+            _clients[key] = client
+            logger.info("chroma_client_opened", path=key)
+        return client
+
+
+def get_default_embedding_function() -> Any:
+    """Chroma's built-in embedding function, shared by every collection that uses it."""
+    global _default_embedding_function
+    with _registry_lock:
+        if _default_embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+            _default_embedding_function = DefaultEmbeddingFunction()
+        return _default_embedding_function
+
+
+def get_collection(
+    collection_name: str,
+    persist_directory: Any = DEFAULT_CHROMADB_PATH,
+    default_embedding_function: bool = False,
+) -> Any:
+    """
+    Get (or create) a shared chromadb collection.
+
+    Args:
+        collection_name: Collection name
+        persist_directory: Chroma directory
+        default_embedding_function: Attach Chroma's built-in embedding
+            function so `query_texts` / un-embedded upserts work
+            (RealRAGEngine); False when vectors are supplied by the caller
+    """
+    key = (_path_key(persist_directory), collection_name, default_embedding_function)
+    with _registry_lock:
+        collection = _collections.get(key)
+        if collection is None:
+            client = get_chroma_client(persist_directory)
+            collection = client.get_or_create_collection(
+                name=collection_name,
+                embedding_function=get_default_embedding_function() if default_embedding_function else None,
+            )
+            _collections[key] = collection
+        return collection
+
+
+def get_embeddings(model: str = DEFAULT_EMBEDDING_MODEL, base_url: str = settings.OLLAMA_BASE_URL) -> Any:
+    """Get the shared Ollama embeddings client for a model."""
+    key = (model, base_url)
+    with _registry_lock:
+        embeddings = _embeddings.get(key)
+        if embeddings is None:
+            from langchain_community.embeddings import OllamaEmbeddings
+
+            embeddings = OllamaEmbeddings(model=model, base_url=base_url)
+            _embeddings[key] = embeddings
+        return embeddings
+
+
+def get_vectorstore(
+    collection_name: str,
+    persist_directory: Any = DEFAULT_CHROMADB_PATH,
+    embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+) -> Any:
+    """Get the shared langchain Chroma wrapper for a collection."""
+    key = (_path_key(persist_directory), collection_name, embedding_model)
+    with _registry_lock:
+        vectorstore = _vectorstores.get(key)
+        if vectorstore is None:
+            from langchain_community.vectorstores import Chroma
+
+            vectorstore = Chroma(
+                collection_name=collection_name,
+                embedding_function=get_embeddings(embedding_model),
+                client=get_chroma_client(persist_directory),
+            )
+            _vectorstores[key] = vectorstore
+            logger.info("vectorstore_opened", collection=collection_name, path=key[0])
+        return vectorstore
+
+
+def get_bm25_index(collection_name: str, persist_directory: Any = DEFAULT_CHROMADB_PATH) -> Any:
+    """Get the shared BM25 index of a collection: <persist_directory>_bm25/<collection>.sqlite"""
+    key = (_path_key(persist_directory), collection_name)
+    with _registry_lock:
+        index = _bm25_indexes.get(key)
+        if index is None:
+            from core.rag.bm25_index import BM25Index
+
+            directory = Path(persist_directory)
+            index = BM25Index(directory.parent / f"{directory.name}_bm25" / f"{collection_name}.sqlite")
+            _bm25_indexes[key] = index
+        return index
+
+
+def get_rag_executor() -> ThreadPoolExecutor:
+    """
+    Shared pool for blocking RAG work called from async code.
+
+    Bounded by settings.RAG_QUERY_MAX_WORKERS so a burst of lookups cannot
+    exhaust the event loop's default executor.
+    """
+    global _rag_executor
+    with _registry_lock:
+        if _rag_executor is None:
+            _rag_executor = ThreadPoolExecutor(
+                max_workers=settings.RAG_QUERY_MAX_WORKERS, thread_name_prefix="rag"
+            )
+        return _rag_executor
+
+
+def close_vector_stores() -> None:
+    """Close every registered client and forget all handles (reopened lazily)."""
+    global _default_embedding_function, _rag_executor
+    with _registry_lock:
+        if _rag_executor is not None:
+            _rag_executor.shutdown(wait=True, cancel_futures=True)
+            _rag_executor = None
+        for path, client in _clients.items():
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning("chroma_client_close_failed", path=path, error=str(e))
+        for index in _bm25_indexes.values():
+            index.close()
+        count = len(_clients)
+        _clients.clear()
+        _collections.clear()
+        _embeddings.clear()
+        _vectorstores.clear()
+        _bm25_indexes.clear()
+        _default_embedding_function = None
+    logger.info("vector_stores_closed", clients=count)
@@ -0,0 +1,178 @@
+"""
+Token-bucket rate limiting shared by every client of one provider.
+
+MCP adapters and tools used to keep their own sliding windows (a list of
+timestamps rebuilt on each call, slept on while holding a lock), so waiters
+were serialized and two adapters or workers for the same provider each
+spent the full quota. A RateLimiter is one bucket per provider name:
+
+- O(1) reservation: each acquire() refills the bucket from the elapsed time
+  and takes its token, going negative when the bucket is empty. The deficit
+  is the caller's wait, so waiters are served in arrival order (FIFO) and
+  sleep without holding any lock.
+- Distributed mode (settings.RATE_LIMIT_DISTRIBUTED): the same reservation
+  runs as a Redis Lua script on `ratelimit:<provider>` using the Redis clock,
+  so every process shares one quota. If Redis fails the local bucket is used.
+
+Usage:
+    limiter = get_rate_limiter("semantic_scholar", rate_per_minute=60, burst=1)
+    await limiter.acquire()
+"""
+
+import asyncio
+import math
+import time
+from typing import Dict, Optional
+
+import structlog
+from redis.asyncio import Redis
+
+from config.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+# KEYS[1] = bucket; ARGV = rate (tokens/s), capacity, tokens requested
+# Returns the wait in seconds as a string (Lua numbers are replied as integers)
+RESERVE_TOKENS_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - requested
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class TokenBucket:
+    """In-process token bucket; reserve() is O(1) and never blocks."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def available(self) -> float:
+        """Tokens in the bucket now (negative = reserved ahead), without taking any."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return self._tokens
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take `tokens` now and return the seconds to wait until they are covered."""
+        self._tokens = self.available() - tokens
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """Give back a reservation that will not be used (cancelled waiter)."""
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class RateLimiter:
+    """
+    Rate limit for one provider, optionally shared across processes.
+
+    Args:
+        name: Provider name (bucket key)
+        rate_per_minute: Sustained requests per minute
+        burst: Requests allowed back to back (default: rate_per_minute,
+            like a one-minute sliding window)
+        redis: Client for the distributed bucket (None = this process only)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_minute: float,
+        burst: Optional[float] = None,
+        redis: Optional[Redis] = None,
+    ):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(rate_per_minute, 1))
+        self.local = TokenBucket(self.rate, self.capacity)
+        self.redis = redis
+        self._script = redis.register_script(RESERVE_TOKENS_LUA) if redis is not None else None
+        self.logger = logger.bind(rate_limiter=name)
+
+    async def _reserve(self, tokens: float) -> float:
+        if self._script is not None:
+            try:
+                wait = await self._script(
+                    keys=[f"ratelimit:{self.name}"],
+                    args=[self.rate, self.capacity, tokens],
+                )
+                return float(wait)
+            except Exception as e:
+                self.logger.warning("distributed_rate_limit_unavailable", error=str(e))
+        return self.local.reserve(tokens)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Wait for `tokens` (FIFO with other waiters); returns the seconds waited."""
+        wait = await self._reserve(tokens)
+        if wait <= 0:
+            return 0.0
+        self.logger.debug("rate_limit_waiting", wait_seconds=round(wait, 3))
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            if self._script is None:
+                self.local.refund(tokens)
+            raise
+        return wait
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_shared_redis: Optional[Redis] = None
+
+
+def _distributed_client(redis: Optional[Redis]) -> Optional[Redis]:
+    global _shared_redis
+    if not settings.RATE_LIMIT_DISTRIBUTED:
+        return None
+    if redis is not None:
+        return redis
+    if _shared_redis is None:
+        _shared_redis = Redis.from_url(settings.REDIS_URL, **settings.redis_client_kwargs)
+    return _shared_redis
+
+
+def get_rate_limiter(
+    name: str,
+    rate_per_minute: float,
+    burst: Optional[float] = None,
+    redis: Optional[Redis] = None,
+) -> RateLimiter:
+    """
+    Shared limiter for provider `name`.
+
+    The first call for a name fixes its rate; every adapter or tool instance
+    for that provider then draws from the same bucket. `redis` is only used
+    when settings.RATE_LIMIT_DISTRIBUTED is on (default client: REDIS_URL).
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = _limiters[name] = RateLimiter(name, rate_per_minute, burst, _distributed_client(redis))
+    elif not math.isclose(limiter.rate * 60, rate_per_minute):
+        logger.warning(
+            "rate_limiter_rate_mismatch",
+            name=name,
+            configured_rpm=limiter.rate * 60,
+            requested_rpm=rate_per_minute,
+        )
+    return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Forget all limiters (tests)."""
+    _limiters.clear()
@@ -0,0 +1,276 @@
+"""
+Dependency-aware scheduling for the Game Design graph.
+
+Derives a DAG of agent nodes from their declared read/write sets so that
+independent agents can run as parallel LangGraph branches. Dependencies come
+from three sources:
+
+- AGENT_IO: the GameDesignState keys each node reads and writes
+- ContextManager.view_mappings: the state view each role is allowed to see
+- SYNERGY_REGISTRY["forward_dependencies"]: explicit cross-agent data flow
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+import structlog
+
+from core.agent_synergies import SYNERGY_REGISTRY
+
+logger = structlog.get_logger(__name__)
+
+# ============================================================================
+# DECLARED READ/WRITE SETS (GameDesignState keys)
+# ============================================================================
+
+AGENT_IO: Dict[str, Dict[str, List[str]]] = {
+    # Concept / pre-production (kept linear: gated by interrupts)
+    "director": {
+        "reads": ["concept"],
+        "writes": ["awaiting_input", "director_questions", "production_mode", "refined_concept"],
+    },
+    "market_analyst": {"reads": ["concept", "genre"], "writes": ["market_analysis"]},
+    "validator": {
+        "reads": ["concept", "market_analysis", "raw_data_cache"],
+        "writes": ["validation_warnings", "validation_passed", "validation_confidence"],
+    },
+    "mechanics_designer": {"reads": ["concept", "genre", "market_analysis"], "writes": ["mechanics"]},
+    "system_designer": {"reads": ["mechanics"], "writes": ["technical_stack"]},
+    "producer": {
+        "reads": ["concept", "mechanics", "technical_stack", "market_analysis"],
+        "writes": ["production_plan"],
+    },
+
+    # Sprint 10: Narrative & Technical Validation
+    "narrative_architect": {"reads": ["concept", "genre", "market_analysis"], "writes": ["narrative_structure"]},
+    "character_designer": {"reads": ["concept", "genre", "narrative_structure"], "writes": ["characters"]},
+    "world_builder": {"reads": ["concept", "genre", "narrative_structure"], "writes": ["world_lore"]},
+    "dialogue_system_designer": {"reads": ["concept", "genre", "characters"], "writes": ["dialogue_system"]},
+    "technical_feasibility_validator": {
+        "reads": ["mechanics", "technical_stack"],
+        "writes": ["technical_feasibility"],
+    },
+
+    # Sprint 11: UI/UX & Visual
+    "ui_ux_designer": {"reads": ["concept", "genre", "mechanics"], "writes": ["ui_ux_design"]},
+    "art_director": {"reads": ["concept", "genre", "narrative_structure"], "writes": ["art_direction"]},
+    "character_artist": {"reads": ["characters", "art_direction"], "writes": ["character_visuals"]},
+
+    # Sprint 12: Environment, Animation & Camera
+    "environment_artist": {"reads": ["world_lore", "art_direction"], "writes": ["environment_design"]},
+    "animation_director": {"reads": ["mechanics", "character_visuals"], "writes": ["animation_plan"]},
+    "camera_designer": {"reads": ["mechanics", "ui_ux_design"], "writes": ["camera_systems"]},
+
+    # Sprint 13: Audio & Physics
+    "audio_director": {
+        "reads": ["mechanics", "narrative_structure", "art_direction"],
+        "writes": ["audio_design"],
+    },
+    "physics_engineer": {
+        "reads": ["mechanics", "technical_stack", "world_lore"],
+        "writes": ["physics_spec"],
+    },
+
+    # Sprint 15: Level Design & Performance
+    "level_designer": {
+        "reads": ["mechanics", "narrative_structure", "world_lore"],
+        "writes": ["level_design"],
+    },
+    "performance_analyst": {"reads": ["technical_stack"], "writes": ["performance_spec"]},
+
+    # Sprint 14: Economy & Networking
+    "economy_balancer": {"reads": ["mechanics"], "writes": ["economy_spec"]},
+    "network_architect": {"reads": ["mechanics", "technical_stack"], "writes": ["networking_spec"]},
+
+    # Sprint 16: QA Planning
+    "qa_planner": {"reads": ["mechanics"], "writes": ["qa_plan"]},
+
+    # Final document: consumes every upstream artifact
+    "gdd_writer": {
+        "reads": [
+            "concept", "genre", "market_analysis", "mechanics", "technical_stack", "production_plan",
+            "narrative_structure", "characters", "world_lore", "dialogue_system", "technical_feasibility",
+            "ui_ux_design", "art_direction", "character_visuals", "environment_design", "animation_plan",
+            "camera_systems", "audio_design", "physics_spec", "level_design", "performance_spec",
+            "economy_spec", "networking_spec", "qa_plan",
+        ],
+        "writes": ["gdd_content"],
+    },
+}
+
+# Keys merged with an append reducer (operator.add on GameDesignState)
+APPEND_KEYS = ("messages", "errors", "reasoning_log", "tool_execution_log")
+
+
+# ============================================================================
+# DEPENDENCY RESOLUTION
+# ============================================================================
+
+def _normalize(name: str) -> str:
+    """'UIUXDesigner' and 'ui_ux_designer' both normalize to 'uiuxdesigner'."""
+    return name.replace("_", "").lower()
+
+
+def build_dependencies(
+    nodes: Iterable[str],
+    agent_io: Optional[Dict[str, Dict[str, List[str]]]] = None,
+    view_mappings: Optional[Dict[str, List[str]]] = None,
+    registry: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Set[str]]:
+    """
+    Compute the upstream dependencies of each node, restricted to `nodes`.
+
+    A node depends on another if it reads a key the other writes (via AGENT_IO
+    or its view mapping), or if the synergy registry declares a forward
+    dependency between them. Dependencies on nodes outside `nodes` are assumed
+    to be satisfied before the scheduled section starts.
+
+    Args:
+        nodes: Node names to schedule
+        agent_io: Read/write declarations (default: AGENT_IO)
+        view_mappings: Role -> ["core.x", "working.y"] (default: ContextManager's)
+        registry: Synergy registry (default: SYNERGY_REGISTRY)
+
+    Returns:
+        Dict mapping node name -> set of node names it must wait for
+    """
+    nodes = list(nodes)
+    agent_io = agent_io if agent_io is not None else AGENT_IO
+    registry = registry if registry is not None else SYNERGY_REGISTRY
+    if view_mappings is None:
+        from core.context_manager import ContextManager
+        view_mappings = ContextManager().view_mappings
+
+    writers: Dict[str, str] = {}
+    for node in nodes:
+        for key in agent_io.get(node, {}).get("writes", []):
+            writers[key] = node
+
+    deps: Dict[str, Set[str]] = {node: set() for node in nodes}
+
+    for node in nodes:
+        io = agent_io.get(node, {})
+        reads = set(io.get("reads", []))
+        # 'working.environment_design' -> 'environment_design'
+        reads.update(path.split(".")[-1] for path in view_mappings.get(node, []))
+        reads.difference_update(io.get("writes", []))
+
+        for key in reads:
+            writer = writers.get(key)
+            if writer and writer != node:
+                deps[node].add(writer)
+
+    by_normalized = {_normalize(node): node for node in nodes}
+    for edge in registry.get("forward_dependencies", []):
+        source = by_normalized.get(_normalize(edge["from"]))
+        target = by_normalized.get(_normalize(edge["to"]))
+        if source and target and source != target:
+            deps[target].add(source)
+
+    return deps
+
+
+def topological_layers(deps: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Group nodes into layers where every node only depends on earlier layers.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    remaining = {node: set(upstream) for node, upstream in deps.items()}
+    layers: List[List[str]] = []
+
+    while remaining:
+        ready = sorted(node for node, upstream in remaining.items() if not upstream)
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {sorted(remaining)}")
+        layers.append(ready)
+        for node in ready:
+            del remaining[node]
+        for upstream in remaining.values():
+            upstream.difference_update(ready)
+
+    return layers
+
+
+def transitive_reduction(deps: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+    """
+    Drop dependencies already implied by a longer path.
+
+    If C depends on A and B, and B already depends on A, C only needs to wait
+    for B. This keeps the number of join edges in the compiled graph minimal.
+    """
+    ancestors: Dict[str, Set[str]] = {}
+    for layer in topological_layers(deps):
+        for node in layer:
+            ancestors[node] = set(deps[node])
+            for upstream in deps[node]:
+                ancestors[node] |= ancestors[upstream]
+
+    reduced: Dict[str, Set[str]] = {}
+    for node, upstream in deps.items():
+        implied = set()
+        for dep in upstream:
+            implied |= ancestors[dep]
+        reduced[node] = upstream - implied
+    return reduced
+
+
+# ============================================================================
+# NODE ADAPTER
+# ============================================================================
+
+NodeFn = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def as_partial_update(node_fn: NodeFn, mode: str = "warn", name: Optional[str] = None) -> NodeFn:
+    """
+    Guard a node so it only emits what it changed.
+
+    Nodes should return partial updates, with only the new items for
+    APPEND_KEYS (GameDesignState merges those with an append reducer). A node
+    that still returns `{**state, ...}`, hands back a dict/list it was given,
+    or re-returns a whole APPEND_KEYS list is flagged: unchanged keys are
+    dropped and only newly appended items are kept, so the reducer does not
+    duplicate history and checkpoints do not re-serialize untouched values.
+
+    Args:
+        node_fn: Node coroutine function
+        mode: "warn" logs flagged keys, "strict" raises ValueError,
+            "off" trims silently
+        name: Node name used in logs (default: node_fn.__name__)
+    """
+    node_name = name or getattr(node_fn, "__name__", "node")
+
+    async def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        # Shallow snapshot: a node that mutates and returns `state` keeps its changes
+        before = dict(state)
+        output = await node_fn(state)
+        if not output:
+            return {}
+
+        update: Dict[str, Any] = {}
+        flagged: List[str] = []
+        for key, value in output.items():
+            previous = before.get(key)
+            if value is previous:
+                # Re-returned scalars are harmless; shared containers mean a state copy
+                if isinstance(value, (dict, list)):
+                    flagged.append(key)
+                continue
+            if key in APPEND_KEYS and isinstance(value, list) and previous:
+                offset = len(previous)
+                if value[:offset] == previous:
+                    flagged.append(key)
+                    value = value[offset:]
+                if not value:
+                    continue
+            update[key] = value
+
+        if flagged and mode != "off":
+            if mode == "strict":
+                raise ValueError(f"Node '{node_name}' returned unchanged state keys: {flagged}")
+            logger.warning("node_returned_unchanged_keys", node=node_name, keys=flagged)
+        return update
+
+    wrapper.__name__ = getattr(node_fn, "__name__", "node")
+    wrapper.__doc__ = node_fn.__doc__
+    return wrapper
@@ -0,0 +1,104 @@
+"""
+Single-flight request coalescing.
+
+The response caches in front of IGDB, SteamSpy, Semantic Scholar and the
+RAG engine only help once the first call has returned: identical lookups
+issued at the same moment by concurrent runs all go upstream. A SingleFlight
+group lets the first caller for a key (the leader) do the work while every
+concurrent caller with the same key waits for the same result or exception.
+Nothing is kept after the call finishes; caching stays with the callers.
+
+Keys follow MCPAdapter._make_cache_key: colon-joined parts starting with
+the provider ("steamspy:appdetails:570").
+
+Usage:
+    papers = await in_flight.run(key, lambda: fetch_papers(query))   # async
+    games = in_flight.call(key, lambda: igdb_search(query))          # threads
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def make_key(*parts: Any) -> str:
+    """Colon-joined key, like MCPAdapter._make_cache_key."""
+    return ":".join(str(part) for part in parts)
+
+
+class SingleFlight:
+    """
+    Group of in-flight calls keyed by request identity.
+
+    Callers receive the leader's result object itself (not a copy).
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `fn()` once for all concurrent callers with `key`.
+
+        The call runs in its own task, so a cancelled caller does not cancel
+        it for the others.
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(loop_key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[loop_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(loop_key, None))
+        else:
+            self.coalesced += 1
+            logger.debug("request_coalesced", key=key)
+        return await asyncio.shield(task)
+
+    def call(self, key: str, fn: Callable[[], T]) -> T:
+        """Thread-safe variant for blocking clients: one `fn()` per key at a time."""
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            logger.debug("request_coalesced", key=key)
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._tasks) + len(self._futures),
+        }
+
+
+# Shared by MCP adapters and tools
+in_flight = SingleFlight()
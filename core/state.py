@@ -1,5 +1,6 @@
-from typing import TypedDict, List, Dict, Any, Optional
+from typing import TypedDict, List, Dict, Any, Optional, Annotated
 from langchain_core.messages import BaseMessage
+import operator
 
 class MarketReport(TypedDict):
     target_audience: str
@@ -54,6 +55,9 @@ class GameDesignState(TypedDict):
     """
     Shared state for the Game Design Automation graph.
     Replaces the old ResearchState.
+
+    Nodes return partial updates: only the keys they change, and only the new
+    items for the list keys declared with an append reducer below.
     """
     # Input
     concept: str
@@ -69,9 +73,9 @@ class GameDesignState(TypedDict):
     gdd_content: Dict[str, str]  # Sections of the GDD
     
     # Conversation & Meta
-    messages: List[BaseMessage]
+    messages: Annotated[List[BaseMessage], operator.add]
     current_step: str
-    errors: List[str]
+    errors: Annotated[List[str], operator.add]
     
     # Director / Interactive State
     awaiting_input: bool
@@ -80,8 +84,8 @@ class GameDesignState(TypedDict):
     refined_concept: Optional[str]
     
     # Transparency & Reasoning (Sprint 7)
-    reasoning_log: List[AgentReasoning]
-    tool_execution_log: List[ToolCall]
+    reasoning_log: Annotated[List[AgentReasoning], operator.add]
+    tool_execution_log: Annotated[List[ToolCall], operator.add]
     
     # Validation & Data Inspector (Sprint 9)
     enable_validation: bool  # User toggle for optional Validator
@@ -126,3 +130,10 @@ class GameDesignState(TypedDict):
     
     # QA Planning (Sprint 16)
     qa_plan: Optional[Dict[str, Any]]  # From QAPlanner
+
+
+class ParallelGameDesignState(GameDesignState):
+    """
+    Schema of the "parallel" scheduling mode. The append reducers its
+    branches need now live on GameDesignState; kept as an alias for imports.
+    """
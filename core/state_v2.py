@@ -1,4 +1,4 @@
-from typing import TypedDict, List, Dict, Any, Optional, Annotated
+from typing import TypedDict, List, Dict, Any, Optional, Annotated, Callable, get_type_hints
 from langchain_core.messages import BaseMessage
 import operator
 
@@ -106,9 +106,45 @@ class WorkingState(TypedDict):
     qa_plan: Optional[Dict[str, Any]]
     
     # Validation
-    validation_warnings: List[Dict[str, Any]]
+    validation_warnings: Annotated[List[Dict[str, Any]], operator.add]  # Every validator appends
     technical_feasibility: Optional[Dict[str, Any]]
 
+
+def merge_fields(schema: type) -> Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], Dict[str, Any]]:
+    """
+    Build the reducer for a sub-state channel (SpiralState.core / .working).
+
+    An update such as {"working": {"validation_warnings": [...]}} is merged key
+    by key into the current sub-state instead of replacing it. Fields
+    annotated with a reducer on `schema` (e.g. validation_warnings) use it;
+    the others are replaced. The result is a new dict that shares every
+    untouched artifact with the previous snapshot: neither side is mutated or
+    copied deeply, and a value handed back unchanged is skipped.
+    """
+    hints = get_type_hints(schema, include_extras=True)
+    field_reducers = {
+        key: hint.__metadata__[0]
+        for key, hint in hints.items()
+        if getattr(hint, "__metadata__", None) and callable(hint.__metadata__[0])
+    }
+
+    def reducer(current: Optional[Dict[str, Any]], update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not update:
+            return current if current is not None else {}
+        merged = dict(current or {})
+        for key, value in update.items():
+            previous = merged.get(key)
+            if value is previous:
+                continue
+            field_reducer = field_reducers.get(key)
+            if field_reducer is not None and previous is not None and value is not None:
+                value = field_reducer(previous, value)
+            merged[key] = value
+        return merged
+
+    reducer.__name__ = f"merge_{schema.__name__}"
+    return reducer
+
 class DecisionOption(TypedDict):
     id: str
     label: str
@@ -129,9 +165,9 @@ class SpiralState(TypedDict):
     The top-level state that wraps Core and Working states.
     Manages the iteration loop.
     """
-    # Sub-States
-    core: CoreState
-    working: WorkingState
+    # Sub-States (updates merge key by key, see merge_fields)
+    core: Annotated[CoreState, merge_fields(CoreState)]
+    working: Annotated[WorkingState, merge_fields(WorkingState)]
     
     # Meta-State
     messages: Annotated[List[BaseMessage], operator.add]
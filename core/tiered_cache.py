@@ -0,0 +1,195 @@
+"""
+In-process tier and serialization for the MCP adapter cache.
+
+MCPAdapter._get_cached/_set_cached went to Redis on every lookup and wrote
+values with json.dumps(default=str), which silently turned any object JSON
+cannot represent into its str(). The adapter cache now has two tiers:
+
+- L1: a MemoryCache per adapter name in this process. It is an LRU of
+  serialized entries, bounded by entry count and total bytes
+  (settings.MCP_CACHE_L1_*), so hot keys (the same paper, the same page)
+  skip the network hop.
+- L2: Redis, as before, shared by every process.
+
+An L1 entry is fresh for settings.MCP_CACHE_L1_FRESH_SECONDS. After that it
+is served stale until its Redis TTL runs out, while a single background read
+re-syncs it from Redis (stale-while-revalidate). Deletions and rewrites made
+by other processes therefore show up without blocking callers.
+
+Values are serialized with orjson when it is installed (stdlib json
+otherwise). The output is still JSON text, so entries written before this
+change, and clients with decode_responses=True, keep working. Types JSON
+cannot represent raise TypeError instead of being stringified.
+"""
+
+import dataclasses
+import fnmatch
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Union
+
+import structlog
+
+from config.settings import settings
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+
+def _default(value: Any) -> Any:
+    """Types beyond JSON that both backends encode the same way."""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Type is not cacheable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a cache value (JSON text as UTF-8 bytes)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass
+class CacheEntry:
+    data: bytes
+    fresh_until: float  # time.monotonic(); then served stale and revalidated
+    expires_at: float  # time.monotonic(); matches the Redis TTL
+
+
+class MemoryCache:
+    """
+    Size-bounded LRU of serialized entries, with hit-rate stats.
+
+    Args:
+        name: Adapter name (for logs and stats)
+        max_entries: Maximum number of entries
+        max_bytes: Maximum total size of the serialized values
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = settings.MCP_CACHE_L1_MAX_ENTRIES,
+        max_bytes: int = settings.MCP_CACHE_L1_MAX_BYTES,
+    ):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "l1_hits": 0,
+            "stale_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Entry for `key` if it has not expired (fresh or stale)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry.expires_at:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, data: bytes, ttl: float, fresh_for: float) -> None:
+        now = time.monotonic()
+        if len(data) > self.max_bytes:
+            self.delete(key)
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CacheEntry(data, now + min(fresh_for, ttl), now + ttl)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def delete_matching(self, pattern: str) -> int:
+        """Drop keys matching a Redis-style glob pattern."""
+        with self._lock:
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.data)
+
+    def record(self, outcome: str) -> None:
+        self.stats[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = sum(self.stats[k] for k in ("l1_hits", "stale_hits", "l2_hits", "misses"))
+        l1 = self.stats["l1_hits"] + self.stats["stale_hits"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "l1_hit_rate": round(l1 / lookups, 4) if lookups else 0.0,
+            "hit_rate": round((l1 + self.stats["l2_hits"]) / lookups, 4) if lookups else 0.0,
+        }
+
+
+_memory_caches: Dict[str, MemoryCache] = {}
+
+
+def get_memory_cache(name: str) -> MemoryCache:
+    """L1 tier shared by every adapter instance named `name`."""
+    cache = _memory_caches.get(name)
+    if cache is None:
+        cache = _memory_caches[name] = MemoryCache(name)
+    return cache
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit-rate stats per adapter."""
+    return {name: cache.get_stats() for name, cache in _memory_caches.items()}
+
+
+def reset_memory_caches() -> None:
+    """Forget all L1 tiers (tests)."""
+    _memory_caches.clear()
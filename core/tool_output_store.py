@@ -0,0 +1,205 @@
+"""
+Spill-to-store compaction of large tool outputs for safe_agent_invoke.
+
+A ToolMessage stays in the agent's conversation for every later iteration,
+so one large IGDB response or RAG report is paid for again on each LLM call.
+Outputs above settings.TOOL_OUTPUT_MAX_TOKENS are written to a local,
+content-addressed blob store and replaced by a small structured summary that
+names their reference (ToolCall.raw_data_ref). The agent can pull details on
+demand with the fetch_tool_output tool (tools/tool_output_tool.py).
+
+Blobs only need to outlive the agent runs that reference them: files not
+written or re-stored for settings.TOOL_OUTPUT_TTL_SECONDS are deleted by a
+prune that put() runs at most every settings.TOOL_OUTPUT_PRUNE_INTERVAL_SECONDS.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import structlog
+
+from config.settings import settings
+from core.context_manager import count_tokens, truncate_to_tokens
+
+logger = structlog.get_logger(__name__)
+
+REF_PREFIX = "out_"
+
+
+class ToolOutputStore:
+    """Content-addressed blobs on disk: identical outputs share one file."""
+
+    def __init__(
+        self,
+        root: str = settings.TOOL_OUTPUT_STORE_PATH,
+        ttl_seconds: float = settings.TOOL_OUTPUT_TTL_SECONDS,
+        prune_interval: float = settings.TOOL_OUTPUT_PRUNE_INTERVAL_SECONDS,
+    ):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+    def _path(self, ref: str) -> Path:
+        digest = ref[len(REF_PREFIX):]
+        if not ref.startswith(REF_PREFIX) or not digest.isalnum():
+            raise ValueError(f"Invalid tool output reference: {ref}")
+        return self.root / digest[:2] / f"{digest}.txt"
+
+    def put(self, text: str) -> str:
+        """Store `text` and return its reference."""
+        ref = REF_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        path = self._path(ref)
+        if path.exists():
+            # Storing it again restarts its TTL
+            os.utime(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Unique temp name: concurrent calls with the same output must not share it
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False
+            ) as tmp:
+                tmp.write(text)
+            try:
+                os.replace(tmp.name, path)
+            except OSError:
+                os.unlink(tmp.name)
+                raise
+        self._maybe_prune()
+        return ref
+
+    def prune(self) -> int:
+        """Delete blobs (and leftover temp files) older than ttl_seconds; returns how many."""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for path in self.root.glob("*/*"):
+            try:
+                if path.suffix in (".txt", ".tmp") and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info("tool_outputs_pruned", removed=removed)
+        return removed
+
+    def _maybe_prune(self) -> None:
+        if not self.ttl_seconds:
+            return
+        with self._prune_lock:
+            now = time.monotonic()
+            if now < self._next_prune:
+                return
+            self._next_prune = now + self.prune_interval
+        try:
+            self.prune()
+        except OSError as e:
+            logger.warning("tool_output_prune_failed", error=str(e))
+
+    def get(self, ref: str) -> Optional[str]:
+        """Stored text, or None if the reference is unknown."""
+        try:
+            return self._path(ref).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    async def aput(self, text: str) -> str:
+        return await asyncio.to_thread(self.put, text)
+
+    async def aget(self, ref: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, ref)
+
+
+_store: Optional[ToolOutputStore] = None
+
+
+def get_tool_output_store() -> ToolOutputStore:
+    global _store
+    if _store is None:
+        _store = ToolOutputStore()
+    return _store
+
+
+# ============================================================================
+# COMPACTION
+# ============================================================================
+
+def serialize_tool_result(result: Any) -> str:
+    """Text form of a tool result; dicts and lists become JSON so they can be navigated later."""
+    if isinstance(result, str):
+        return result
+    if isinstance(result, (dict, list, tuple)):
+        try:
+            return json.dumps(result, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            pass
+    return str(result)
+
+
+def _outline(value: Any, depth: int = 0) -> Any:
+    """Shape of a JSON value: keys, list lengths and short scalar previews."""
+    if isinstance(value, dict):
+        if depth >= 2:
+            return f"<object: {len(value)} keys>"
+        return {key: _outline(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, list):
+        if not value:
+            return []
+        if depth >= 2:
+            return f"<list: {len(value)} items>"
+        outline = [_outline(value[0], depth + 1)]
+        if len(value) > 1:
+            outline.append(f"<... {len(value) - 1} more items>")
+        return outline
+    if isinstance(value, str) and len(value) > 80:
+        return value[:77] + "..."
+    return value
+
+
+def summarize_tool_output(text: str, max_tokens: int = settings.TOOL_OUTPUT_SUMMARY_TOKENS) -> str:
+    """Structured outline for JSON outputs, leading text otherwise."""
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        parsed = None
+    if isinstance(parsed, (dict, list)):
+        summary = json.dumps(_outline(parsed), ensure_ascii=False, default=str)
+    else:
+        summary = text
+    return truncate_to_tokens(summary, max_tokens)
+
+
+async def compact_tool_result(result: Any, store: Optional[ToolOutputStore] = None) -> Tuple[str, Optional[str]]:
+    """
+    Conversation content for a tool result.
+
+    Returns:
+        (content, raw_data_ref): the full text and None if it is small enough,
+        otherwise a summary naming the reference of the stored full output
+    """
+    text = serialize_tool_result(result)
+    tokens = count_tokens(text)
+    if not settings.TOOL_OUTPUT_COMPACTION_ENABLED or tokens <= settings.TOOL_OUTPUT_MAX_TOKENS:
+        return text, None
+
+    store = store or get_tool_output_store()
+    try:
+        ref = await store.aput(text)
+    except OSError as e:
+        logger.warning("tool_output_spill_failed", error=str(e))
+        return truncate_to_tokens(text, settings.TOOL_OUTPUT_MAX_TOKENS), None
+
+    logger.info("tool_output_compacted", ref=ref, tokens=tokens)
+    header = (
+        f"[Large tool output ({tokens} tokens) stored as ref {ref}. Summary below; "
+        f"call fetch_tool_output(ref=\"{ref}\", path=..., offset=...) for details.]"
+    )
+    return f"{header}\n{summarize_tool_output(text)}", ref
@@ -0,0 +1,318 @@
+"""
+Token and cost accounting from LLM responses.
+
+UsageTracker is a LangChain callback handler attached to every model built by
+core.model_factory.create_model. For each chat model response it reads the
+usage metadata (prompt, completion and cached prompt tokens), prices it with
+MODEL_PRICING and attributes it to:
+
+- the active agent: the innermost usage_scope() (safe_agent_invoke opens one
+  per agent run), else the LangGraph node that made the call
+- the job: the LangGraph thread_id, which is the job id (core/job_executor.py)
+
+Each usage record is fed to MetricsCollector (per-agent totals and cost
+hot-spots), LangGraphMonitor (tokens/cost of the running node) and, for
+models billed in Copilot credits, BudgetManager.record_usage.
+
+Calls made inside UsageTracker.prepaid_call() (safe_agent_invoke wraps each
+LLM call in one) reserve their credits atomically before the request
+(BudgetManager.reserve_credits), so concurrent agents cannot overspend; the
+response then consumes the reservation instead of being charged again, and
+an unused reservation (failed call, or a fallback model answered) is released.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+import structlog
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from core.metrics import metrics_collector
+
+logger = structlog.get_logger(__name__)
+
+
+# USD per 1M tokens: (prompt, completion, cached prompt). List prices; GitHub
+# Models calls are reported at their OpenAI equivalent. Local models are free.
+MODEL_PRICING: Dict[str, Tuple[float, float, float]] = {
+    "gpt-5": (1.25, 10.00, 0.125),
+    "gpt-4o-mini": (0.15, 0.60, 0.075),
+    "gpt-4o": (2.50, 10.00, 1.25),
+    "claude-sonnet-4.5": (3.00, 15.00, 0.30),
+    "claude-sonnet-4-5": (3.00, 15.00, 0.30),
+    "claude-haiku-4.5": (1.00, 5.00, 0.10),
+    "claude-haiku-4-5": (1.00, 5.00, 0.10),
+    "claude-3-5-sonnet": (3.00, 15.00, 0.30),
+    "claude-3-5-haiku": (0.80, 4.00, 0.08),
+    "gemini-2.5-pro": (1.25, 10.00, 0.31),
+    "deepseek-chat": (0.27, 1.10, 0.07),
+    "deepseek-v3": (0.27, 1.10, 0.07),
+    "llama-3.1-8b-instant": (0.05, 0.08, 0.05),
+    "llama-3.3-70b-versatile": (0.59, 0.79, 0.59),
+}
+
+
+def _normalize_model(model: Optional[str]) -> str:
+    """'openai/gpt-4o' -> 'gpt-4o'."""
+    return (model or "").split("/")[-1].lower()
+
+
+def match_model(model: Optional[str], known: Iterable[str]) -> Optional[str]:
+    """Longest known name prefixing `model` ('gpt-4o-2024-08-06' -> 'gpt-4o', not 'gpt-4')."""
+    name = _normalize_model(model)
+    matches = [key for key in known if name.startswith(key)]
+    return max(matches, key=len) if matches else None
+
+
+def get_pricing(model: Optional[str]) -> Optional[Tuple[float, float, float]]:
+    key = match_model(model, MODEL_PRICING)
+    return MODEL_PRICING[key] if key else None
+
+
+def compute_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """USD cost of one call; cached prompt tokens are billed at the cached rate."""
+    pricing = get_pricing(model)
+    if pricing is None:
+        return 0.0
+    prompt_rate, completion_rate, cached_rate = pricing
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    return (
+        (prompt_tokens - cached_tokens) * prompt_rate
+        + cached_tokens * cached_rate
+        + completion_tokens * completion_rate
+    ) / 1_000_000
+
+
+@dataclass
+class UsageTotals:
+    """Tokens and cost accumulated inside one usage_scope()."""
+    agent: Optional[str] = None
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+    # Credit reservations not yet consumed by a response, per MODEL_COSTS name
+    prepaid: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int, cost_usd: float) -> None:
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        self.cost_usd += cost_usd
+
+
+_scopes: ContextVar[Tuple[UsageTotals, ...]] = ContextVar("usage_scopes", default=())
+
+
+@contextmanager
+def usage_scope(agent: Optional[str] = None) -> Iterator[UsageTotals]:
+    """
+    Attribute LLM calls made inside the block to `agent` and total them.
+
+    Scopes nest (every enclosing scope is credited) and follow asyncio tasks
+    created inside the block.
+    """
+    totals = UsageTotals(agent=agent)
+    token = _scopes.set(_scopes.get() + (totals,))
+    try:
+        yield totals
+    finally:
+        _scopes.reset(token)
+
+
+def _extract_usage(response: LLMResult) -> Tuple[int, int, int]:
+    """(prompt, completion, cached prompt) tokens from message usage_metadata or llm_output."""
+    prompt = completion = cached = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(generation.message, "usage_metadata", None) if isinstance(generation, ChatGeneration) else None
+            if usage:
+                found = True
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                cached += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    if found:
+        return prompt, completion, cached
+
+    token_usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage") or {}
+    prompt = token_usage.get("prompt_tokens", token_usage.get("input_tokens", 0)) or 0
+    completion = token_usage.get("completion_tokens", token_usage.get("output_tokens", 0)) or 0
+    cached = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0
+    return prompt, completion, cached
+
+
+class InsufficientCreditsError(RuntimeError):
+    """The budget cannot cover a call to `model` (reserve_credits returned False)."""
+
+    def __init__(self, model: str):
+        super().__init__(f"Insufficient Copilot credits for {model}")
+        self.model = model
+
+
+def model_name_of(llm: Any) -> Optional[str]:
+    """Model name of a chat model (the primary one for a model with fallbacks)."""
+    llm = getattr(llm, "runnable", llm)
+    name = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    return name if isinstance(name, str) else None
+
+
+class UsageTracker(BaseCallbackHandler):
+    """Callback handler turning LLM responses into usage records (see module docstring)."""
+
+    # Run in the caller's task so usage_scope() context variables are visible
+    run_inline = True
+
+    def __init__(self, budget_manager: Any = None):
+        self.budget_manager = budget_manager
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._pending: Set[asyncio.Task] = set()
+
+    def billed_model(self, llm: Any) -> Optional[str]:
+        """MODEL_COSTS name of `llm` if its calls cost Copilot credits (and a budget is attached)."""
+        if self.budget_manager is None:
+            return None
+        model = match_model(model_name_of(llm), self.budget_manager.models)
+        if model is None or self.budget_manager.models[model].credits_per_request <= 0:
+            return None
+        return model
+
+    @asynccontextmanager
+    async def prepaid_call(self, llm: Any, agent: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Reserve the credits of one call to `llm` before making it.
+
+        Raises:
+            InsufficientCreditsError: If the budget cannot cover the call
+        """
+        budget_manager = self.budget_manager
+        model = self.billed_model(llm)
+        if model is None:
+            yield
+            return
+
+        metadata = {"agent_name": agent}
+        if not await budget_manager.reserve_credits(model, metadata=metadata):
+            raise InsufficientCreditsError(model)
+        with usage_scope(agent) as totals:
+            totals.prepaid[model] = 1
+            try:
+                yield
+            finally:
+                if totals.prepaid.get(model):
+                    await budget_manager.release_credits(model, metadata=metadata)
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        scopes = _scopes.get()
+        self._runs[run_id] = {
+            "agent": (scopes[-1].agent if scopes else None) or metadata.get("langgraph_node") or "unknown",
+            "node": metadata.get("langgraph_node"),
+            "job_id": metadata.get("thread_id"),
+            "model": params.get("model") or params.get("model_name") or metadata.get("ls_model_name"),
+            "scopes": scopes,
+        }
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model = (response.llm_output or {}).get("model_name") or run["model"]
+        prompt, completion, cached = _extract_usage(response)
+        cost = compute_cost(model, prompt, completion, cached)
+        for totals in run["scopes"]:
+            totals.add(prompt, completion, cached, cost)
+        self.record(
+            run["agent"], model, prompt, completion, cached, cost,
+            job_id=run["job_id"], node=run["node"], scopes=run["scopes"],
+        )
+
+    def record(
+        self,
+        agent: str,
+        model: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        cost_usd: float,
+        job_id: Optional[str] = None,
+        node: Optional[str] = None,
+        scopes: Tuple[UsageTotals, ...] = (),
+    ) -> None:
+        """Feed one call's usage to the metrics collector, graph monitor and budget manager."""
+        metrics_collector.record_llm_usage(agent, prompt_tokens, completion_tokens, cached_tokens, cost_usd)
+
+        if job_id and node:
+            from core.langgraph_monitoring import get_monitor
+            get_monitor().add_node_usage(job_id, node, prompt_tokens + completion_tokens, cost_usd)
+
+        logger.debug(
+            "llm_usage_recorded",
+            agent=agent,
+            job_id=job_id,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            cost_usd=round(cost_usd, 6),
+        )
+        self._record_credits(model, agent, job_id, scopes)
+
+    def _record_credits(
+        self,
+        model: Optional[str],
+        agent: str,
+        job_id: Optional[str],
+        scopes: Tuple[UsageTotals, ...] = (),
+    ) -> None:
+        """Charge Copilot credits for models in MODEL_COSTS (fire and forget) unless prepaid."""
+        if self.budget_manager is None:
+            return
+        model = match_model(model, self.budget_manager.models)
+        if model is None:
+            return
+        for totals in reversed(scopes):
+            if totals.prepaid.get(model):
+                totals.prepaid[model] -= 1
+                return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug("budget_usage_skipped", reason="no running event loop", model=model)
+            return
+        task = loop.create_task(
+            self.budget_manager.record_usage(model, metadata={"agent_name": agent, "job_id": job_id})
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._on_budget_recorded)
+
+    def _on_budget_recorded(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("budget_usage_record_failed", error=str(task.exception()))
+
+
+usage_tracker = UsageTracker()
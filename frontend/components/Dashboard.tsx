@@ -131,9 +131,10 @@ export function Dashboard() {
       if (!response.ok) {
         throw new Error('Failed to start generation');
       }
+      const { job_id: jobId } = await response.json();
 
-      // Connect to WebSocket for updates
-      const ws = new WebSocket('ws://127.0.0.1:9090/ws');
+      // Connect to WebSocket for this job's updates
+      const ws = new WebSocket(`ws://127.0.0.1:9090/ws?job_id=${encodeURIComponent(jobId)}`);
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -199,7 +200,7 @@ export function Dashboard() {
             }
             return a;
           }));
-          addLog('agent_update', `Agent Update: ${data.agent}`, data.data);
+          addLog('agent_update', `Agent Update: ${data.agent}`, data.encoding === 'delta' ? data.patch : data.state);
         } else if (data.type === 'gdd_update') {
           setMarkdown(data.markdown as string);
         } else if (data.type === 'status') {
@@ -1,8 +1,10 @@
 import structlog
-from typing import Literal
+from typing import Any, Literal, Optional
 from langgraph.graph import StateGraph, END, START
 
-from core.state import GameDesignState
+from config.settings import settings
+from core.state import GameDesignState, ParallelGameDesignState
+from core.scheduling import as_partial_update, build_dependencies, transitive_reduction
 from agents.game_design.director import director_node
 from agents.game_design.market_analyst import market_analyst_node
 from agents.game_design.validator import validator_node
@@ -45,56 +47,142 @@ from agents.game_design.qa_planner import qa_planner_node
 
 logger = structlog.get_logger(__name__)
 
-def create_game_design_graph():
+# Production agents in their sequential order (after Producer, before GDDWriter)
+PRODUCTION_SEQUENCE = [
+    # Sprint 10: Narrative & Technical Validation
+    "narrative_architect",
+    "character_designer",
+    "world_builder",
+    "dialogue_system_designer",
+    "technical_feasibility_validator",
+    # Sprint 11: UI/UX & Visual
+    "ui_ux_designer",
+    "art_director",
+    "character_artist",
+    # Sprint 12: Environment/Animation/Camera
+    "environment_artist",
+    "animation_director",
+    "camera_designer",
+    # Sprint 13: Audio & Physics
+    "audio_director",
+    "physics_engineer",
+    # Sprint 15: Level Design & Performance
+    "level_designer",
+    "performance_analyst",
+    # Sprint 14: Economy/Networking (simple sequential for now)
+    # TODO: Add conditional routing based on game type
+    "economy_balancer",
+    "network_architect",
+    # Sprint 16: QA Planning
+    "qa_planner",
+]
+
+
+def _add_sequential_production_edges(workflow: StateGraph) -> None:
+    """Chain the production agents one after another: Producer -> ... -> GDDWriter."""
+    chain = ["producer", *PRODUCTION_SEQUENCE, "gdd_writer"]
+    for upstream, downstream in zip(chain, chain[1:]):
+        workflow.add_edge(upstream, downstream)
+
+
+def _add_parallel_production_edges(workflow: StateGraph) -> None:
+    """
+    Fan out the production agents as a DAG built from their declared read/write
+    sets. Agents without upstream production dependencies start right after
+    Producer; agents with several dependencies join on all of them.
+    """
+    section = [*PRODUCTION_SEQUENCE, "gdd_writer"]
+    deps = transitive_reduction(build_dependencies(section))
+
+    for name in section:
+        upstream = sorted(deps[name])
+        if not upstream:
+            workflow.add_edge("producer", name)
+        elif len(upstream) == 1:
+            workflow.add_edge(upstream[0], name)
+        else:
+            workflow.add_edge(upstream, name)
+
+    logger.info(
+        "parallel_production_schedule",
+        dependencies={name: sorted(upstream) for name, upstream in deps.items() if upstream},
+    )
+
+
+def create_game_design_graph(
+    scheduling: Optional[Literal["sequential", "parallel"]] = None,
+    checkpointer: Optional[Any] = None,
+):
     """
     Creates the LangGraph for the Game Design Automation pipeline.
     
     Flow:
-    START -> MarketAnalyst -> MechanicsDesigner -> SystemDesigner -> Producer -> GDDWriter -> END
+    START -> Director -> MarketAnalyst -> [Validator] -> MechanicsDesigner -> SystemDesigner -> Producer
+          -> production agents -> GDDWriter -> END
+
+    Args:
+        scheduling: "sequential" chains the production agents in PRODUCTION_SEQUENCE order;
+            "parallel" runs independent ones as concurrent branches, so wall-clock time
+            follows the critical path. Defaults to settings.GRAPH_SCHEDULING_MODE.
+        checkpointer: LangGraph checkpointer; runs are isolated by the
+            `thread_id` in their config (one per job, see core/job_executor.py).
     """
-    workflow = StateGraph(GameDesignState)
+    scheduling = scheduling or settings.GRAPH_SCHEDULING_MODE
+    if scheduling not in ("sequential", "parallel"):
+        raise ValueError(f"Unsupported scheduling mode: {scheduling}")
+
+    parallel = scheduling == "parallel"
+    workflow = StateGraph(ParallelGameDesignState if parallel else GameDesignState)
+
+    # Nodes return partial updates; the guard flags and trims any that return
+    # unchanged keys (parallel branches always need it so reducers can merge)
+    guard = settings.STATE_UPDATE_GUARD
+    if guard == "off" and not parallel:
+        node = lambda fn: fn
+    else:
+        node = lambda fn: as_partial_update(fn, mode=guard)
 
     # Add nodes
-    workflow.add_node("director", director_node)
-    workflow.add_node("market_analyst", market_analyst_node)
-    workflow.add_node("validator", validator_node)  # Sprint 9 - Optional
-    workflow.add_node("mechanics_designer", mechanics_designer_node)
-    workflow.add_node("system_designer", system_designer_node)
-    workflow.add_node("producer", producer_node)
+    workflow.add_node("director", node(director_node))
+    workflow.add_node("market_analyst", node(market_analyst_node))
+    workflow.add_node("validator", node(validator_node))  # Sprint 9 - Optional
+    workflow.add_node("mechanics_designer", node(mechanics_designer_node))
+    workflow.add_node("system_designer", node(system_designer_node))
+    workflow.add_node("producer", node(producer_node))
     
     # Sprint 10: Narrative agents
-    workflow.add_node("narrative_architect", narrative_architect_node)
-    workflow.add_node("character_designer", character_designer_node)
-    workflow.add_node("world_builder", world_builder_node)
-    workflow.add_node("dialogue_system_designer", dialogue_system_designer_node)
-    workflow.add_node("technical_feasibility_validator", technical_feasibility_validator_node)
+    workflow.add_node("narrative_architect", node(narrative_architect_node))
+    workflow.add_node("character_designer", node(character_designer_node))
+    workflow.add_node("world_builder", node(world_builder_node))
+    workflow.add_node("dialogue_system_designer", node(dialogue_system_designer_node))
+    workflow.add_node("technical_feasibility_validator", node(technical_feasibility_validator_node))
     
     # Sprint 11: UI/UX & Visual agents
-    workflow.add_node("ui_ux_designer", ui_ux_designer_node)
-    workflow.add_node("art_director", art_director_node)
-    workflow.add_node("character_artist", character_artist_node)
+    workflow.add_node("ui_ux_designer", node(ui_ux_designer_node))
+    workflow.add_node("art_director", node(art_director_node))
+    workflow.add_node("character_artist", node(character_artist_node))
     
     # Sprint 12: Environment, Animation & Camera agents
-    workflow.add_node("environment_artist", environment_artist_node)
-    workflow.add_node("animation_director", animation_director_node)
-    workflow.add_node("camera_designer", camera_designer_node)
+    workflow.add_node("environment_artist", node(environment_artist_node))
+    workflow.add_node("animation_director", node(animation_director_node))
+    workflow.add_node("camera_designer", node(camera_designer_node))
     
     # Sprint 13: Audio & Physics agents
-    workflow.add_node("audio_director", audio_director_node)
-    workflow.add_node("physics_engineer", physics_engineer_node)
+    workflow.add_node("audio_director", node(audio_director_node))
+    workflow.add_node("physics_engineer", node(physics_engineer_node))
     
     # Sprint 15: Level Design & Performance agents
-    workflow.add_node("level_designer", level_designer_node)
-    workflow.add_node("performance_analyst", performance_analyst_node)
+    workflow.add_node("level_designer", node(level_designer_node))
+    workflow.add_node("performance_analyst", node(performance_analyst_node))
     
     # Sprint 14: Economy & Networking (Conditional)
-    workflow.add_node("economy_balancer", economy_balancer_node)
-    workflow.add_node("network_architect", network_architect_node)
+    workflow.add_node("economy_balancer", node(economy_balancer_node))
+    workflow.add_node("network_architect", node(network_architect_node))
     
     # Sprint 16: QA Planning
-    workflow.add_node("qa_planner", qa_planner_node)
+    workflow.add_node("qa_planner", node(qa_planner_node))
     
-    workflow.add_node("gdd_writer", gdd_writer_node)
+    workflow.add_node("gdd_writer", node(gdd_writer_node))
 
     # Define edges
     workflow.add_edge(START, "director")
@@ -135,44 +223,16 @@ def create_game_design_graph():
     workflow.add_edge("mechanics_designer", "system_designer")
     workflow.add_edge("system_designer", "producer")
     
-    # Sprint 10: Narrative flow after producer
-    workflow.add_edge("producer", "narrative_architect")
-    workflow.add_edge("narrative_architect", "character_designer")
-    workflow.add_edge("character_designer", "world_builder")
-    workflow.add_edge("world_builder", "dialogue_system_designer")
-    workflow.add_edge("dialogue_system_designer", "technical_feasibility_validator")
-    
-    # Sprint 11: Visual flow after technical validation
-    workflow.add_edge("technical_feasibility_validator", "ui_ux_designer")
-    workflow.add_edge("ui_ux_designer", "art_director")
-    workflow.add_edge("art_director", "character_artist")
-    
-    # Sprint 12: Environment/Animation/Camera flow
-    workflow.add_edge("character_artist", "environment_artist")
-    workflow.add_edge("environment_artist", "animation_director")
-    workflow.add_edge("animation_director", "camera_designer")
-    
-    # Sprint 13: Audio & Physics flow
-    workflow.add_edge("camera_designer", "audio_director")
-    workflow.add_edge("audio_director", "physics_engineer")
-    
-    # Sprint 15: Level Design & Performance flow
-    workflow.add_edge("physics_engineer", "level_designer")
-    workflow.add_edge("level_designer", "performance_analyst")
-    
-    # Sprint 14: Conditional Economy/Networking (simple sequential for now)
-    # TODO: Add conditional routing based on game type
-    workflow.add_edge("performance_analyst", "economy_balancer")
-    workflow.add_edge("economy_balancer", "network_architect")
-    
-    # Sprint 16: QA Planning
-    workflow.add_edge("network_architect", "qa_planner")
-    workflow.add_edge("qa_planner", "gdd_writer")
+    if parallel:
+        _add_parallel_production_edges(workflow)
+    else:
+        _add_sequential_production_edges(workflow)
     
     workflow.add_edge("gdd_writer", END)
 
     # Compile with interrupts
     return workflow.compile(
+        checkpointer=checkpointer,
         interrupt_before=["mechanics_designer", "producer"]
     )
 
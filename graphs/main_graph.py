@@ -1,4 +1,5 @@
 import structlog
+from typing import Any, Optional
 from langgraph.graph import StateGraph, END, START
 
 from core.state_v2 import SpiralState
@@ -13,10 +14,14 @@ from agents.governance.visual_review_gate import visual_review_gate_node
 
 logger = structlog.get_logger(__name__)
 
-def create_main_graph():
+def create_main_graph(checkpointer: Optional[Any] = None):
     """
     The Master Graph for the LUDEX 'Spiral' Workflow.
     Orchestrates the transition between Concept, Production, and Polish phases.
+
+    Args:
+        checkpointer: LangGraph checkpointer (see core/checkpointing.py) so a
+            run stopped at a gate can be resumed on its thread_id.
     """
     workflow = StateGraph(SpiralState)
 
@@ -81,7 +86,7 @@ def create_main_graph():
     # 8. End
     workflow.add_edge("polish_phase", END)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 # Export for LangGraph Studio
 graph = create_main_graph()
@@ -7,26 +7,50 @@ Todos los MCP servers deben heredar de MCPAdapter y implementar
 los métodos abstractos.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Generic, TypeVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Generic, TypeVar
 import asyncio
+import functools
+import time
 from datetime import datetime
 import structlog
 from redis.asyncio import Redis
 
 from config.settings import settings
+from core.rate_limiting import get_rate_limiter
+from core.single_flight import in_flight
+from core.tiered_cache import dumps, get_memory_cache, loads
 
 logger = structlog.get_logger()
 
 T = TypeVar("T")
 
 
+def coalesce(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Single-flight para métodos de adapters (core/single_flight.py).
+    
+    Llamadas concurrentes al mismo método con los mismos argumentos comparten
+    una sola request (cache + rate limit + upstream) y reciben el mismo
+    resultado o excepción. La key sigue el formato de _make_cache_key.
+    """
+    @functools.wraps(method)
+    async def wrapper(self: "MCPAdapter", *args: Any, **kwargs: Any) -> Any:
+        key = self._make_cache_key(
+            method.__name__,
+            *(str(arg) for arg in args),
+            *(f"{name}={value}" for name, value in sorted(kwargs.items())),
+        )
+        return await self._coalesce(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
 class MCPAdapter(ABC, Generic[T]):
     """
     Adaptador base para MCP servers.
     
     Funcionalidades comunes:
     - Rate limiting
-    - Caching (Redis)
+    - Caching (L1 en memoria + Redis, core/tiered_cache.py)
     - Error handling
     - Telemetry
     - Retry logic
@@ -36,8 +60,9 @@ class MCPAdapter(ABC, Generic[T]):
         self,
         name: str,
         redis_client: Optional[Redis] = None,
-        rate_limit_rpm: int = 60,
+        rate_limit_rpm: float = 60,
         cache_ttl: int = 3600,
+        rate_limit_burst: Optional[float] = None,
     ):
         self.name = name
         self.redis = redis_client
@@ -46,9 +71,19 @@ class MCPAdapter(ABC, Generic[T]):
         
         self.logger = logger.bind(mcp_adapter=name)
         
-        # Rate limiter (sliding window)
-        self._request_timestamps: list[float] = []
-        self._rate_limit_lock = asyncio.Lock()
+        # Token bucket compartido por todas las instancias (y procesos) del provider
+        self.rate_limiter = get_rate_limiter(
+            name,
+            rate_per_minute=rate_limit_rpm,
+            burst=rate_limit_burst,
+            redis=redis_client,
+        )
+        
+        # L1 compartido por todas las instancias del adapter (cache_ttl=0: sin cache)
+        self.memory_cache = (
+            get_memory_cache(name) if settings.MCP_CACHE_L1_ENABLED and cache_ttl else None
+        )
+        self._revalidating: Dict[str, asyncio.Task] = {}
     
     @abstractmethod
     async def connect(self) -> None:
@@ -67,52 +102,86 @@ class MCPAdapter(ABC, Generic[T]):
     
     async def _wait_for_rate_limit(self) -> None:
         """
-        Rate limiting con sliding window.
+        Rate limiting con token bucket (core/rate_limiting.py).
         
-        Ejemplo: Si rate_limit_rpm=60, solo permite 60 requests en 60 segundos.
+        Ejemplo: Si rate_limit_rpm=60, permite ráfagas de hasta 60 requests y
+        después 1 por segundo. Los waiters se atienden en orden de llegada.
         """
-        async with self._rate_limit_lock:
-            now = asyncio.get_event_loop().time()
-            window_start = now - 60.0
-            
-            # Limpiar timestamps antiguos
-            self._request_timestamps = [
-                ts for ts in self._request_timestamps if ts > window_start
-            ]
-            
-            # Si alcanzamos el límite, esperar
-            if len(self._request_timestamps) >= self.rate_limit_rpm:
-                oldest = self._request_timestamps[0]
-                wait_time = 60.0 - (now - oldest)
-                
-                if wait_time > 0:
-                    self.logger.debug(
-                        "rate_limit_waiting",
-                        wait_seconds=wait_time,
-                        current_requests=len(self._request_timestamps),
-                    )
-                    await asyncio.sleep(wait_time)
-            
-            # Registrar este request
-            self._request_timestamps.append(now)
+        await self.rate_limiter.acquire()
     
     async def _get_cached(self, cache_key: str) -> Optional[T]:
-        """Obtiene valor del cache (Redis)."""
+        """
+        Obtiene valor del cache: L1 en memoria, después Redis.
+        
+        Una entrada L1 que ya no está fresca se devuelve igual y se revalida
+        contra Redis en background (stale-while-revalidate).
+        """
+        l1 = self.memory_cache
+        if l1 is not None:
+            entry = l1.get(cache_key)
+            if entry is not None:
+                if time.monotonic() < entry.fresh_until:
+                    l1.record("l1_hits")
+                else:
+                    l1.record("stale_hits")
+                    self._schedule_revalidation(cache_key)
+                self.logger.debug("cache_hit", key=cache_key, tier="l1")
+                return loads(entry.data)
+        
         if not self.redis:
+            if l1 is not None:
+                l1.record("misses")
             return None
         
         try:
-            cached = await self.redis.get(cache_key)
-            if cached:
-                self.logger.debug("cache_hit", key=cache_key)
-                import json
-                return json.loads(cached)
-            else:
-                self.logger.debug("cache_miss", key=cache_key)
-                return None
+            data = await self._read_redis(cache_key)
+            value = loads(data) if data is not None else None
         except Exception as e:
             self.logger.error("cache_get_error", error=str(e), key=cache_key)
+            if l1 is not None:
+                l1.delete(cache_key)
+            data = None
+
+        if data is None:
+            if l1 is not None:
+                l1.record("misses")
+            self.logger.debug("cache_miss", key=cache_key)
+            return None
+        if l1 is not None:
+            l1.record("l2_hits")
+        self.logger.debug("cache_hit", key=cache_key, tier="l2")
+        return value
+    
+    async def _read_redis(self, cache_key: str) -> Optional[bytes]:
+        """Lee una key de Redis (GET + PTTL en un round trip) y refresca L1."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            data, ttl_ms = await pipe.get(cache_key).pttl(cache_key).execute()
+        
+        if data is None:
+            if self.memory_cache is not None:
+                self.memory_cache.delete(cache_key)
             return None
+        
+        data = data.encode() if isinstance(data, str) else data
+        if self.memory_cache is not None:
+            ttl = ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else self.cache_ttl
+            self.memory_cache.set(cache_key, data, ttl, settings.MCP_CACHE_L1_FRESH_SECONDS)
+        return data
+    
+    def _schedule_revalidation(self, cache_key: str) -> None:
+        if not self.redis or cache_key in self._revalidating:
+            return
+        task = asyncio.ensure_future(self._revalidate(cache_key))
+        self._revalidating[cache_key] = task
+        task.add_done_callback(lambda _: self._revalidating.pop(cache_key, None))
+    
+    async def _revalidate(self, cache_key: str) -> None:
+        try:
+            await self._read_redis(cache_key)
+            self.memory_cache.record("revalidations")
+        except Exception as e:
+            # La entrada stale se sigue sirviendo hasta que expire
+            self.logger.warning("cache_revalidate_error", error=str(e), key=cache_key)
     
     async def _set_cached(
         self,
@@ -120,26 +189,36 @@ class MCPAdapter(ABC, Generic[T]):
         value: T,
         ttl: Optional[int] = None,
     ) -> None:
-        """Guarda valor en cache (Redis)."""
+        """Guarda valor en cache (L1 y Redis)."""
+        if self.memory_cache is None and not self.redis:
+            return
+        
+        try:
+            data = dumps(value)
+        except TypeError as e:
+            self.logger.error("cache_serialize_error", error=str(e), key=cache_key)
+            return
+        
+        ttl = ttl or self.cache_ttl
+        if self.memory_cache is not None:
+            # Sin Redis no hay nada contra qué revalidar: fresca hasta expirar
+            fresh_for = settings.MCP_CACHE_L1_FRESH_SECONDS if self.redis else ttl
+            self.memory_cache.set(cache_key, data, ttl, fresh_for)
+        
         if not self.redis:
             return
         
         try:
-            import json
-            ttl = ttl or self.cache_ttl
-            await self.redis.setex(
-                cache_key,
-                ttl,
-                json.dumps(value, default=str)
-            )
+            await self.redis.setex(cache_key, ttl, data)
             self.logger.debug("cache_set", key=cache_key, ttl=ttl)
         except Exception as e:
             self.logger.error("cache_set_error", error=str(e), key=cache_key)
     
     async def _invalidate_cache(self, pattern: str) -> int:
-        """Invalida cache que coincida con el patrón."""
+        """Invalida cache (L1 y Redis) que coincida con el patrón."""
+        dropped = self.memory_cache.delete_matching(pattern) if self.memory_cache is not None else 0
         if not self.redis:
-            return 0
+            return dropped
         
         try:
             keys = []
@@ -155,6 +234,14 @@ class MCPAdapter(ABC, Generic[T]):
             self.logger.error("cache_invalidate_error", error=str(e), pattern=pattern)
             return 0
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit rates del cache de este adapter (compartido por nombre)."""
+        return self.memory_cache.get_stats() if self.memory_cache is not None else {}
+    
+    async def _coalesce(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Ejecuta `fetch` una sola vez para todas las llamadas concurrentes con `key`."""
+        return await in_flight.run(key, fetch)
+    
     def _make_cache_key(self, *parts: str) -> str:
         """Genera cache key consistente."""
         return f"mcp:{self.name}:{':'.join(parts)}"
@@ -42,7 +42,7 @@ except ImportError:
     PYMUPDF_AVAILABLE = False
     structlog.get_logger().warning("pymupdf_not_installed")
 
-from mcp_servers.base import MCPAdapter
+from mcp_servers.base import MCPAdapter, coalesce
 from config.settings import settings
 
 logger = structlog.get_logger()
@@ -149,6 +149,7 @@ class MarkItDownAdapter(MCPAdapter[ProcessedPDF]):
         """Verifica disponibilidad de conversores."""
         return self._ensure_markitdown() or PYMUPDF_AVAILABLE
     
+    @coalesce
     async def convert_pdf(
         self,
         file_path: str,
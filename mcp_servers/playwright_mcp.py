@@ -24,7 +24,7 @@ from playwright.async_api import (
     Playwright,
 )
 
-from mcp_servers.base import MCPAdapter
+from mcp_servers.base import MCPAdapter, coalesce
 from config.settings import settings
 
 logger = structlog.get_logger()
@@ -162,6 +162,7 @@ class PlaywrightAdapter(MCPAdapter[ScrapedContent]):
             self.logger.error("health_check_failed", error=str(e))
             return False
     
+    @coalesce
     async def scrape_page(
         self,
         url: str,
@@ -247,6 +248,7 @@ class PlaywrightAdapter(MCPAdapter[ScrapedContent]):
         finally:
             await page.close()
     
+    @coalesce
     async def extract_structured_data(
         self,
         url: str,
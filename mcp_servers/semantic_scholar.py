@@ -20,7 +20,7 @@ import httpx
 from pybreaker import CircuitBreaker
 import structlog
 
-from mcp_servers.base import MCPAdapter
+from mcp_servers.base import MCPAdapter, coalesce
 from config.settings import settings
 
 logger = structlog.get_logger()
@@ -94,15 +94,16 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
     """
     
     def __init__(self, redis_client=None):
+        self.delay = settings.SEMANTIC_SCHOLAR_DELAY  # 1.0 segundo
         super().__init__(
             name="semantic_scholar",
             redis_client=redis_client,
-            rate_limit_rpm=60,  # Teórico, pero enforceamos 1 req/seg manualmente
+            rate_limit_rpm=60 / self.delay,  # 1 req/seg estricto, sin ráfagas
             cache_ttl=settings.REDIS_TTL_PAPERS,  # 7 días
+            rate_limit_burst=1,
         )
         
         self.base_url = settings.SEMANTIC_SCHOLAR_BASE_URL
-        self.delay = settings.SEMANTIC_SCHOLAR_DELAY  # 1.0 segundo
         
         # HTTP client
         self.client: Optional[httpx.AsyncClient] = None
@@ -112,10 +113,6 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
             fail_max=settings.CIRCUIT_BREAKER_FAIL_MAX,
             reset_timeout=settings.CIRCUIT_BREAKER_TIMEOUT,
         )
-        
-        # Timestamp del último request (para 1 req/seg enforcement)
-        self._last_request_time: float = 0
-        self._request_lock = asyncio.Lock()
     
     async def connect(self) -> None:
         """Inicializa el cliente HTTP."""
@@ -144,6 +141,7 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
             self.logger.error("health_check_failed", error=str(e))
             return False
     
+    @coalesce
     async def search_papers(
         self,
         query: str,
@@ -182,7 +180,7 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
             return [Paper(**paper_data) for paper_data in cached]
         
         # Enforce rate limit (1 req/seg)
-        await self._enforce_rate_limit()
+        await self._wait_for_rate_limit()
         
         # Build params
         params = {
@@ -313,6 +311,7 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
         
         return all_papers[:total]
     
+    @coalesce
     async def get_paper_details(self, paper_id: str) -> Optional[Paper]:
         """
         Obtiene detalles de un paper específico.
@@ -330,7 +329,7 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
             return Paper(**cached)
         
         # Enforce rate limit
-        await self._enforce_rate_limit()
+        await self._wait_for_rate_limit()
         
         try:
             response_data = await self._make_request(f"/paper/{paper_id}")
@@ -352,6 +351,7 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
                 return None
             raise
     
+    @coalesce
     async def get_recommendations(
         self,
         paper_id: str,
@@ -374,7 +374,7 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
             return [Paper(**paper_data) for paper_data in cached]
         
         # Enforce rate limit
-        await self._enforce_rate_limit()
+        await self._wait_for_rate_limit()
         
         try:
             response_data = await self._make_request(
@@ -404,27 +404,6 @@ class SemanticScholarAdapter(MCPAdapter[List[Paper]]):
     # MÉTODOS PRIVADOS
     # ============================================================
     
-    async def _enforce_rate_limit(self) -> None:
-        """
-        Enforce estricto de 1 request por segundo.
-        
-        Usa lock para garantizar que solo 1 request se ejecute por segundo,
-        incluso con múltiples tasks concurrentes.
-        """
-        async with self._request_lock:
-            now = asyncio.get_event_loop().time()
-            elapsed = now - self._last_request_time
-            
-            if elapsed < self.delay:
-                wait_time = self.delay - elapsed
-                self.logger.debug(
-                    "rate_limit_enforced",
-                    wait_seconds=round(wait_time, 2),
-                )
-                await asyncio.sleep(wait_time)
-            
-            self._last_request_time = asyncio.get_event_loop().time()
-    
     async def _make_request(
         self,
         endpoint: str,
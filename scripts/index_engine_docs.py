@@ -9,16 +9,27 @@ Usage:
     python scripts/index_engine_docs.py --engine unreal
     python scripts/index_engine_docs.py --engine godot
     python scripts/index_engine_docs.py --all
+    python scripts/index_engine_docs.py --engine unity --full   # re-embed everything
 """
 
 import argparse
+import os
+import sys
 import structlog
 from pathlib import Path
-from typing import List
-from langchain_community.document_loaders import DirectoryLoader, TextLoader, UnstructuredMarkdownLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import Chroma
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from core.rag.ingestion_pipeline import (
+    IngestionStats,
+    ingest_into_chroma,
+    iter_file_documents,
+    iter_source_files,
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -48,7 +59,21 @@ ENGINE_CONFIGS = {
 }
 
 
-def index_engine_docs(engine: str):
+def _print_progress(stats: IngestionStats):
+    print(
+        f"\r   📦 {stats.documents} docs | {stats.chunks} chunks | "
+        f"{stats.chunks_per_second:.1f} chunks/s",
+        end="",
+        flush=True,
+    )
+
+
+def index_engine_docs(
+    engine: str,
+    incremental: bool = True,
+    batch_size: int = settings.RAG_INGEST_BATCH_SIZE,
+    workers: int = settings.RAG_INGEST_MAX_WORKERS,
+):
     """Index documentation for a specific engine"""
     logger.info("indexing_engine_docs", engine=engine)
     
@@ -65,54 +90,43 @@ def index_engine_docs(engine: str):
         print(f"   URL: {config['url_base']}")
         return
     
-    # Load documents
-    logger.info("loading_documents", path=str(docs_path))
-    loader = DirectoryLoader(
-        str(docs_path),
-        glob="**/*.md",
-        loader_cls=UnstructuredMarkdownLoader,
-        show_progress=True
+    # Stream files -> chunks -> batched embeddings -> bulk upsert.
+    # Only new/changed chunks are embedded (manifest in data/chromadb_manifests)
+    documents = iter_file_documents(
+        iter_source_files(docs_path, extensions=(".md",)),
+        metadata={"engine": engine, "source": config["description"]},
+        doc_id=lambda path: f"{engine}/{path.relative_to(docs_path).as_posix()}",
     )
-    documents = loader.load()
-    
-    logger.info("documents_loaded", count=len(documents))
-    print(f"✅ Loaded {len(documents)} documents from {docs_path}")
-    
-    # Split into chunks
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
         length_function=len,
     )
-    chunks = text_splitter.split_documents(documents)
-    
-    logger.info("chunks_created", count=len(chunks))
-    print(f"📄 Created {len(chunks)} chunks for indexing")
     
-    # Add metadata
-    for i, chunk in enumerate(chunks):
-        chunk.metadata["engine"] = engine
-        chunk.metadata["source"] = config["description"]
-        chunk.metadata["chunk_id"] = i
-    
-    # Create embeddings and index
-    logger.info("creating_embeddings")
-    print("🔄 Creating embeddings (this may take a while)...")
+    logger.info("creating_embeddings", path=str(docs_path))
+    print("🔄 Creating embeddings (streaming, batched)...")
     
     embeddings = OllamaEmbeddings(model="nomic-embed-text")
     
-    # Create or update vector store
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
+    stats = ingest_into_chroma(
+        documents,
+        persist_directory=CHROMADB_PATH,
         collection_name=config["collection"],
-        persist_directory=str(CHROMADB_PATH)
+        embeddings=embeddings,
+        splitter=text_splitter,
+        incremental=incremental,
+        prune_missing=True,  # files removed from the docs folder
+        batch_size=batch_size,
+        max_workers=workers,
+        on_progress=_print_progress,
     )
     
-    logger.info("indexing_complete", engine=engine, chunks=len(chunks))
-    print(f"✅ {engine.title()} documentation indexed successfully!")
+    logger.info("indexing_complete", engine=engine, **stats.to_dict())
+    print(f"\n✅ {engine.title()} documentation indexed successfully!")
     print(f"   Collection: {config['collection']}")
-    print(f"   Chunks: {len(chunks)}")
+    print(f"   Files: {stats.documents_new} new, {stats.documents_changed} changed, "
+          f"{stats.documents_skipped} unchanged, {stats.documents_deleted} removed")
+    print(f"   Chunks: {stats.chunks} embedded, {stats.chunks_reused} reused, {stats.chunks_deleted} deleted")
     print(f"   Storage: {CHROMADB_PATH}")
 
 
@@ -128,6 +142,23 @@ def main():
         action="store_true",
         help="Index all engines"
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the manifest and re-embed every chunk"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.RAG_INGEST_BATCH_SIZE,
+        help=f"Chunks per embedding batch (default: {settings.RAG_INGEST_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.RAG_INGEST_MAX_WORKERS,
+        help=f"Concurrent embedding requests (default: {settings.RAG_INGEST_MAX_WORKERS})"
+    )
     
     args = parser.parse_args()
     
@@ -137,12 +168,12 @@ def main():
             print(f"Indexing {engine.title()} Documentation")
             print('='*60)
             try:
-                index_engine_docs(engine)
+                index_engine_docs(engine, not args.full, args.batch_size, args.workers)
             except Exception as e:
                 logger.exception("indexing_failed", engine=engine, error=str(e))
                 print(f"❌ Failed to index {engine}: {e}")
     elif args.engine:
-        index_engine_docs(args.engine)
+        index_engine_docs(args.engine, not args.full, args.batch_size, args.workers)
     else:
         parser.print_help()
         print("\n💡 Example: python scripts/index_engine_docs.py --engine unity")
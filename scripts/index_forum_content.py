@@ -18,16 +18,22 @@ Usage:
 
 import argparse
 import asyncio
+import os
+import sys
 import structlog
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List
 from datetime import datetime
 import aiohttp
 import json
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import Chroma
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.rag.ingestion_pipeline import ingest_into_chroma
 
 logger = structlog.get_logger(__name__)
 
@@ -173,10 +179,8 @@ async def scrape_stackoverflow(source_key: str, limit: int = 500) -> List[Dict[s
     return questions
 
 
-def convert_to_documents(posts: List[Dict[str, Any]], source_type: str) -> List[Document]:
-    """Convert forum posts to LangChain documents"""
-    documents = []
-    
+def convert_to_documents(posts: Iterable[Dict[str, Any]], source_type: str) -> Iterator[Document]:
+    """Convert forum posts to LangChain documents (lazily)"""
     for post in posts:
         if source_type == "reddit":
             content = f"# {post['title']}\n\n{post['selftext']}"
@@ -202,9 +206,7 @@ def convert_to_documents(posts: List[Dict[str, Any]], source_type: str) -> List[
         if len(content.strip()) < 50:
             continue
         
-        documents.append(Document(page_content=content, metadata=metadata))
-    
-    return documents
+        yield Document(id=post["url"], page_content=content, metadata=metadata)
 
 
 async def index_forum_source(source_key: str, limit: int = 500):
@@ -242,41 +244,30 @@ async def index_forum_source(source_key: str, limit: int = 500):
     # Convert to documents
     source_type = "reddit" if source_key.startswith("reddit") else "stackoverflow"
     documents = convert_to_documents(posts, source_type)
-    print(f"   📄 Created {len(documents)} documents")
     
-    # Split into chunks
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=800,
         chunk_overlap=150,
         length_function=len,
     )
-    chunks = text_splitter.split_documents(documents)
-    print(f"   🔪 Split into {len(chunks)} chunks")
     
-    # Create embeddings and index
+    # Batched embeddings + bulk upsert; only new/changed chunks are embedded
     print(f"   🔄 Creating embeddings...")
     embeddings = OllamaEmbeddings(model="nomic-embed-text")
     
     collection_name = config["collection"]
-    
-    # Check if collection exists, append if it does
-    try:
-        vectorstore = Chroma(
-            collection_name=collection_name,
-            embedding_function=embeddings,
-            persist_directory=str(CHROMADB_PATH)
-        )
-        vectorstore.add_documents(chunks)
-        print(f"   ➕ Added to existing collection: {collection_name}")
-    except:
-        # Create new collection
-        vectorstore = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            collection_name=collection_name,
-            persist_directory=str(CHROMADB_PATH)
-        )
-        print(f"   ✅ Created new collection: {collection_name}")
+    stats = await asyncio.to_thread(
+        ingest_into_chroma,
+        documents,
+        persist_directory=CHROMADB_PATH,
+        collection_name=collection_name,
+        embeddings=embeddings,
+        splitter=text_splitter,
+        manifest_name=source_key,
+    )
+    print(f"   📄 {stats.documents_new} new, {stats.documents_changed} changed, {stats.documents_skipped} unchanged posts")
+    print(f"   🔪 {stats.chunks} chunks embedded, {stats.chunks_reused} reused, {stats.chunks_deleted} deleted")
+    print(f"   ➕ Upserted into collection: {collection_name}")
     
     print(f"   ✅ Indexed successfully!")
 
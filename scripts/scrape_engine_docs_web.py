@@ -15,6 +15,8 @@ Usage:
 
 import argparse
 import asyncio
+import os
+import sys
 import structlog
 from pathlib import Path
 from typing import List
@@ -26,7 +28,11 @@ import json
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import Chroma
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.rag.ingestion_pipeline import ingest_into_chroma
 
 logger = structlog.get_logger(__name__)
 
@@ -192,10 +198,10 @@ async def scrape_engine_docs(engine: str, limit: int = 500):
         
         print(f"   ✅ Scraped {len(pages)} pages")
     
-    # Convert to documents
-    documents = []
-    for page in pages:
-        documents.append(Document(
+    # Convert to documents (lazily; the pipeline pulls them as it goes)
+    documents = (
+        Document(
+            id=page["url"],
             page_content=f"# {page['title']}\n\n{page['content']}",
             metadata={
                 "source": config["name"],
@@ -203,42 +209,32 @@ async def scrape_engine_docs(engine: str, limit: int = 500):
                 "engine": engine,
                 "type": "web_docs"
             }
-        ))
-    
-    print(f"   📄 Created {len(documents)} documents")
+        )
+        for page in pages
+    )
     
-    # Split into chunks
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
         length_function=len,
     )
-    chunks = text_splitter.split_documents(documents)
-    print(f"   🔪 Split into {len(chunks)} chunks")
     
-    # Create embeddings and index
+    # Batched embeddings + bulk upsert; only new/changed chunks are embedded
     print(f"   🔄 Creating embeddings...")
     embeddings = OllamaEmbeddings(model="nomic-embed-text")
     
-    collection_name = config["collection"]
-    
-    # Append to existing or create new
-    try:
-        vectorstore = Chroma(
-            collection_name=collection_name,
-            embedding_function=embeddings,
-            persist_directory=str(CHROMADB_PATH)
-        )
-        vectorstore.add_documents(chunks)
-        print(f"   ➕ Added to collection: {collection_name}")
-    except:
-        vectorstore = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            collection_name=collection_name,
-            persist_directory=str(CHROMADB_PATH)
-        )
-        print(f"   ✅ Created collection: {collection_name}")
+    stats = await asyncio.to_thread(
+        ingest_into_chroma,
+        documents,
+        persist_directory=CHROMADB_PATH,
+        collection_name=config["collection"],
+        embeddings=embeddings,
+        splitter=text_splitter,
+        manifest_name=f"{config['collection']}_web",
+    )
+    print(f"   📄 {stats.documents_new} new, {stats.documents_changed} changed, {stats.documents_skipped} unchanged pages")
+    print(f"   🔪 {stats.chunks} chunks embedded, {stats.chunks_reused} reused, {stats.chunks_deleted} deleted")
+    print(f"   ➕ Upserted into collection: {config['collection']}")
     
     print(f"   ✅ Indexed successfully!")
 
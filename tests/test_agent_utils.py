@@ -0,0 +1,256 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from typing import Any, Dict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+from core import model_factory
+from core.agent_utils import safe_agent_invoke
+from core.budget_manager import MODEL_COSTS
+from core.usage_tracking import usage_tracker
+from core.tool_output_store import ToolOutputStore
+from tools.tool_output_tool import fetch_tool_output
+
+
+class TestConcurrentToolCalls(unittest.TestCase):
+    def _llm(self, tool_calls):
+        llm = MagicMock()
+        llm.bind_tools.return_value = llm
+        llm.ainvoke = AsyncMock(side_effect=[
+            AIMessage(content="", tool_calls=tool_calls),
+            AIMessage(content="done"),
+        ])
+        return llm
+
+    def test_tool_calls_run_concurrently_in_order(self):
+        running = {"now": 0, "peak": 0}
+
+        @tool
+        async def lookup(game: str, delay: float) -> str:
+            """Look up a game."""
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(delay)
+            running["now"] -= 1
+            return f"info:{game}"
+
+        tool_calls = [
+            {"name": "lookup", "args": {"game": "slow", "delay": 0.05}, "id": "1"},
+            {"name": "lookup", "args": {"game": "fast", "delay": 0.0}, "id": "2"},
+            {"name": "missing", "args": {}, "id": "3"},
+        ]
+        llm = self._llm(tool_calls)
+
+        result = asyncio.run(safe_agent_invoke(
+            llm, [lookup], [HumanMessage(content="go")], use_cache=False,
+        ))
+
+        self.assertEqual(result["output"], "done")
+        self.assertEqual(running["peak"], 2)
+
+        sent = llm.ainvoke.await_args_list[1].args[0]
+        tool_messages = [m for m in sent if isinstance(m, ToolMessage)]
+        self.assertEqual([m.tool_call_id for m in tool_messages], ["1", "2", "3"])
+        self.assertEqual(tool_messages[0].content, "info:slow")
+        self.assertIn("not found", tool_messages[2].content)
+
+    def test_concurrency_cap(self):
+        running = {"now": 0, "peak": 0}
+
+        @tool
+        async def lookup(game: str) -> str:
+            """Look up a game."""
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.01)
+            running["now"] -= 1
+            return game
+
+        tool_calls = [{"name": "lookup", "args": {"game": str(i)}, "id": str(i)} for i in range(5)]
+
+        asyncio.run(safe_agent_invoke(
+            self._llm(tool_calls), [lookup], [HumanMessage(content="go")],
+            use_cache=False, max_tool_concurrency=2,
+        ))
+
+        self.assertEqual(running["peak"], 2)
+
+
+
+class TestToolOutputCompaction(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store_patch = patch("core.tool_output_store._store", ToolOutputStore(tmp.name))
+        store_patch.start()
+        self.addCleanup(store_patch.stop)
+
+    def test_large_output_is_spilled_and_fetchable(self):
+        games = [{"name": f"Game {i}", "summary": "A long description " * 20} for i in range(50)]
+
+        @tool
+        def igdb_search(query: str) -> dict:
+            """Search games."""
+            return {"query": query, "results": games}
+
+        llm = MagicMock()
+        llm.bind_tools.return_value = llm
+        llm.ainvoke = AsyncMock(side_effect=[
+            AIMessage(content="", tool_calls=[{"name": "igdb_search", "args": {"query": "rogue"}, "id": "1"}]),
+            AIMessage(content="done"),
+        ])
+
+        result = asyncio.run(safe_agent_invoke(llm, [igdb_search], [HumanMessage(content="go")], use_cache=False))
+
+        ref = result["tool_calls"][0]["raw_data_ref"]
+        self.assertTrue(ref.startswith("out_"))
+        sent = llm.ainvoke.await_args_list[1].args[0]
+        spilled = sent[-1].content
+        self.assertIn(ref, spilled)
+        self.assertLess(len(spilled), len(json.dumps(games)) / 10)
+        # The fetch tool is bound once something was spilled
+        self.assertIn(fetch_tool_output, llm.bind_tools.call_args_list[-1].args[0])
+
+        detail = asyncio.run(fetch_tool_output.ainvoke({"ref": ref, "path": "results.3.name"}))
+        self.assertEqual(detail, "Game 3")
+        page = fetch_tool_output.invoke({"ref": ref})
+        self.assertIn("call again with offset=", page)
+        self.assertIn("unknown tool output reference", fetch_tool_output.invoke({"ref": "out_0000000000000000"}))
+
+    def test_small_output_stays_inline(self):
+        @tool
+        def lookup(game: str) -> dict:
+            """Look up a game."""
+            return {"name": game}
+
+        llm = MagicMock()
+        llm.bind_tools.return_value = llm
+        llm.ainvoke = AsyncMock(side_effect=[
+            AIMessage(content="", tool_calls=[{"name": "lookup", "args": {"game": "Hades"}, "id": "1"}]),
+            AIMessage(content="done"),
+        ])
+
+        result = asyncio.run(safe_agent_invoke(llm, [lookup], [HumanMessage(content="go")], use_cache=False))
+
+        self.assertIsNone(result["tool_calls"][0]["raw_data_ref"])
+        self.assertEqual(llm.ainvoke.await_args_list[1].args[0][-1].content, '{"name": "Hades"}')
+        self.assertEqual(llm.bind_tools.call_count, 1)
+
+
+class TestToolOutputStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = ToolOutputStore(tmp.name, ttl_seconds=60)
+
+    def test_concurrent_identical_outputs(self):
+        """Parallel tool calls returning the same output must all be stored"""
+        text = "same output " * 500
+
+        async def spill():
+            return await asyncio.gather(*[self.store.aput(text) for _ in range(8)])
+
+        refs = asyncio.run(spill())
+
+        self.assertEqual(len(set(refs)), 1)
+        self.assertEqual(self.store.get(refs[0]), text)
+        self.assertEqual([p.suffix for p in self.store.root.glob("*/*")], [".txt"])
+
+    def test_expired_outputs_are_pruned(self):
+        old, fresh = self.store.put("old output"), self.store.put("fresh output")
+        expired = time.time() - 120
+        os.utime(self.store._path(old), (expired, expired))
+
+        self.assertEqual(self.store.prune(), 1)
+        self.assertIsNone(self.store.get(old))
+        self.assertEqual(self.store.get(fresh), "fresh output")
+
+
+class NamedFakeChatModel(GenericFakeChatModel):
+    model_name: str
+    fail: bool = False
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    async def _agenerate(self, *args, **kwargs):
+        if self.fail:
+            raise ConnectionError("provider down")
+        return await super()._agenerate(*args, **kwargs)
+
+
+class TestCreditReservation(unittest.TestCase):
+    def setUp(self):
+        self.budget = MagicMock()
+        self.budget.models = MODEL_COSTS
+        self.budget.reserve_credits = AsyncMock(return_value=True)
+        self.budget.release_credits = AsyncMock()
+        self.budget.record_usage = AsyncMock()
+        self.budget.get_fallback_model = AsyncMock(return_value="gpt-4o")
+        usage_tracker.budget_manager = self.budget
+        self.failing = set()
+
+    def tearDown(self):
+        usage_tracker.budget_manager = None
+        asyncio.run(model_factory.close_model_clients())
+
+    def _run(self, model="gpt-5"):
+        def build(provider, model, temperature, **kwargs):
+            return NamedFakeChatModel(
+                model_name=model,
+                messages=iter([AIMessage(content=f"from {model}")]),
+                fail=model in self.failing,
+            )
+
+        async def run():
+            llm = model_factory.create_model(provider="github", model=model, temperature=0.2)
+            result = await safe_agent_invoke(
+                llm, [], [HumanMessage(content="go")], agent_name="Director", use_cache=False,
+            )
+            await asyncio.gather(*usage_tracker._pending)
+            return result
+
+        with patch.object(model_factory, "_build_model", side_effect=build):
+            return asyncio.run(run())
+
+    def test_reserved_call_is_not_charged_twice(self):
+        result = self._run()
+
+        self.assertEqual(result["output"], "from gpt-5")
+        self.budget.reserve_credits.assert_awaited_once_with("gpt-5", metadata={"agent_name": "Director"})
+        self.budget.record_usage.assert_not_awaited()
+        self.budget.release_credits.assert_not_awaited()
+
+    def test_falls_back_when_reservation_is_refused(self):
+        self.budget.reserve_credits.return_value = False
+
+        result = self._run()
+
+        self.assertEqual(result["output"], "from gpt-4o")
+        self.budget.get_fallback_model.assert_awaited_once_with("gpt-5")
+        # gpt-4o costs no credits: no reservation, only its request is recorded
+        self.budget.reserve_credits.assert_awaited_once()
+        self.budget.record_usage.assert_awaited_once_with(
+            "gpt-4o", metadata={"agent_name": "Director", "job_id": None}
+        )
+
+    def test_failed_call_releases_its_reservation(self):
+        self.failing.add("gpt-5")
+
+        result = self._run()
+
+        self.assertIn("error", result)
+        self.budget.release_credits.assert_awaited_once_with("gpt-5", metadata={"agent_name": "Director"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from core.rag.rag_engine import MockRAGEngine
+from core.rag.store_registry import close_vector_stores
+from tools import retrieval_tool
+from tools.domain_knowledge_tool import DomainKnowledgeTool
+
+
+class SlowEngine(MockRAGEngine):
+    """Blocking engine that records how many queries run at once."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def query(self, query_text, n_results=3):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return [{"content": f"answer to {query_text}", "metadata": {"source": "test"}, "id": query_text}]
+
+
+class TestAsyncRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.engine = SlowEngine()
+        patcher = patch.object(retrieval_tool, "get_rag_engine", return_value=self.engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(close_vector_stores)
+
+    def test_aquery_many_keeps_order_and_bounds_workers(self):
+        queries = [f"q{i}" for i in range(8)]
+
+        with patch("config.settings.settings.RAG_QUERY_MAX_WORKERS", 2):
+            close_vector_stores()
+            results = asyncio.run(retrieval_tool.aquery_many(queries))
+
+        self.assertEqual([r[0]["id"] for r in results], queries)
+        self.assertEqual(self.engine.peak, 2)
+        self.assertTrue(all(name.startswith("rag") for name in self.engine.threads))
+
+    def test_event_loop_is_not_blocked(self):
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            answer = await retrieval_tool.search_engine_docs.ainvoke({"query": "physics"})
+            task.cancel()
+            return answer, ticks
+
+        answer, ticks = asyncio.run(scenario())
+
+        self.assertIn("answer to physics", answer)
+        self.assertGreater(ticks, 3)
+
+    def test_domain_tool_batches_by_domain(self):
+        tool = DomainKnowledgeTool()
+
+        answers = asyncio.run(tool.aquery_many([("jump", "patterns"), ("AddForce", "engine")]))
+
+        self.assertTrue(answers[0].startswith("Found the following design patterns:"))
+        self.assertTrue(answers[1].startswith("Found the following documentation:"))
+        self.assertIn("answer to AddForce", answers[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
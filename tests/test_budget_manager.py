@@ -205,6 +205,151 @@ class TestBudgetManagerBasic:
         assert status.can_afford("gpt-4o") is True
 
 
+class FakeBudgetRedis:
+    """Hash en memoria; el script reproduce RESERVE_CREDITS_LUA (una llamada = un round-trip)."""
+    
+    def __init__(self):
+        self.hash = {}
+        self.script_calls = 0
+        self.hgetall_calls = 0
+    
+    def register_script(self, source):
+        async def script(keys, args):
+            self.script_calls += 1
+            credits, model, limit, _ttl, enforce, period_start, requests, writer = args
+            used = float(self.hash.get("credits_used", 0))
+            limit = float(self.hash.get("credits_limit", limit))
+            if enforce == "1" and credits > 0 and used + credits > limit:
+                return [0, self._flat()]
+            self.hash["credits_used"] = str(used + credits)
+            field_name = f"model:{model}"
+            self.hash[field_name] = str(int(self.hash.get(field_name, 0)) + requests)
+            self.hash.setdefault("credits_limit", str(limit))
+            self.hash.setdefault("period_start", period_start)
+            self.hash["writer"] = writer
+            return [1, self._flat()]
+        return script
+    
+    def _flat(self):
+        return [item for pair in self.hash.items() for item in pair]
+    
+    async def hgetall(self, key):
+        self.hgetall_calls += 1
+        return dict(self.hash)
+    
+    async def hget(self, key, field):
+        return self.hash.get(field)
+
+
+class FakeConfigRedis:
+    def __init__(self, flags):
+        self.flags = flags
+        self.set_calls = []
+    
+    async def config_get(self, name):
+        return {name: self.flags}
+    
+    async def config_set(self, name, value):
+        self.set_calls.append(value)
+        self.flags = value
+
+
+class TestBudgetAccounting:
+    """Contabilidad atómica (script Lua) y cache de estado."""
+    
+    async def test_reserve_is_rejected_without_credits(self):
+        redis = FakeBudgetRedis()
+        manager = BudgetManager(redis_client=redis, monthly_limit=2.0)
+        
+        results = [await manager.reserve_credits("gpt-5") for _ in range(3)]
+        
+        assert results == [True, True, False]
+        status = await manager.get_status()
+        assert status.credits_used == 2.0
+        assert status.requests_by_model == {"gpt-5": 2}
+        assert redis.script_calls == 3
+    
+    async def test_release_returns_an_unused_reservation(self):
+        redis = FakeBudgetRedis()
+        manager = BudgetManager(redis_client=redis, monthly_limit=1.0)
+        
+        assert await manager.reserve_credits("gpt-5")
+        status = await manager.release_credits("gpt-5")
+        
+        assert status.credits_used == 0.0
+        assert status.requests_by_model == {"gpt-5": 0}
+        assert await manager.reserve_credits("gpt-5")
+    
+    async def test_record_usage_never_rejects_and_updates_cache(self):
+        redis = FakeBudgetRedis()
+        manager = BudgetManager(redis_client=redis, monthly_limit=1.0)
+        
+        await manager.record_usage("gpt-5")
+        status = await manager.record_usage("claude-haiku-4.5")
+        
+        assert status.credits_used == pytest.approx(1.33)
+        assert status.requests_by_model == {"gpt-5": 1, "claude-haiku-4.5": 1}
+        # El estado devuelto por el script queda en cache: sin HGETALL adicionales
+        assert (await manager.get_status()).credits_used == pytest.approx(1.33)
+        assert redis.hgetall_calls == 0
+    
+    async def test_status_cache_invalidation(self):
+        redis = FakeBudgetRedis()
+        redis.hash = {"credits_used": "10", "credits_limit": "300", "model:gpt-5": "10",
+                      "requests_by_model": "{'gpt-4o': 3}"}
+        manager = BudgetManager(redis_client=redis)
+        
+        assert await manager.can_use_model("gpt-5")
+        assert await manager.can_use_model("gpt-5")
+        assert redis.hgetall_calls == 1
+        
+        redis.hash["credits_used"] = "300"
+        manager.invalidate_status_cache()  # Lo hace el listener de keyspace notifications
+        assert not await manager.can_use_model("gpt-5")
+        assert (await manager.get_status()).requests_by_model == {"gpt-4o": 3, "gpt-5": 10}
+    
+    async def test_own_writes_do_not_invalidate_the_cache(self):
+        redis = FakeBudgetRedis()
+        manager = BudgetManager(redis_client=redis)
+        
+        await manager.record_usage("gpt-5")
+        for event in ("hincrbyfloat", "hincrby", "hset", "expire"):
+            await manager._on_keyspace_event(event)
+        assert manager._status_cache is not None
+        
+        redis.hash["writer"] = "another-process"
+        await manager._on_keyspace_event("expire")
+        assert manager._status_cache is None
+    
+    @pytest.mark.parametrize("flags,expected", [
+        ("", "Kgh"),
+        ("Ex", "ExKgh"),
+        ("KEA", None),  # "A" ya incluye g y h: no se toca la configuración
+    ])
+    async def test_keyspace_flags_are_merged(self, flags, expected):
+        redis = FakeConfigRedis(flags)
+        manager = BudgetManager(redis_client=None)
+        manager.redis = redis
+        
+        await manager._enable_keyspace_events()
+        
+        assert redis.set_calls == ([expected] if expected else [])
+    
+    async def test_alert_sent_once_when_crossing_threshold(self, monkeypatch):
+        redis = FakeBudgetRedis()
+        manager = BudgetManager(redis_client=redis, monthly_limit=3.0)
+        alerts = []
+        
+        async def send_alert(status):
+            alerts.append(status.credits_used)
+        
+        monkeypatch.setattr(manager, "_send_alert", send_alert)
+        for _ in range(3):
+            await manager.record_usage("gpt-5")
+        
+        assert alerts == [3.0]  # 80% de 3 créditos se cruza en el tercer uso
+
+
 # Documentación de limitaciones
 """
 === TESTS NO IMPLEMENTADOS (Requieren Integration Testing) ===
@@ -217,8 +362,8 @@ Están cubiertos por integration tests en test_pipeline_manual.py:
    - Valida lógica de presupuesto con estado persistente
    
 2. test_record_usage_updates_redis()
-   - Verifica que record_usage() incrementa counters en Redis
-   - Valida atomicidad con locks
+   - Verifica el script Lua de reserva contra un Redis real
+     (la lógica del cliente se cubre en TestBudgetAccounting con un hash en memoria)
    
 3. test_get_status_from_redis()
    - Verifica que get_status() carga estado actual de Redis
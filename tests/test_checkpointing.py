@@ -0,0 +1,104 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List, TypedDict
+from unittest.mock import patch
+
+from langgraph.graph import END, START, StateGraph
+
+import api.server as server
+from core.checkpointing import open_checkpointer, thread_config
+
+
+class ToyState(TypedDict, total=False):
+    concept: str
+    genre: str
+    steps: List[str]
+    awaiting_input: bool
+    director_questions: List[str]
+
+
+def build_graph(checkpointer, calls):
+    async def director(state):
+        calls.append("director")
+        vague = "Clarifications" not in state["concept"]
+        return {"awaiting_input": vague, "director_questions": ["Which genre?"] if vague else [],
+                "steps": state.get("steps", []) + ["director"]}
+
+    async def mechanics_designer(state):
+        calls.append("mechanics_designer")
+        return {"steps": state["steps"] + ["mechanics_designer"]}
+
+    async def producer(state):
+        calls.append("producer")
+        return {"steps": state["steps"] + ["producer"]}
+
+    workflow = StateGraph(ToyState)
+    workflow.add_node("director", director)
+    workflow.add_node("mechanics_designer", mechanics_designer)
+    workflow.add_node("producer", producer)
+    workflow.add_edge(START, "director")
+    workflow.add_conditional_edges("director", lambda s: END if s["awaiting_input"] else "mechanics_designer")
+    workflow.add_edge("mechanics_designer", "producer")
+    workflow.add_edge("producer", END)
+    return workflow.compile(checkpointer=checkpointer, interrupt_before=["producer"])
+
+
+class TestResumableRuns(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("config.settings.settings.CHECKPOINT_SQLITE_PATH", str(Path(self.tmp.name) / "checkpoints.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sqlite_checkpoints_survive_reopen(self):
+        calls = []
+
+        async def scenario():
+            async with open_checkpointer("sqlite") as checkpointer:
+                graph = build_graph(checkpointer, calls)
+                await graph.ainvoke({"concept": "Clarifications: racing"}, thread_config("job-1"))
+            # New process / connection: only the pending node runs
+            async with open_checkpointer("sqlite") as checkpointer:
+                graph = build_graph(checkpointer, calls)
+                self.assertEqual((await graph.aget_state(thread_config("job-1"))).next, ("producer",))
+                return await graph.ainvoke(None, thread_config("job-1"))
+
+        result = asyncio.run(scenario())
+
+        self.assertEqual(calls, ["director", "mechanics_designer", "producer"])
+        self.assertEqual(result["steps"], ["director", "mechanics_designer", "producer"])
+
+    def test_job_resumes_after_director_answer_and_gate(self):
+        calls = []
+
+        async def scenario():
+            async with open_checkpointer("sqlite") as checkpointer:
+                with patch.object(server, "_job_graph", build_graph(checkpointer, calls)):
+                    job = server.executor.submit({"concept": "A racer", "genre": "Racing"}, provider="test")
+                    await server.executor.wait(job.id)
+                    statuses = [(job.status, job.current_phase)]
+
+                    await server.resume_job(job.id, answer="Arcade racing")
+                    await server.executor.wait(job.id)
+                    statuses.append((job.status, job.current_phase))
+
+                    await server.resume_job(job.id)
+                    await server.executor.wait(job.id)
+                    statuses.append((job.status, job.current_phase))
+                    return statuses
+
+        statuses = asyncio.run(scenario())
+
+        self.assertEqual(statuses, [
+            ("interrupted", "director"),
+            ("interrupted", "producer"),
+            ("completed", "producer"),
+        ])
+        self.assertEqual(calls, ["director", "director", "mechanics_designer", "producer"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from api.connection_manager import ALL_JOBS, ClientConnection, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+class TestClientConnection(unittest.TestCase):
+    def test_coalesces_and_drops_non_critical_first(self):
+        connection = ClientConnection(FakeWebSocket(), max_queue=3)
+
+        connection.enqueue({"type": "status", "job_id": "a", "status": "started"})
+        connection.enqueue({"type": "gdd_update", "job_id": "a", "markdown": "v1"})
+        connection.enqueue({"type": "gdd_update", "job_id": "a", "markdown": "v2"})
+        connection.enqueue({"type": "tool_call_started", "job_id": "a"})
+        connection.enqueue({"type": "error", "job_id": "a"})
+
+        queued = [entry[1] for entry in connection._queue]
+        self.assertEqual([m["type"] for m in queued], ["status", "tool_call_started", "error"])
+        self.assertEqual((connection.coalesced, connection.dropped), (1, 1))
+
+        connection.enqueue({"type": "gdd_update", "job_id": "a", "markdown": "v3"})
+        self.assertEqual(connection._queue[-1][1]["markdown"], "v3")
+
+
+class TestConnectionManager(unittest.TestCase):
+    def test_topics_and_slow_clients(self):
+        async def scenario():
+            manager = ConnectionManager(max_queue=8)
+            fast, slow, other = FakeWebSocket(), FakeWebSocket(delay=0.2), FakeWebSocket()
+            await manager.connect(fast, ["job-1"])
+            await manager.connect(slow, [ALL_JOBS])
+            await manager.connect(other, ["job-2"])
+
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            for i in range(5):
+                manager.publish("job-1", {"type": "agent_update", "job_id": "job-1", "n": i})
+            publish_time = loop.time() - started
+
+            await asyncio.sleep(0.05)
+            await manager.close_all()
+            return publish_time, fast, slow, other
+
+        publish_time, fast, slow, other = asyncio.run(scenario())
+
+        self.assertLess(publish_time, 0.05)
+        self.assertEqual([m["n"] for m in fast.sent], [0, 1, 2, 3, 4])
+        self.assertEqual(slow.sent, [])
+        self.assertEqual(other.sent, [])
+
+    def test_stalled_client_is_disconnected(self):
+        async def scenario():
+            manager = ConnectionManager()
+            stalled = FakeWebSocket(delay=1.0)
+            await manager.connect(stalled, ["job-1"])
+            manager.publish("job-1", {"type": "status", "job_id": "job-1"})
+            await asyncio.sleep(0.1)
+            return manager, stalled
+
+        with patch("config.settings.settings.WS_SEND_TIMEOUT", 0.02):
+            manager, stalled = asyncio.run(scenario())
+
+        self.assertEqual(manager.get_stats()["connections"], 0)
+        self.assertTrue(stalled.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
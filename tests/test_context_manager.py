@@ -1,6 +1,11 @@
 import unittest
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from core.context_manager import ContextManager
+from types import SimpleNamespace
+
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
+from langchain_core.tools import tool
+from pydantic import BaseModel
+
+from core.context_manager import ContextManager, message_tokens, tool_schema_tokens
 from core.state_v2 import SpiralState, CoreState, WorkingState
 
 class TestContextManager(unittest.TestCase):
@@ -59,5 +64,90 @@ class TestContextManager(unittest.TestCase):
         # Check values
         self.assertEqual(view["concept"], "Epic RPG")
 
+    def _tool_turn(self, i, size):
+        call = AIMessage(content="", tool_calls=[{"name": "search", "args": {"q": str(i)}, "id": f"call_{i}"}])
+        return [call, ToolMessage(content=f"result {i} " + "data " * size, tool_call_id=f"call_{i}")]
+
+    def test_build_context_fits_budget(self):
+        messages = [SystemMessage(content="System"), HumanMessage(content="Design the economy")]
+        for i in range(6):
+            messages.extend(self._tool_turn(i, 2000))
+
+        prompt = self.cm.build_context(messages, context_window=4000, reserved_tokens=1000)
+
+        self.assertLessEqual(sum(message_tokens(m) for m in prompt), 3000)
+        self.assertEqual(prompt[0].content, "System")
+        self.assertEqual(prompt[1].content, "Design the economy")
+        # Latest turn is kept, old tool outputs are summarized first
+        self.assertEqual(prompt[-1].tool_call_id, "call_5")
+        self.assertTrue(any("tool output summarized" in m.content for m in prompt if isinstance(m, ToolMessage)))
+        # Tool calls are never separated from their results
+        for index, message in enumerate(prompt):
+            if isinstance(message, ToolMessage):
+                self.assertIsInstance(prompt[index - 1], (AIMessage, ToolMessage))
+        # The caller's messages are not modified
+        self.assertTrue(messages[-1].content.startswith("result 5 data data"))
+        self.assertNotIn("summarized", messages[-1].content)
+
+    def test_build_context_drops_oldest_turns(self):
+        messages = [SystemMessage(content="System"), HumanMessage(content="Task")]
+        for i in range(10):
+            messages.append(AIMessage(content=f"step {i} " + "words " * 100))
+
+        prompt = self.cm.build_context(messages, context_window=1000, reserved_tokens=200)
+
+        self.assertLessEqual(sum(message_tokens(m) for m in prompt), 800)
+        self.assertEqual(prompt[-1].content.split()[1], "9")
+        self.assertLess(len(prompt), len(messages))
+
+    def test_build_context_injects_role_view(self):
+        state = {
+            "concept": "Epic RPG",
+            "mechanics": [{"name": "Jump"}],
+            "market_analysis": {"target_audience": "Teens"},
+        }
+        messages = [SystemMessage(content="System"), HumanMessage(content="Plan QA")]
+
+        prompt = self.cm.build_context(messages, state=state, agent_role="QAPlanner", context_window=8000)
+
+        self.assertEqual(len(prompt), 3)
+        self.assertIn("mechanics", prompt[1].content)
+        self.assertNotIn("market_analysis", prompt[1].content)
+        # Roles without an explicit mapping get no view
+        self.assertEqual(len(self.cm.build_context(messages, state=state, agent_role="Producer")), 2)
+
+    def test_oversized_task_is_truncated(self):
+        messages = [SystemMessage(content="System"), HumanMessage(content="word " * 5000)]
+        prompt = self.cm.build_context(messages, context_window=1000, reserved_tokens=200)
+        self.assertLessEqual(sum(message_tokens(m) for m in prompt), 800)
+
+    def test_tool_schemas_are_subtracted_from_the_budget(self):
+        @tool
+        def lookup_mechanic(name: str, genre: str = "platformer") -> str:
+            """Look up how a genre usually implements a mechanic, with examples and pitfalls."""
+            return name
+
+        class Plan(BaseModel):
+            title: str
+            steps: list[str]
+
+        tool_tokens = tool_schema_tokens([lookup_mechanic], Plan)
+        self.assertGreater(tool_tokens, tool_schema_tokens([lookup_mechanic]))
+
+        messages = [SystemMessage(content="System"), HumanMessage(content="Task")]
+        for i in range(10):
+            messages.append(AIMessage(content=f"step {i} " + "words " * 100))
+        prompt = self.cm.build_context(
+            messages, context_window=1000, reserved_tokens=200, tool_tokens=tool_tokens
+        )
+
+        self.assertLessEqual(sum(message_tokens(m) for m in prompt), 800 - tool_tokens)
+
+    def test_resolve_context_window(self):
+        self.assertEqual(self.cm.resolve_context_window(SimpleNamespace(model_name="gemini-2.5-pro")), 1_000_000)
+        self.assertEqual(self.cm.resolve_context_window(SimpleNamespace(num_ctx=32768, model="mistral:7b")), 32768)
+        self.assertEqual(self.cm.resolve_context_window(SimpleNamespace(model="unknown")), 32_000)
+
+
 if __name__ == '__main__':
     unittest.main()
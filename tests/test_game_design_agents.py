@@ -94,7 +94,9 @@ async def test_system_designer_node(mock_retrieval_tool, mock_invoke, mock_creat
     result = await system_designer_node(mock_state)
     
     assert isinstance(result, dict)
-    assert "current_step" in result
+    assert "technical_stack" in result
+    # Partial update: routing is left to the graph
+    assert "current_step" not in result
     mock_invoke.assert_called_once()
 
 
@@ -0,0 +1,92 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.rag.bm25_index import BM25Index, contains_identifier, tokenize
+from core.rag.hybrid_retrieval import reciprocal_rank_fusion
+from core.rag.rag_engine import RealRAGEngine
+from core.rag.retrieval_cache import get_retrieval_cache
+from core.rag.store_registry import close_vector_stores
+
+DOCS = {
+    "physics": "Use Rigidbody.AddForce to apply a continuous force to a physics body.",
+    "torque": "Rigidbody.AddTorque applies rotational force around an axis.",
+    "movement": "UCharacterMovementComponent handles walking, falling and swimming in Unreal.",
+    "camera": "Cinemachine virtual cameras blend between shots for third-person games.",
+    "input": "The Input System maps devices to actions such as jump and move.",
+}
+
+
+class TestBM25(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = BM25Index(Path(self.tmp.name) / "bm25.sqlite")
+        self.index.upsert(list(DOCS), list(DOCS.values()))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_tokenize_keeps_api_names(self):
+        self.assertEqual(tokenize("Rigidbody.AddForce()"), ["rigidbody.addforce", "rigidbody", "addforce"])
+        self.assertTrue(contains_identifier("how does UCharacterMovementComponent work"))
+        self.assertFalse(contains_identifier("how to implement a grappling hook"))
+
+    def test_exact_api_name_ranks_first(self):
+        self.assertEqual(self.index.search("Rigidbody.AddForce", k=2)[0][0], "physics")
+        self.assertEqual(self.index.search("UCharacterMovementComponent jump", k=1)[0][0], "movement")
+
+    def test_upsert_and_delete_update_postings(self):
+        self.index.upsert(["camera"], ["Rigidbody.AddForce on the camera rig"])
+        self.index.delete(["physics"])
+
+        self.assertEqual([doc_id for doc_id, _ in self.index.search("AddForce")], ["camera"])
+        self.assertEqual(self.index.count(), 4)
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+        self.assertEqual([doc_id for doc_id, _ in fused][:2], ["c", "a"])
+
+
+class TestHybridRAGEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = RealRAGEngine(persist_directory=str(Path(self.tmp.name) / "chroma_db"))
+        # Dense retriever that ignores API names: every doc is equally close
+        self.engine.embedding_function = lambda texts: [[1.0, 0.0, 0.0] for _ in texts]
+        get_retrieval_cache().clear()
+
+    def tearDown(self):
+        close_vector_stores()
+        self.tmp.cleanup()
+
+    def _upsert(self):
+        ids = list(DOCS)
+        self.engine.upsert_documents(
+            ids=ids,
+            documents=list(DOCS.values()),
+            metadatas=[{"source": "test"} for _ in ids],
+            embeddings=[[1.0, 0.01 * i, 0.0] for i in range(len(ids))],
+        )
+
+    def test_lexical_hits_reach_top_results(self):
+        self._upsert()
+
+        results = self.engine.query("UCharacterMovementComponent", n_results=2)
+
+        self.assertEqual(results[0]["id"], "movement")
+        self.assertEqual(results[0]["metadata"], {"source": "test"})
+        self.assertEqual(len(results), 2)
+
+    def test_existing_collection_is_backfilled(self):
+        ids = list(DOCS)
+        self.engine.collection.upsert(
+            ids=ids, documents=list(DOCS.values()), embeddings=[[1.0, 0.0, 0.0]] * len(ids)
+        )
+
+        self.assertEqual(self.engine.query("AddTorque", n_results=1)[0]["id"], "torque")
+        self.assertEqual(self.engine.lexical_index.count(), len(DOCS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from core.rag.doc_ingestor import DocIngestor
+from core.rag.ingestion_pipeline import (
+    IngestionManifest,
+    IngestionPipeline,
+    chunk_ids,
+    content_hash,
+    iter_file_documents,
+    iter_source_files,
+)
+
+
+class LineSplitter:
+    def split_text(self, text):
+        return [line for line in text.splitlines() if line]
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.calls.append(len(texts))
+        return [[float(len(t))] for t in texts]
+
+
+class RecordingSink:
+    def __init__(self, fail_on_call=None):
+        self.rows = {}
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.rows[doc_id]
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("store unavailable")
+        for i, doc_id in enumerate(ids):
+            self.rows[doc_id] = (documents[i], metadatas[i], embeddings[i] if embeddings else None)
+
+
+def make_docs(count, lines=3):
+    return [
+        Document(id=f"doc{d}", page_content="\n".join(f"d{d} line {i}" for i in range(lines)))
+        for d in range(count)
+    ]
+
+
+class TestIngestionPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batches_embeddings_and_upserts(self):
+        embeddings, sink = FakeEmbeddings(), RecordingSink()
+        pipeline = IngestionPipeline(
+            sink.upsert, embeddings=embeddings, splitter=LineSplitter(), batch_size=4, max_workers=3
+        )
+
+        stats = pipeline.run(make_docs(5))
+
+        self.assertEqual(stats.documents, 5)
+        self.assertEqual(stats.chunks, 15)
+        self.assertEqual(sorted(embeddings.calls, reverse=True), [4, 4, 4, 3])
+        self.assertEqual(sink.calls, 4)
+        text, metadata, vector = sink.rows[chunk_ids("doc2", [content_hash("d2 line 1")])[0]]
+        self.assertEqual((text, metadata["chunk_index"], vector), ("d2 line 1", 1, [9.0]))
+
+    def test_source_is_consumed_lazily(self):
+        """Back-pressure: the generator never runs far ahead of the committed batches"""
+        sink = RecordingSink()
+        produced = []
+
+        def source():
+            for doc in make_docs(20, lines=1):
+                produced.append(doc.id)
+                # At most max_pending_batches (2) batches of 1 chunk are in flight
+                self.assertLessEqual(len(produced) - sink.calls, 3)
+                yield doc
+
+        pipeline = IngestionPipeline(
+            sink.upsert, embeddings=FakeEmbeddings(), splitter=LineSplitter(),
+            batch_size=1, max_workers=1, max_pending_batches=2,
+        )
+        self.assertEqual(pipeline.run(source()).chunks, 20)
+
+    def test_resume_skips_completed_documents(self):
+        manifest_path = self.root / "manifest.json"
+        failing = RecordingSink(fail_on_call=3)
+        pipeline = IngestionPipeline(
+            failing.upsert, failing.delete, splitter=LineSplitter(), batch_size=3, max_workers=1,
+            manifest=IngestionManifest(manifest_path),
+        )
+        with self.assertRaises(RuntimeError):
+            pipeline.run(make_docs(5))
+
+        # doc0 and doc1 were fully written before the failure
+        self.assertEqual(set(IngestionManifest(manifest_path).documents), {"doc0", "doc1"})
+
+        embeddings, sink = FakeEmbeddings(), RecordingSink()
+        resumed = IngestionPipeline(
+            sink.upsert, sink.delete, embeddings=embeddings, splitter=LineSplitter(), batch_size=3,
+            manifest=IngestionManifest(manifest_path),
+        )
+        stats = resumed.run(make_docs(5))
+
+        self.assertEqual((stats.documents_skipped, stats.documents_new), (2, 3))
+        self.assertEqual(sum(embeddings.calls), 9)
+
+    def test_reindex_only_embeds_changed_chunks(self):
+        sink = RecordingSink()
+        manifest = IngestionManifest(self.root / "manifest.json")
+        docs = make_docs(3, lines=4)
+        IngestionPipeline(sink.upsert, sink.delete, splitter=LineSplitter(), manifest=manifest).run(docs)
+        before = set(sink.rows)
+
+        # Insert a line into doc1, delete doc2, add doc3
+        edited = docs[1].page_content.replace("d1 line 1", "d1 line 1\ninserted")
+        embeddings = FakeEmbeddings()
+        stats = IngestionPipeline(
+            sink.upsert, sink.delete, embeddings=embeddings, splitter=LineSplitter(), manifest=manifest
+        ).run(
+            [docs[0], Document(id="doc1", page_content=edited), Document(id="doc3", page_content="new")],
+            prune_missing=True,
+        )
+
+        self.assertEqual(embeddings.calls, [2])  # 'inserted' + 'new'
+        self.assertEqual(
+            (stats.documents_new, stats.documents_changed, stats.documents_skipped, stats.documents_deleted),
+            (1, 1, 1, 1),
+        )
+        self.assertEqual((stats.chunks_reused, stats.chunks_deleted), (4, 4))
+        # Chunks after the insertion keep their ids
+        doc1_ids = {i for i in before if i.startswith("doc1#")}
+        self.assertTrue(doc1_ids <= set(sink.rows))
+        self.assertFalse(any(i.startswith("doc2#") for i in sink.rows))
+        self.assertEqual(set(manifest.documents), {"doc0", "doc1", "doc3"})
+
+    def test_chunk_ids_are_content_addressed(self):
+        self.assertEqual(chunk_ids("a.md", ["h1", "h2", "h1"]), ["a.md#h1", "a.md#h2", "a.md#h1-1"])
+
+    def test_file_sources(self):
+        (self.root / "b").mkdir()
+        (self.root / "a.md").write_text("alpha", encoding="utf-8")
+        (self.root / "b" / "c.txt").write_text("gamma", encoding="utf-8")
+        (self.root / "skip.pdf").write_text("x", encoding="utf-8")
+
+        paths = list(iter_source_files(self.root))
+        docs = list(iter_file_documents(paths, metadata={"source": "unity_docs"}, doc_id=lambda p: p.name))
+
+        self.assertEqual([p.name for p in paths], ["a.md", "c.txt"])
+        self.assertEqual(docs[0].id, "a.md")
+        self.assertEqual(docs[1].metadata["source"], "unity_docs")
+        self.assertEqual(docs[1].metadata["filename"], "c.txt")
+
+    def test_same_named_files_do_not_collide(self):
+        docs = self.root / "unity"
+        for section in ("Manual", "ScriptReference"):
+            (docs / section).mkdir(parents=True)
+            (docs / section / "index.md").write_text(f"{section} intro", encoding="utf-8")
+        sink = RecordingSink()
+        engine = type("Engine", (), {"upsert_documents": sink.upsert, "delete_documents": sink.delete})()
+        ingestor = DocIngestor(engine, manifest_path=str(self.root / "manifest.json"), splitter=LineSplitter())
+
+        with patch("builtins.print"):
+            ingestor.ingest_directory(str(docs), "unity_docs")
+        self.assertEqual(
+            sorted(doc_id.split("#")[0] for doc_id in sink.rows),
+            ["unity/Manual/index.md", "unity/ScriptReference/index.md"],
+        )
+        self.assertEqual(
+            set(ingestor.manifest.documents), {"unity/Manual/index.md", "unity/ScriptReference/index.md"}
+        )
+
+    def test_manifest_defaults_next_to_the_store(self):
+        """Without a manifest an edited file would leave its old chunks orphaned"""
+        docs = self.root / "docs"
+        docs.mkdir()
+        (docs / "a.md").write_text("keep\nold", encoding="utf-8")
+        sink = RecordingSink()
+        engine = type("Engine", (), {
+            "persist_directory": str(self.root / "chroma_db"),
+            "collection_name": "game_engine_docs",
+            "upsert_documents": sink.upsert,
+            "delete_documents": sink.delete,
+            "count_documents": lambda self: len(sink.rows),
+        })()
+
+        with patch("builtins.print"):
+            DocIngestor(engine, splitter=LineSplitter()).ingest_directory(str(docs), "unity_docs")
+            (docs / "a.md").write_text("keep\nnew", encoding="utf-8")
+            DocIngestor(engine, splitter=LineSplitter()).ingest_directory(str(docs), "unity_docs")
+
+        self.assertTrue((self.root / "chroma_db_manifests" / "game_engine_docs.json").exists())
+        self.assertEqual(sorted(row[0] for row in sink.rows.values()), ["keep", "new"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import asyncio
+import unittest
+
+from core.job_executor import AdmissionError, JobExecutor, JobInterrupted
+
+
+class TestJobExecutor(unittest.TestCase):
+    def _run(self, scenario):
+        return asyncio.run(scenario())
+
+    def test_priority_order_with_single_worker(self):
+        started = []
+
+        async def runner(job):
+            started.append(job.payload["name"])
+            await asyncio.sleep(0.01)
+
+        async def scenario():
+            executor = JobExecutor(runner, max_workers=1, provider_limits={})
+            jobs = [
+                executor.submit({"name": "first"}, priority="low"),
+                executor.submit({"name": "low"}, priority="low"),
+                executor.submit({"name": "normal"}),
+                executor.submit({"name": "high"}, priority="high"),
+            ]
+            self.assertEqual(executor.queue_position(jobs[3].id), 1)
+            for job in jobs:
+                await executor.wait(job.id)
+            return jobs
+
+        jobs = self._run(scenario)
+
+        self.assertEqual(started, ["first", "high", "normal", "low"])
+        self.assertTrue(all(job.status == "completed" for job in jobs))
+
+    def test_provider_limit_does_not_block_other_providers(self):
+        peak = {"groq": 0, "github": 0}
+        active = {"groq": 0, "github": 0}
+        order = []
+
+        async def runner(job):
+            active[job.provider] += 1
+            peak[job.provider] = max(peak[job.provider], active[job.provider])
+            order.append(job.provider)
+            await asyncio.sleep(0.02)
+            active[job.provider] -= 1
+
+        async def scenario():
+            executor = JobExecutor(runner, max_workers=4, provider_limits={"groq": 1})
+            jobs = [executor.submit({}, provider="groq") for _ in range(3)]
+            jobs.append(executor.submit({}, provider="github"))
+            self.assertEqual(executor.get_stats()["running"], 2)
+            await asyncio.gather(*[executor.wait(job.id) for job in jobs])
+
+        self._run(scenario)
+
+        self.assertEqual(peak["groq"], 1)
+        self.assertEqual(order[:2], ["groq", "github"])
+
+    def test_routed_jobs_are_limited(self):
+        """provider="auto" jobs must not bypass admission control"""
+        executor = JobExecutor(lambda job: asyncio.sleep(0))
+        self.assertIn("auto", executor.provider_limits)
+
+    def test_admission_rejects_full_queue_and_bad_priority(self):
+        async def runner(job):
+            await asyncio.sleep(1)
+
+        async def scenario():
+            executor = JobExecutor(runner, max_workers=1, max_queued=1, provider_limits={})
+            executor.submit({})
+            executor.submit({})
+            with self.assertRaises(AdmissionError):
+                executor.submit({})
+            with self.assertRaises(AdmissionError):
+                executor.submit({}, priority="urgent")
+            await executor.shutdown()
+
+        self._run(scenario)
+
+    def test_cancel_and_interrupt(self):
+        async def runner(job):
+            if job.payload.get("gate"):
+                raise JobInterrupted(("producer",))
+            await asyncio.sleep(10)
+
+        async def scenario():
+            executor = JobExecutor(runner, max_workers=1, provider_limits={})
+            running = executor.submit({})
+            queued = executor.submit({})
+            gated = executor.submit({"gate": True})
+            self.assertTrue(executor.cancel(queued.id))
+            await asyncio.sleep(0)
+            self.assertTrue(executor.cancel(running.id))
+            await executor.wait(gated.id)
+            self.assertEqual((gated.status, gated.current_phase), ("interrupted", "producer"))
+            # A parked job can be abandoned, but only once
+            self.assertTrue(executor.cancel(gated.id))
+            self.assertFalse(executor.cancel(gated.id))
+            return running, queued, gated
+
+        running, queued, gated = self._run(scenario)
+
+        self.assertEqual((running.status, queued.status, gated.status), ("cancelled", "cancelled", "cancelled"))
+        self.assertNotEqual(running.config["configurable"]["thread_id"], gated.config["configurable"]["thread_id"])
+
+    def test_resume_requeues_on_same_thread(self):
+        runs = []
+
+        async def runner(job):
+            runs.append(job.payload.get("resume"))
+            if len(runs) == 1:
+                raise RuntimeError("node crashed")
+
+        async def scenario():
+            executor = JobExecutor(runner, max_workers=1, provider_limits={}, history_size=1)
+            job = executor.submit({})
+            await executor.wait(job.id)
+            self.assertEqual((job.status, job.error), ("failed", "node crashed"))
+            self.assertIs(executor.resume(job.id, {"resume": {}}), job)
+            with self.assertRaises(AdmissionError):
+                executor.resume(job.id)
+            await executor.wait(job.id)
+            return job
+
+        job = self._run(scenario)
+
+        self.assertEqual((job.status, job.error), ("completed", None))
+        self.assertEqual(runs, [None, {}])
+
+    def test_history_is_bounded(self):
+        async def runner(job):
+            return job.payload["n"]
+
+        async def scenario():
+            executor = JobExecutor(runner, max_workers=2, provider_limits={}, history_size=3)
+            jobs = [executor.submit({"n": n}) for n in range(6)]
+            await asyncio.gather(*[executor.wait(job.id) for job in jobs])
+            return executor, jobs
+
+        executor, jobs = self._run(scenario)
+
+        self.assertEqual(len(executor.list_jobs()), 3)
+        self.assertEqual(jobs[-1].result, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
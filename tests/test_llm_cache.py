@@ -0,0 +1,109 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from core.llm_cache import LLMResponseCache, SQLiteCacheBackend
+from core.metrics import metrics_collector
+
+
+class FakeLLM:
+    model_name = "gpt-4o"
+    temperature = 0.7
+
+
+class Plan(BaseModel):
+    title: str
+    steps: list[str]
+
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backend = SQLiteCacheBackend(str(Path(self.tmp.name) / "cache.sqlite"), max_entries=2)
+        self.cache = LLMResponseCache(self.backend)
+        self.messages = [SystemMessage(content="sys"), HumanMessage(content="Design a game")]
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmp.cleanup()
+
+    def test_key_depends_on_model_parameters(self):
+        key = self.cache.make_key(FakeLLM(), [], None, self.messages)
+        hot = FakeLLM()
+        hot.temperature = 0.9
+
+        self.assertEqual(key, self.cache.make_key(FakeLLM(), [], None, list(self.messages)))
+        self.assertNotEqual(key, self.cache.make_key(hot, [], None, self.messages))
+        self.assertNotEqual(key, self.cache.make_key(FakeLLM(), [], Plan, self.messages))
+
+    def test_roundtrip_message_and_structured_output(self):
+        async def run():
+            await self.cache.set("msg", AIMessage(content="hello"))
+            await self.cache.set("plan", Plan(title="MVP", steps=["a", "b"]))
+            return await self.cache.get("msg"), await self.cache.get("plan", Plan)
+
+        message, plan = asyncio.run(run())
+
+        self.assertIsInstance(message, AIMessage)
+        self.assertEqual(message.content, "hello")
+        self.assertEqual(plan, Plan(title="MVP", steps=["a", "b"]))
+
+    def test_lru_eviction(self):
+        async def run():
+            await self.cache.set("a", "1")
+            await self.cache.set("b", "2")
+            await self.cache.get("a")  # 'b' becomes least recently used
+            await self.cache.set("c", "3")
+            return [await self.cache.get(k) for k in ("a", "b", "c")]
+
+        self.assertEqual(asyncio.run(run()), ["1", None, "3"])
+
+    def test_safe_agent_invoke_replays_cached_response(self):
+        from core.agent_utils import safe_agent_invoke
+
+        llm = MagicMock()
+        llm.model_name = "gpt-4o"
+        llm.temperature = 0.7
+        llm.ainvoke = AsyncMock(return_value=AIMessage(content="fresh"))
+        metrics_collector.reset()
+
+        async def run():
+            with patch("core.agent_utils.get_llm_cache", return_value=self.cache):
+                first = await safe_agent_invoke(llm, [], self.messages, agent_name="Producer")
+                second = await safe_agent_invoke(llm, [], self.messages, agent_name="Producer")
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        self.assertEqual(first["output"], "fresh")
+        self.assertEqual(second["output"], "fresh")
+        llm.ainvoke.assert_awaited_once()
+        self.assertEqual(metrics_collector.get_cache_summary()["by_agent"]["Producer"], {"hits": 1, "misses": 1})
+
+    def test_creative_temperatures_skip_the_cache(self):
+        from core.agent_utils import safe_agent_invoke
+
+        llm = MagicMock()
+        llm.model_name = "gpt-4o"
+        llm.temperature = 0.85
+        llm.ainvoke = AsyncMock(return_value=AIMessage(content="fresh"))
+
+        async def run():
+            with patch("core.agent_utils.get_llm_cache", return_value=self.cache) as get_cache:
+                for _ in range(2):
+                    await safe_agent_invoke(llm, [], self.messages, agent_name="NarrativeArchitect")
+            return get_cache
+
+        get_cache = asyncio.run(run())
+
+        self.assertEqual(llm.ainvoke.await_count, 2)
+        get_cache.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
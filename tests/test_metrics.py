@@ -0,0 +1,129 @@
+import random
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.metrics_router import router
+from core.langgraph_monitoring import LangGraphMonitor
+from core.metrics import StreamingHistogram, metrics_collector
+
+
+class TestStreamingHistogram(unittest.TestCase):
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(7, 1.5) for _ in range(20_000)]
+        hist = StreamingHistogram(relative_accuracy=0.01)
+        for value in values:
+            hist.add(value)
+
+        values.sort()
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(hist.quantile(q), exact, delta=exact * 0.02)
+        self.assertEqual(hist.count, len(values))
+        self.assertEqual(hist.count_le(values[-1]), len(values))
+
+    def test_memory_is_bounded(self):
+        hist = StreamingHistogram(relative_accuracy=0.01, max_buckets=64)
+        values = [step * 10.0 ** exponent for exponent in range(-6, 9) for step in range(1, 100)]
+        for value in values:
+            hist.add(value)
+
+        # Merging the lowest buckets keeps memory fixed and the high quantiles accurate
+        self.assertLessEqual(len(hist.buckets), 64)
+        exact = sorted(values)[int(0.99 * (len(values) - 1))]
+        self.assertAlmostEqual(hist.quantile(0.99), exact, delta=exact * 0.02)
+
+    def test_empty_and_zero_values(self):
+        hist = StreamingHistogram()
+        self.assertEqual(hist.quantile(0.5), 0.0)
+        hist.add(0)
+        hist.add(0)
+        hist.add(10)
+        self.assertEqual(hist.quantile(0.5), 0.0)
+        self.assertEqual(hist.count_le(0), 2)
+
+
+class TestMetricsCollector(unittest.TestCase):
+    def setUp(self):
+        metrics_collector.reset()
+
+    def _run(self, agent, latency_ms, tokens, failed=False):
+        metric = metrics_collector.start_agent(agent)
+        metric.start_time -= latency_ms / 1000
+        if failed:
+            metric.fail("boom", tokens=tokens, cost_usd=0.01)
+        else:
+            metric.complete(tokens=tokens, cost_usd=0.01)
+        return metric
+
+    def test_summary_from_aggregates_with_bounded_history(self):
+        limit = metrics_collector.metrics.maxlen
+        for _ in range(limit + 50):
+            self._run("EconomyBalancer", 200, 1000)
+        self._run("Producer", 500, 0, failed=True)
+        metrics_collector.start_agent("Producer")  # Still running
+
+        summary = metrics_collector.get_summary()
+        self.assertEqual(len(metrics_collector.metrics), limit)
+        self.assertEqual(summary["total_executions"], limit + 52)
+        self.assertEqual(summary["completed"], limit + 50)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["total_tokens"], (limit + 50) * 1000)
+        self.assertAlmostEqual(summary["avg_latency_ms"], 200, delta=20)
+        self.assertAlmostEqual(summary["agents"]["EconomyBalancer"]["latency_ms"]["p95"], 200, delta=20)
+        self.assertEqual(summary["agents"]["Producer"]["executions"], 2)
+        self.assertAlmostEqual(summary["total_cost_usd"], (limit + 51) * 0.01)
+
+        recent = metrics_collector.get_recent_executions(2)
+        self.assertEqual([r["status"] for r in recent], ["running", "failed"])
+
+    def test_execution_is_aggregated_once(self):
+        metric = self._run("Producer", 100, 10)
+        metric.complete(tokens=10)
+        self.assertEqual(metrics_collector.get_summary()["completed"], 1)
+
+    def test_prometheus_exposition(self):
+        self._run("EconomyBalancer", 300, 1200)
+        metrics_collector.record_llm_usage("EconomyBalancer", 1000, 200, 400, 0.004)
+        metrics_collector.record_cache_lookup("EconomyBalancer", hit=True)
+
+        app = FastAPI()
+        app.include_router(router)
+        response = TestClient(app).get("/metrics/prometheus")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        body = response.text
+        self.assertIn("# TYPE ludex_agent_latency_ms histogram", body)
+        self.assertIn('ludex_agent_executions_total{agent="EconomyBalancer",status="completed"} 1', body)
+        self.assertIn('ludex_agent_latency_ms_bucket{agent="EconomyBalancer",le="250"} 0', body)
+        self.assertIn('ludex_agent_latency_ms_bucket{agent="EconomyBalancer",le="500"} 1', body)
+        self.assertIn('ludex_agent_tokens_count{agent="EconomyBalancer"} 1', body)
+        self.assertIn('ludex_llm_tokens_total{agent="EconomyBalancer",type="cached"} 400', body)
+        self.assertIn('ludex_llm_cache_lookups_total{agent="EconomyBalancer",result="hit"} 1', body)
+
+
+class TestLangGraphMonitorMemory(unittest.TestCase):
+    def test_keeps_state_keys_and_bounded_history(self):
+        monitor = LangGraphMonitor(max_history=3)
+        for i in range(5):
+            execution_id = f"exec-{i}"
+            monitor.start_graph_execution(execution_id, execution_id, {"concept": "x" * 10_000})
+            monitor.start_node_execution(execution_id, "producer", {"concept": "x" * 10_000})
+            monitor.complete_node_execution(execution_id, "producer", {"gdd": {}}, tokens_used=100, cost_usd=0.5)
+            monitor.complete_graph_execution(execution_id, {"concept": "x", "gdd": {}})
+
+        self.assertEqual([e.execution_id for e in monitor.completed_executions], ["exec-2", "exec-3", "exec-4"])
+        node = monitor.completed_executions[-1].nodes_executed[0]
+        self.assertEqual((node.input_keys, node.output_keys), (("concept",), ("gdd",)))
+
+        performance = monitor.get_performance_metrics()
+        self.assertEqual(performance["total_executions"], 5)
+        self.assertEqual(performance["total_tokens_used"], 500)
+        self.assertEqual(performance["success_rate"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from config.settings import settings
+from core import model_factory
+from core.model_factory import close_model_clients, create_model, get_http_clients
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        token = patch.object(settings, "GITHUB_TOKEN", "test-token")
+        token.start()
+        self.addCleanup(token.stop)
+
+    def tearDown(self):
+        asyncio.run(close_model_clients())
+
+    def test_create_model_reuses_instances(self):
+        llm = create_model(provider="github", model="gpt-4o", temperature=0.7)
+
+        self.assertIs(llm, create_model(provider="github", model="gpt-4o", temperature=0.7))
+        self.assertIsNot(llm, create_model(provider="github", model="gpt-4o", temperature=0.2))
+
+    def test_models_share_pool_per_endpoint(self):
+        fast = create_model(provider="github", model="gpt-4o-mini", temperature=0.7)
+        smart = create_model(provider="github", model="gpt-4o", temperature=0.7)
+
+        self.assertIs(fast.http_async_client, smart.http_async_client)
+        self.assertIs(fast.http_async_client, get_http_clients("github", fast.openai_api_base)[1])
+
+    def test_close_clears_registry(self):
+        create_model(provider="github", model="gpt-4o")
+        asyncio.run(close_model_clients())
+
+        self.assertEqual(model_factory._model_registry, {})
+        self.assertEqual(model_factory._http_clients, {})
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible endpoint with keep-alive connections."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestModelAcrossEventLoops(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        for name, value in (
+            ("GITHUB_TOKEN", "test-token"),
+            ("GITHUB_MODELS_BASE_URL", f"http://127.0.0.1:{server.server_port}"),
+        ):
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        asyncio.run(close_model_clients())
+
+    def test_registered_model_survives_a_new_loop(self):
+        """cli/main.py and per-test loops call asyncio.run more than once"""
+        llm = create_model(provider="github", model="gpt-4o", temperature=0.1)
+
+        self.assertEqual(asyncio.run(llm.ainvoke("hi")).content, "ok")
+        self.assertEqual(asyncio.run(llm.ainvoke("hi")).content, "ok")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+import uuid
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+import openai
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from config.settings import settings
+from core import model_factory
+from core.model_factory import close_model_clients, create_model, fit_fallbacks
+from core.model_router import ModelRouter
+
+
+def rate_limit_error(retry_after: str = "12") -> openai.RateLimitError:
+    response = httpx.Response(
+        429,
+        headers={"retry-after": retry_after},
+        request=httpx.Request("POST", "https://models.example/chat/completions"),
+    )
+    return openai.RateLimitError("Too Many Requests", response=response, body=None)
+
+
+class FakeProviderModel(BaseChatModel):
+    model_name: str
+    error: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-provider"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.error is not None:
+            raise self.error
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.model_name))])
+
+
+class TestModelRouterRanking(unittest.TestCase):
+    def test_faster_candidate_ranks_first(self):
+        router = ModelRouter(["ollama:slow", "ollama:fast"])
+        router.stats_for("ollama", "slow").latencies_ms.extend([4000, 5000, 6000])
+        router.stats_for("ollama", "fast").latencies_ms.extend([800, 900, 1500])
+
+        self.assertEqual([c.model for c in router.rank()], ["fast", "slow"])
+
+    def test_errors_and_quota_pressure_demote(self):
+        router = ModelRouter(["ollama:flaky", "ollama:steady"])
+        router.stats_for("ollama", "flaky").latencies_ms.extend([500] * 4)
+        router.stats_for("ollama", "flaky").errors.extend([True, True, False, False])
+        router.stats_for("ollama", "steady").latencies_ms.extend([1200] * 4)
+        self.assertEqual(router.rank()[0].model, "steady")
+
+        router = ModelRouter(["ollama:busy", "ollama:idle"])
+        busy = router.stats_for("ollama", "busy")
+        for _ in range(int(busy.requests.capacity) + 5):
+            busy.requests.reserve()
+        self.assertEqual(router.rank()[0].model, "idle")
+
+    def test_rate_limited_candidate_cools_down(self):
+        router = ModelRouter(["ollama:a", "ollama:b"])
+        router.stats_for("ollama", "a").latencies_ms.append(100)
+        router.feedback_for("ollama", "a").on_llm_error(rate_limit_error("12"), run_id=uuid.uuid4())
+
+        self.assertEqual([c.model for c in router.rank()], ["b", "a"])
+        self.assertAlmostEqual(router.get_status()["ollama:a"]["cooldown_seconds"], 12, delta=1)
+
+    @patch.object(settings, "GITHUB_TOKEN", "token")
+    def test_context_fit_and_credits(self):
+        router = ModelRouter(["ollama:mistral:7b", "github:gpt-5", "github:gpt-4o"])
+
+        # gpt-5 costs a Copilot credit per request; gpt-4o is free and as fast
+        ranked = [c.key for c in router.rank()]
+        self.assertLess(ranked.index("github:gpt-4o"), ranked.index("github:gpt-5"))
+        # Ollama's 32K window cannot hold the prompt
+        self.assertNotIn("ollama:mistral:7b", [c.key for c in router.rank(min_context=100_000)])
+
+    @patch.object(settings, "GITHUB_TOKEN", None)
+    def test_providers_without_credentials_are_skipped(self):
+        router = ModelRouter(["github:gpt-4o", "ollama:mistral:7b"])
+        self.assertEqual([c.provider for c in router.candidates()], ["ollama"])
+
+
+class TestRoutedModel(unittest.TestCase):
+    def tearDown(self):
+        asyncio.run(close_model_clients())
+
+    def test_fails_over_on_429_and_reroutes(self):
+        router = ModelRouter(["ollama:primary", "ollama:backup"])
+        router.stats_for("ollama", "primary").latencies_ms.append(100)
+
+        def build(provider, model, temperature, **kwargs):
+            error = rate_limit_error() if model == "primary" else None
+            return FakeProviderModel(model_name=model, error=error)
+
+        with patch.object(model_factory, "model_router", router), \
+                patch.object(model_factory, "_build_model", side_effect=build):
+            response = asyncio.run(create_model(provider="auto").ainvoke("hi"))
+            self.assertEqual(response.content, "backup")
+
+            # The 429 put the primary in cooldown: the next call starts on the backup
+            self.assertEqual(asyncio.run(create_model(provider="auto").ainvoke("hi")).content, "backup")
+            self.assertEqual(len(router.stats_for("ollama", "backup").latencies_ms), 2)
+
+    @patch.object(settings, "GITHUB_TOKEN", "test-token")
+    def test_fallbacks_that_cannot_hold_the_prompt_are_skipped(self):
+        router = ModelRouter(["github:gpt-4o", "ollama:small"])
+        router.stats_for("github", "gpt-4o").latencies_ms.append(100)
+
+        def build(provider, model, temperature, **kwargs):
+            return FakeProviderModel(model_name=model)
+
+        with patch.object(model_factory, "model_router", router), \
+                patch.object(model_factory, "_build_model", side_effect=build):
+            llm = create_model(provider="auto")
+
+        self.assertIs(fit_fallbacks(llm, 4_000), llm)
+        # Ollama's 32K window cannot hold a prompt sized to gpt-4o's 128K
+        self.assertIs(fit_fallbacks(llm, 100_000), llm.runnable)
+
+
+if __name__ == '__main__':
+    unittest.main()
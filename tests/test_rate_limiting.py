@@ -0,0 +1,80 @@
+import asyncio
+import time
+import unittest
+
+from core.rate_limiting import RateLimiter, TokenBucket, get_rate_limiter, reset_rate_limiters
+
+
+class FailingRedis:
+    def register_script(self, source):
+        async def script(keys, args):
+            raise ConnectionError("redis down")
+        return script
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_deficit(self):
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        # Each further reservation queues one refill interval behind the previous one
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.01)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+        bucket.refund()
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        reset_rate_limiters()
+
+    def test_waiters_are_served_fifo_and_concurrently(self):
+        limiter = RateLimiter("test", rate_per_minute=1200, burst=1)  # 20/s
+        finished = []
+
+        async def worker(i):
+            await limiter.acquire()
+            finished.append(i)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*(worker(i) for i in range(5)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+
+        self.assertEqual(finished, [0, 1, 2, 3, 4])
+        # Waiters sleep in parallel: the last one waits 4 intervals, not the sum of all waits
+        self.assertAlmostEqual(elapsed, 0.2, delta=0.1)
+
+    def test_cancelled_waiter_returns_its_token(self):
+        limiter = RateLimiter("test", rate_per_minute=60, burst=1)
+
+        async def run():
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            return limiter.local.reserve()
+
+        # Without the refund this reservation would wait two seconds
+        self.assertAlmostEqual(asyncio.run(run()), 1.0, delta=0.05)
+
+    def test_falls_back_to_local_bucket_when_redis_fails(self):
+        limiter = RateLimiter("test", rate_per_minute=60, burst=2, redis=FailingRedis())
+
+        async def run():
+            return [await limiter.acquire() for _ in range(2)]
+
+        self.assertEqual(asyncio.run(run()), [0.0, 0.0])
+
+    def test_one_limiter_per_provider(self):
+        first = get_rate_limiter("steamspy", rate_per_minute=15, burst=1)
+        self.assertIs(get_rate_limiter("steamspy", rate_per_minute=15), first)
+        self.assertIsNot(get_rate_limiter("semantic_scholar", rate_per_minute=60), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
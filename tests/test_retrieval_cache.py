@@ -0,0 +1,98 @@
+import unittest
+
+from core.rag.retrieval_cache import RetrievalCache
+
+VECTORS = {
+    "how to implement a grappling hook": [1.0, 0.0, 0.0],
+    "how to implement grappling hooks": [0.99, 0.05, 0.0],
+    "how to implement wall running": [0.0, 1.0, 0.0],
+}
+
+
+class TestRetrievalCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RetrievalCache(max_entries=2, similarity_threshold=0.95, ttl=0)
+        self.embedded = []
+        self.searched = []
+
+    def embed(self, text):
+        self.embedded.append(text)
+        return VECTORS[text.lower()]
+
+    def search(self, vector, k):
+        self.searched.append(vector)
+        return [f"doc{i}" for i in range(k)]
+
+    def retrieve(self, query, k=3, version=1, namespace="unity_docs"):
+        return self.cache.retrieve(
+            namespace, query, k, self.embed, self.search, version=version, embed_key="nomic-embed-text"
+        )
+
+    def test_exact_repeat_skips_embedding_and_search(self):
+        self.retrieve("How to implement a grappling hook")
+        self.retrieve("  how to implement  a GRAPPLING hook ")
+
+        self.assertEqual(len(self.embedded), 1)
+        self.assertEqual(len(self.searched), 1)
+        self.assertEqual(self.cache.get_stats()["exact_hits"], 1)
+
+    def test_near_duplicate_is_served_from_cache(self):
+        first = self.retrieve("How to implement a grappling hook", k=3)
+        second = self.retrieve("How to implement grappling hooks", k=2)
+        self.retrieve("How to implement wall running")
+
+        self.assertEqual(second, first[:2])
+        self.assertEqual(len(self.searched), 2)
+        self.assertEqual(self.cache.get_stats()["semantic_hits"], 1)
+
+    def test_index_version_and_namespace_isolate_entries(self):
+        self.retrieve("How to implement a grappling hook", version=1)
+        self.retrieve("How to implement a grappling hook", version=2)
+        self.retrieve("How to implement a grappling hook", version=2, namespace="godot_docs")
+
+        self.assertEqual(len(self.searched), 3)
+        # Same embedding model: the query embedding is still memoized
+        self.assertEqual(len(self.embedded), 1)
+
+    def test_lru_eviction_and_invalidate(self):
+        self.retrieve("How to implement a grappling hook")
+        self.retrieve("How to implement wall running")
+        self.retrieve("How to implement a grappling hook")  # wall running becomes LRU
+        self.retrieve("How to implement grappling hooks", k=5)  # evicts wall running
+
+        self.retrieve("How to implement wall running")
+        self.assertEqual(len(self.searched), 4)
+
+        self.cache.invalidate("unity_docs")
+        self.retrieve("How to implement wall running")
+        self.assertEqual(len(self.searched), 5)
+
+    def test_invalidated_entries_are_not_near_duplicates(self):
+        self.retrieve("How to implement a grappling hook")
+        self.cache.invalidate("unity_docs")
+        self.retrieve("How to implement grappling hooks")
+
+        self.assertEqual(len(self.searched), 2)
+        self.assertEqual(self.cache.get_stats()["semantic_hits"], 0)
+
+    def test_similarity_is_scored_without_the_lock(self):
+        """Concurrent RAG lookups must not queue behind one another's scan"""
+        self.retrieve("How to implement a grappling hook")
+        index = self.cache._namespace_index("unity_docs")
+        cache, matrix = self.cache, index.matrix
+
+        class ProbeMatrix:
+            shape = matrix.shape
+
+            def __matmul__(self, other):
+                assert not cache._lock.locked()
+                return matrix @ other
+
+        index.matrix = ProbeMatrix()
+        self.retrieve("How to implement grappling hooks")
+
+        self.assertEqual(self.cache.get_stats()["semantic_hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
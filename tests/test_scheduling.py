@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from langgraph.graph import StateGraph, START, END
+
+from core.scheduling import (
+    as_partial_update,
+    build_dependencies,
+    topological_layers,
+    transitive_reduction,
+)
+from core.state import GameDesignState, ParallelGameDesignState
+
+PRODUCTION = [
+    "narrative_architect", "world_builder", "art_director", "environment_artist",
+    "audio_director", "physics_engineer", "gdd_writer",
+]
+
+
+class TestScheduling(unittest.TestCase):
+    def test_independent_agents_share_a_layer(self):
+        """audio_director and physics_engineer only wait for environment_design"""
+        deps = transitive_reduction(build_dependencies(PRODUCTION))
+
+        self.assertEqual(deps["audio_director"], {"environment_artist"})
+        self.assertEqual(deps["physics_engineer"], {"environment_artist"})
+
+        layers = topological_layers(deps)
+        same_layer = [layer for layer in layers if "audio_director" in layer][0]
+        self.assertIn("physics_engineer", same_layer)
+        self.assertEqual(layers[-1], ["gdd_writer"])
+
+    def test_registry_dependencies_are_resolved(self):
+        """UIUXDesigner -> CameraDesigner only exists in SYNERGY_REGISTRY"""
+        deps = build_dependencies(["ui_ux_designer", "camera_designer"], view_mappings={})
+        self.assertEqual(deps["camera_designer"], {"ui_ux_designer"})
+
+    def test_cycle_is_rejected(self):
+        with self.assertRaises(ValueError):
+            topological_layers({"a": {"b"}, "b": {"a"}})
+
+    def test_partial_update_only_emits_changes(self):
+        async def node(state):
+            return {**state, "audio_design": {"music": "synth"}, "errors": state["errors"] + ["x"]}
+
+        state = {"concept": "c", "errors": ["old"], "audio_design": None}
+        update = asyncio.run(as_partial_update(node)(state))
+
+        self.assertEqual(update, {"audio_design": {"music": "synth"}, "errors": ["x"]})
+
+    def test_in_place_mutations_are_kept(self):
+        """The director sets keys on the state it receives and returns it"""
+        async def node(state):
+            state["awaiting_input"] = True
+            state["production_mode"] = "vertical_slice"
+            state["refined_concept"] = "refined"
+            return state
+
+        state = {"concept": "c", "awaiting_input": False, "production_mode": None}
+        update = asyncio.run(as_partial_update(node)(state))
+
+        self.assertEqual(
+            update,
+            {"awaiting_input": True, "production_mode": "vertical_slice", "refined_concept": "refined"},
+        )
+
+    def test_guard_flags_unchanged_keys(self):
+        async def node(state):
+            return {**state, "mechanics": [{"name": "dash"}], "messages": state["messages"] + ["new"]}
+
+        state = {"concept": "c", "messages": ["old"], "mechanics": [], "audio_design": {"music": "synth"}}
+
+        with patch("core.scheduling.logger") as logger:
+            update = asyncio.run(as_partial_update(node)(state))
+        self.assertEqual(update, {"mechanics": [{"name": "dash"}], "messages": ["new"]})
+        logger.warning.assert_called_once_with(
+            "node_returned_unchanged_keys", node="node", keys=["messages", "audio_design"]
+        )
+
+        with self.assertRaises(ValueError):
+            asyncio.run(as_partial_update(node, mode="strict")(state))
+
+    def test_partial_updates_pass_the_strict_guard(self):
+        async def node(state):
+            return {"mechanics": [{"name": "dash"}], "messages": ["new"], "awaiting_input": False}
+
+        state = {"concept": "c", "messages": ["old"], "awaiting_input": False}
+        update = asyncio.run(as_partial_update(node, mode="strict")(state))
+
+        self.assertEqual(update, {"mechanics": [{"name": "dash"}], "messages": ["new"]})
+
+    def test_sequential_nodes_append_through_reducers(self):
+        async def first(state):
+            return {"messages": ["first"], "current_step": "second"}
+
+        async def second(state):
+            return {"messages": ["second"], "errors": ["oops"]}
+
+        workflow = StateGraph(GameDesignState)
+        workflow.add_node("first", as_partial_update(first, mode="strict"))
+        workflow.add_node("second", as_partial_update(second, mode="strict"))
+        workflow.add_edge(START, "first")
+        workflow.add_edge("first", "second")
+        workflow.add_edge("second", END)
+
+        result = asyncio.run(workflow.compile().ainvoke({"concept": "c", "messages": ["start"], "errors": []}))
+
+        self.assertEqual(result["messages"], ["start", "first", "second"])
+        self.assertEqual(result["errors"], ["oops"])
+        self.assertEqual(result["current_step"], "second")
+
+    def test_parallel_branches_merge(self):
+        """Two branches writing different keys and appending errors are merged"""
+        async def left(state):
+            return {**state, "audio_design": {"ok": True}, "errors": state["errors"] + ["left"]}
+
+        async def right(state):
+            return {**state, "physics_spec": {"ok": True}, "errors": state["errors"] + ["right"]}
+
+        workflow = StateGraph(ParallelGameDesignState)
+        workflow.add_node("left", as_partial_update(left))
+        workflow.add_node("right", as_partial_update(right))
+        workflow.add_edge(START, "left")
+        workflow.add_edge(START, "right")
+        workflow.add_edge(["left", "right"], END)
+
+        result = asyncio.run(workflow.compile().ainvoke({"concept": "c", "errors": []}))
+
+        self.assertEqual(result["audio_design"], {"ok": True})
+        self.assertEqual(result["physics_spec"], {"ok": True})
+        self.assertEqual(sorted(result["errors"]), ["left", "right"])
+
+
+if __name__ == '__main__':
+    unittest.main()
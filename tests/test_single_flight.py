@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from core.single_flight import SingleFlight
+from tools.steamspy_tool import SteamSpyTool, _steamspy_cache
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        group = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"papers": 3}
+
+        async def run():
+            return await asyncio.gather(*(group.run("mcp:s2:search:gdd", fetch) for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(group.get_stats(), {"calls": 1, "coalesced": 4, "in_flight": 0})
+
+    def test_error_is_shared_and_not_remembered(self):
+        group = SingleFlight()
+        attempts = []
+
+        async def fetch():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            if len(attempts) == 1:
+                raise ConnectionError("upstream down")
+            return "ok"
+
+        async def run():
+            first = await asyncio.gather(
+                group.run("k", fetch), group.run("k", fetch), return_exceptions=True
+            )
+            return first, await group.run("k", fetch)
+
+        first, retry = asyncio.run(run())
+
+        self.assertTrue(all(isinstance(r, ConnectionError) for r in first))
+        self.assertEqual(retry, "ok")
+
+    def test_cancelled_follower_does_not_cancel_leader(self):
+        group = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            leader = asyncio.create_task(group.run("k", fetch))
+            follower = asyncio.create_task(group.run("k", fetch))
+            await asyncio.sleep(0)
+            follower.cancel()
+            return await leader
+
+        self.assertEqual(asyncio.run(run()), "done")
+
+    def test_threads_share_one_call(self):
+        group = SingleFlight()
+        calls = []
+        results = []
+        start = threading.Barrier(4)
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return b"[]"
+
+        def worker():
+            start.wait()
+            results.append(group.call("igdb:games:search", fetch))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [b"[]"] * 4)
+
+
+class TestSteamSpyCoalescing(unittest.TestCase):
+    def tearDown(self):
+        _steamspy_cache.clear()
+
+    def test_concurrent_misses_make_one_request(self):
+        tool = SteamSpyTool()
+
+        async def fetch(appid):
+            await asyncio.sleep(0.05)
+            return {"appid": appid, "name": "Dota 2"}
+
+        async def run():
+            return await asyncio.gather(*(tool.get_game_details(570) for _ in range(3)))
+
+        with patch.object(tool, "_fetch_game_details", AsyncMock(side_effect=fetch)) as fetch_mock:
+            results = asyncio.run(run())
+
+        fetch_mock.assert_awaited_once_with(570)
+        self.assertEqual([r["name"] for r in results], ["Dota 2"] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+
+from langgraph.graph import StateGraph, START, END
+
+from core.state_v2 import SpiralState, WorkingState, merge_fields
+
+
+class TestMergeFields(unittest.TestCase):
+    def test_update_shares_untouched_artifacts(self):
+        merge = merge_fields(WorkingState)
+        mechanics = [{"name": "dash"}]
+        current = {"mechanics": mechanics, "qa_plan": {"tests": 3}}
+
+        merged = merge(current, {"qa_plan": {"tests": 4}})
+
+        self.assertEqual(merged, {"mechanics": mechanics, "qa_plan": {"tests": 4}})
+        self.assertIs(merged["mechanics"], mechanics)
+        # Previous snapshot is left untouched
+        self.assertEqual(current["qa_plan"], {"tests": 3})
+
+    def test_annotated_fields_use_their_reducer(self):
+        merge = merge_fields(WorkingState)
+        current = {"validation_warnings": [{"source": "a"}]}
+
+        merged = merge(current, {"validation_warnings": [{"source": "b"}]})
+        self.assertEqual(merged["validation_warnings"], [{"source": "a"}, {"source": "b"}])
+
+        # Handing the same list back does not duplicate it
+        self.assertEqual(merge(merged, {"validation_warnings": merged["validation_warnings"]}), merged)
+
+    def test_empty_update_keeps_snapshot(self):
+        merge = merge_fields(WorkingState)
+        current = {"mechanics": []}
+        self.assertIs(merge(current, {}), current)
+        self.assertEqual(merge(None, None), {})
+
+
+class TestSpiralStateGraph(unittest.TestCase):
+    def test_harmonizer_updates_merge_into_working(self):
+        async def designer(state):
+            return {"working": {"mechanics": [{"name": "dash"}]}}
+
+        async def harmonizer(state):
+            return {"working": {"validation_warnings": [{"source": "LudonarrativeHarmonizer"}]}}
+
+        async def reality_check(state):
+            return {"working": {"validation_warnings": [{"source": "TechnicalRealityCheck"}]}}
+
+        workflow = StateGraph(SpiralState)
+        workflow.add_node("designer", designer)
+        workflow.add_node("harmonizer", harmonizer)
+        workflow.add_node("reality_check", reality_check)
+        workflow.add_edge(START, "designer")
+        workflow.add_edge("designer", "harmonizer")
+        workflow.add_edge("harmonizer", "reality_check")
+        workflow.add_edge("reality_check", END)
+
+        result = asyncio.run(workflow.compile().ainvoke({
+            "core": {"concept": "c", "genre": "platformer"},
+            "working": {"qa_plan": {"tests": 3}, "validation_warnings": []},
+        }))
+
+        self.assertEqual(result["core"], {"concept": "c", "genre": "platformer"})
+        self.assertEqual(result["working"]["mechanics"], [{"name": "dash"}])
+        self.assertEqual(result["working"]["qa_plan"], {"tests": 3})
+        self.assertEqual(
+            [w["source"] for w in result["working"]["validation_warnings"]],
+            ["LudonarrativeHarmonizer", "TechnicalRealityCheck"],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import copy
+import json
+import unittest
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from api.state_stream import StateStream, apply_patch, diff_state
+
+
+class TestDiffState(unittest.TestCase):
+    def test_only_changes_and_appended_items(self):
+        old = {"concept": "x", "mechanics": ["dash"], "gdd_content": {"intro": "a", "full_doc": "v1"}, "a/b": 1}
+        new = {"concept": "x", "mechanics": ["dash", "grapple"], "gdd_content": {"intro": "a", "full_doc": "v2"}, "a/b": 2}
+
+        ops = diff_state(old, new)
+
+        self.assertEqual(ops, [
+            {"op": "add", "path": "/mechanics/-", "value": "grapple"},
+            {"op": "replace", "path": "/gdd_content/full_doc", "value": "v2"},
+            {"op": "replace", "path": "/a~1b", "value": 2},
+        ])
+        self.assertEqual(apply_patch(copy.deepcopy(old), ops), new)
+
+    def test_shrunk_list_and_removed_key(self):
+        old = {"errors": ["a", "b"], "plan": {"phase": 1, "draft": True}}
+        new = {"errors": ["c"], "plan": {"phase": 2}}
+
+        self.assertEqual(apply_patch(copy.deepcopy(old), diff_state(old, new)), new)
+
+
+class TestStateStream(unittest.TestCase):
+    def test_deltas_between_snapshots(self):
+        stream = StateStream("job-1", snapshot_interval=3)
+        update = {"concept": "x", "messages": [HumanMessage(content="hi")], "mechanics": []}
+        client = None
+        sizes = []
+
+        for step in range(5):
+            # Partial updates: only the new message, appended like the graph reducer does
+            update = {**update, "messages": update.get("messages", []) + [AIMessage(content=f"step {step}")], "current_step": step}
+            message = stream.update("node", update)
+            update = {}
+            sizes.append(len(json.dumps(message)))
+            if message["encoding"] == "snapshot":
+                client = copy.deepcopy(message["state"])
+            else:
+                apply_patch(client, message["patch"])
+
+        self.assertEqual(stream.seq, 5)
+        self.assertEqual(client, stream.state)
+        self.assertEqual([m["content"] for m in client["messages"]], ["hi"] + [f"step {i}" for i in range(5)])
+        # seq 1 and 3 are snapshots, the others carry only the new message
+        self.assertLess(sizes[1], sizes[0])
+        self.assertLess(sizes[3], sizes[2])
+        self.assertEqual(stream.snapshot()["seq"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from core.rag import store_registry
+from core.rag.store_registry import (
+    close_vector_stores,
+    get_chroma_client,
+    get_collection,
+    get_embeddings,
+    get_vectorstore,
+)
+
+
+class TestStoreRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "chromadb"
+
+    def tearDown(self):
+        close_vector_stores()
+        self.tmp.cleanup()
+
+    def test_handles_are_reused(self):
+        client = get_chroma_client(self.path)
+        collection = get_collection("unity_docs", self.path)
+
+        self.assertIs(client, get_chroma_client(str(self.path)))
+        self.assertIs(collection, get_collection("unity_docs", self.path))
+        self.assertIsNot(collection, get_collection("godot_docs", self.path))
+        self.assertIs(get_embeddings(), get_embeddings())
+        self.assertIs(
+            get_vectorstore("narrative_theory", self.path), get_vectorstore("narrative_theory", self.path)
+        )
+
+    def test_concurrent_first_use_opens_one_client(self):
+        with patch("chromadb.PersistentClient", side_effect=lambda path: object()) as opener:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                clients = list(pool.map(lambda _: get_chroma_client(self.path), range(16)))
+
+        opener.assert_called_once()
+        self.assertEqual(len({id(c) for c in clients}), 1)
+        store_registry._clients.clear()
+
+    def test_close_forgets_handles(self):
+        client = get_chroma_client(self.path)
+        get_collection("unity_docs", self.path)
+
+        close_vector_stores()
+
+        self.assertEqual(store_registry._clients, {})
+        self.assertEqual(store_registry._collections, {})
+        self.assertIsNot(client, get_chroma_client(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
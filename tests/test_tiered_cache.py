@@ -0,0 +1,158 @@
+import asyncio
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from config.settings import settings
+from core.tiered_cache import MemoryCache, dumps, loads, reset_memory_caches
+from mcp_servers.base import MCPAdapter
+
+
+class FakeRedis:
+    """Strings with TTL; counts round trips (a pipeline is one)."""
+
+    def __init__(self):
+        self.values = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def setex(self, key, ttl, value):
+        self.round_trips += 1
+        self.values[key] = (value, time.monotonic() + ttl)
+
+    async def scan_iter(self, match):
+        for key in list(self.values):
+            if key.startswith(match.rstrip("*")):
+                yield key
+
+    async def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, key):
+        self.commands.append(("get", key))
+        return self
+
+    def pttl(self, key):
+        self.commands.append(("pttl", key))
+        return self
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        results = []
+        for command, key in self.commands:
+            value, expires_at = self.redis.values.get(key, (None, 0))
+            if command == "get":
+                results.append(value)
+            else:
+                results.append(int((expires_at - time.monotonic()) * 1000) if value is not None else -2)
+        return results
+
+
+class DemoAdapter(MCPAdapter[dict]):
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def health_check(self):
+        return True
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_evicts_least_recently_used_within_byte_budget(self):
+        cache = MemoryCache("demo", max_entries=10, max_bytes=10)
+        cache.set("a", b"1234", ttl=60, fresh_for=60)
+        cache.set("b", b"1234", ttl=60, fresh_for=60)
+        cache.get("a")
+        cache.set("c", b"1234", ttl=60, fresh_for=60)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.get_stats()["bytes"], 8)
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_serialization_keeps_json_compatibility(self):
+        data = dumps({"year": 2024, "at": datetime(2025, 1, 2), "tags": ("rpg",)})
+        self.assertEqual(loads(data.decode()), {"year": 2024, "at": "2025-01-02T00:00:00", "tags": ["rpg"]})
+        with self.assertRaises(TypeError):
+            dumps({"client": object()})
+
+
+class TestAdapterCacheTiers(unittest.TestCase):
+    def setUp(self):
+        reset_memory_caches()
+        self.redis = FakeRedis()
+
+    def test_hot_keys_are_served_from_memory(self):
+        adapter = DemoAdapter("demo", redis_client=self.redis)
+
+        async def run():
+            await adapter._set_cached("mcp:demo:paper:1", {"title": "Flow"})
+            return [await adapter._get_cached("mcp:demo:paper:1") for _ in range(3)]
+
+        self.assertEqual(asyncio.run(run()), [{"title": "Flow"}] * 3)
+        self.assertEqual(self.redis.round_trips, 1)  # only the write
+        self.assertEqual(adapter.get_cache_stats()["l1_hit_rate"], 1.0)
+
+    def test_redis_hit_fills_memory_tier(self):
+        writer = DemoAdapter("demo", redis_client=self.redis)
+        asyncio.run(writer._set_cached("mcp:demo:paper:1", {"title": "Flow"}))
+        reset_memory_caches()  # another process
+        reader = DemoAdapter("demo", redis_client=self.redis)
+
+        async def run():
+            return [await reader._get_cached("mcp:demo:paper:1") for _ in range(2)]
+
+        self.assertEqual(asyncio.run(run()), [{"title": "Flow"}] * 2)
+        stats = reader.get_cache_stats()
+        self.assertEqual((stats["l2_hits"], stats["l1_hits"]), (1, 1))
+
+    @patch.object(settings, "MCP_CACHE_L1_FRESH_SECONDS", 0.0)
+    def test_stale_entry_is_served_while_revalidating(self):
+        adapter = DemoAdapter("demo", redis_client=self.redis)
+
+        async def run():
+            await adapter._set_cached("mcp:demo:page", {"v": 1})
+            # Rewritten by another process
+            self.redis.values["mcp:demo:page"] = (dumps({"v": 2}), time.monotonic() + 60)
+            stale = await adapter._get_cached("mcp:demo:page")
+            await asyncio.sleep(0.01)
+            return stale, adapter.memory_cache.get("mcp:demo:page").data
+
+        stale, refreshed = asyncio.run(run())
+
+        self.assertEqual(stale, {"v": 1})
+        self.assertEqual(loads(refreshed), {"v": 2})
+        self.assertEqual(adapter.get_cache_stats()["revalidations"], 1)
+
+    def test_invalidate_and_unserializable_values(self):
+        adapter = DemoAdapter("demo", redis_client=self.redis)
+
+        async def run():
+            await adapter._set_cached("mcp:demo:search:a", {"n": 1})
+            await adapter._set_cached("mcp:demo:search:b", {"n": object()})
+            await adapter._invalidate_cache("mcp:demo:search:*")
+            return await adapter._get_cached("mcp:demo:search:a"), await adapter._get_cached("mcp:demo:search:b")
+
+        self.assertEqual(asyncio.run(run()), (None, None))
+        self.assertEqual(self.redis.values, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
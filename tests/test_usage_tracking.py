@@ -0,0 +1,165 @@
+import asyncio
+import unittest
+from typing import Any, Dict
+from unittest.mock import AsyncMock, patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END, MessagesState
+
+from config.settings import settings
+from core import model_factory
+from core.langgraph_monitoring import get_monitor
+from core.metrics import metrics_collector
+from core.usage_tracking import UsageTracker, compute_cost, get_pricing, match_model, usage_scope, usage_tracker
+
+
+class PricedFakeChatModel(GenericFakeChatModel):
+    model_name: str = "gpt-4o-2024-08-06"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+
+def _response() -> AIMessage:
+    return AIMessage(
+        content="ok",
+        usage_metadata={
+            "input_tokens": 1000,
+            "output_tokens": 200,
+            "total_tokens": 1200,
+            "input_token_details": {"cache_read": 400},
+        },
+    )
+
+
+class FakeBudgetManager:
+    def __init__(self):
+        self.models = {"gpt-4o": object()}
+        self.calls = []
+
+    async def record_usage(self, model, metadata=None):
+        self.calls.append((model, metadata))
+
+
+class TestPricing(unittest.TestCase):
+    def test_longest_prefix_wins(self):
+        self.assertEqual(match_model("gpt-4o-2024-08-06", ["gpt-4", "gpt-4o"]), "gpt-4o")
+        self.assertEqual(get_pricing("openai/gpt-4o-mini"), get_pricing("gpt-4o-mini-2024-07-18"))
+        self.assertIsNone(get_pricing("llama3.1:8b"))
+
+    def test_cached_tokens_billed_at_cached_rate(self):
+        # gpt-4o: 2.50 prompt, 10.00 completion, 1.25 cached per 1M tokens
+        cost = compute_cost("gpt-4o", 1000, 200, cached_tokens=400)
+        self.assertAlmostEqual(cost, (600 * 2.50 + 400 * 1.25 + 200 * 10.00) / 1_000_000)
+        self.assertEqual(compute_cost("unknown-model", 1000, 200), 0.0)
+
+
+class TestUsageTracker(unittest.TestCase):
+    def setUp(self):
+        metrics_collector.reset()
+        self.budget = FakeBudgetManager()
+        self.tracker = UsageTracker(budget_manager=self.budget)
+        self.llm = PricedFakeChatModel(messages=iter([_response()]), callbacks=[self.tracker])
+
+    def _run_graph(self):
+        async def agent(state):
+            with usage_scope("EconomyBalancer") as totals:
+                message = await self.llm.ainvoke(state["messages"])
+            self.totals = totals
+            await asyncio.sleep(0)  # let the budget record task run
+            return {"messages": [message]}
+
+        workflow = StateGraph(MessagesState)
+        workflow.add_node("agent", agent)
+        workflow.add_edge(START, "agent")
+        workflow.add_edge("agent", END)
+
+        monitor = get_monitor()
+        monitor.start_graph_execution("usage-exec", "job-1", {})
+        monitor.start_node_execution("usage-exec", "agent", {})
+        config = {"configurable": {"thread_id": "job-1"}}
+        asyncio.run(workflow.compile().ainvoke({"messages": [HumanMessage(content="hi")]}, config))
+        return monitor.active_executions.pop("usage-exec")
+
+    def test_usage_attributed_to_scope_agent_and_job(self):
+        execution = self._run_graph()
+        expected_cost = compute_cost("gpt-4o", 1000, 200, 400)
+
+        self.assertEqual(self.totals.calls, 1)
+        self.assertEqual(self.totals.total_tokens, 1200)
+        self.assertEqual(self.totals.cached_tokens, 400)
+        self.assertAlmostEqual(self.totals.cost_usd, expected_cost)
+
+        usage = metrics_collector.get_usage_summary()
+        self.assertEqual(list(usage["by_agent"]), ["EconomyBalancer"])
+        self.assertEqual(usage["prompt_tokens"], 1000)
+        self.assertAlmostEqual(usage["cost_usd"], expected_cost)
+
+        self.assertEqual(execution.nodes_executed[0].tokens_used, 1200)
+        self.assertAlmostEqual(execution.total_cost_usd, expected_cost)
+
+        self.assertEqual(
+            self.budget.calls,
+            [("gpt-4o", {"agent_name": "EconomyBalancer", "job_id": "job-1"})],
+        )
+
+    def test_falls_back_to_graph_node_without_scope(self):
+        self.tracker.budget_manager = None
+
+        async def call():
+            await self.llm.ainvoke("hi", config={"metadata": {"langgraph_node": "market_analyst"}})
+
+        asyncio.run(call())
+        self.assertIn("market_analyst", metrics_collector.llm_usage)
+
+
+class TestFactoryModelsChargeBudget(unittest.TestCase):
+    def setUp(self):
+        self.budget = FakeBudgetManager()
+        self.budget.models = {"gpt-5": object()}
+        self.budget.record_usage = AsyncMock()
+        usage_tracker.budget_manager = self.budget
+
+    def tearDown(self):
+        usage_tracker.budget_manager = None
+        asyncio.run(model_factory.close_model_clients())
+
+    def test_create_model_responses_reach_record_usage(self):
+        def build(provider, model, temperature, **kwargs):
+            return PricedFakeChatModel(model_name=model, messages=iter([_response()]))
+
+        async def call():
+            llm = model_factory.create_model(provider="github", model="gpt-5", temperature=0.1)
+            await llm.ainvoke("hi")
+            await asyncio.gather(*usage_tracker._pending)
+
+        with patch.object(model_factory, "_build_model", side_effect=build):
+            asyncio.run(call())
+
+        self.budget.record_usage.assert_awaited_once_with(
+            "gpt-5", metadata={"agent_name": "unknown", "job_id": None}
+        )
+
+    @patch.object(settings, "CHECKPOINT_BACKEND", "memory")
+    def test_graph_server_attaches_budget_manager(self):
+        import api.server as server
+
+        async def run():
+            usage_tracker.budget_manager = None
+            async with server.lifespan(server.app):
+                attached = usage_tracker.budget_manager
+            return attached, usage_tracker.budget_manager
+
+        with patch.object(server, "get_budget_manager", AsyncMock(return_value=self.budget)), \
+                patch.object(server, "close_budget_manager", AsyncMock()) as close:
+            attached, after_shutdown = asyncio.run(run())
+
+        self.assertIs(attached, self.budget)
+        self.assertIsNone(after_shutdown)
+        close.assert_awaited_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,13 @@
-from typing import Type, Optional
+import asyncio
+from typing import List, Tuple, Type
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
-from tools.retrieval_tool import search_design_patterns, search_engine_docs
+from tools.retrieval_tool import (
+    _asearch_design_patterns,
+    _asearch_engine_docs,
+    _search_design_patterns,
+    _search_engine_docs,
+)
 
 class DomainKnowledgeInput(BaseModel):
     query: str = Field(description="The specific concept or technical term to search for.")
@@ -16,15 +22,29 @@ class DomainKnowledgeTool(BaseTool):
         """Execute the search based on domain."""
         try:
             if domain == "engine":
-                return search_engine_docs(query)
+                return _search_engine_docs(query)
             elif domain == "patterns":
-                return search_design_patterns(query)
+                return _search_design_patterns(query)
             # Fallback or future domains
             else:
-                return search_design_patterns(query)
+                return _search_design_patterns(query)
         except Exception as e:
             return f"Error searching domain knowledge: {str(e)}"
 
     async def _arun(self, query: str, domain: str = "patterns") -> str:
-        """Async implementation (currently synchronous wrapper)."""
-        return self._run(query, domain)
+        """Async search; blocking store I/O runs on the shared RAG executor."""
+        try:
+            if domain == "engine":
+                return await _asearch_engine_docs(query)
+            return await _asearch_design_patterns(query)
+        except Exception as e:
+            return f"Error searching domain knowledge: {str(e)}"
+
+    async def aquery_many(self, requests: List[Tuple[str, str]]) -> List[str]:
+        """
+        Resolve several (query, domain) lookups concurrently.
+
+        Returns:
+            One formatted answer per request, in request order
+        """
+        return list(await asyncio.gather(*[self._arun(query, domain) for query, domain in requests]))
@@ -8,10 +8,11 @@ to prevent hallucinations and provide implementation guidance.
 import structlog
 from typing import List, Dict, Any, Optional
 from langchain_core.tools import tool
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OllamaEmbeddings
 from pathlib import Path
 
+from core.rag.retrieval_cache import cached_similarity_search
+from core.rag.store_registry import get_vectorstore
+
 logger = structlog.get_logger(__name__)
 
 # Engine documentation collections
@@ -45,20 +46,13 @@ def validate_mechanic_feasibility(mechanic: str, engine: str = "unity") -> str:
         if engine_lower not in ENGINE_COLLECTIONS:
             return f"Unsupported engine: {engine}. Use 'unity', 'unreal', or 'godot'."
         
-        # Initialize embeddings
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
-        
-        # Load engine-specific vector store
+        # Engine-specific vector store (shared handle, opened once per process)
         collection_name = ENGINE_COLLECTIONS[engine_lower]
-        vectorstore = Chroma(
-            collection_name=collection_name,
-            embedding_function=embeddings,
-            persist_directory=str(CHROMADB_PATH)
-        )
+        vectorstore = get_vectorstore(collection_name, CHROMADB_PATH)
         
         # Search for relevant documentation
         query = f"How to implement {mechanic}"
-        results = vectorstore.similarity_search_with_score(query, k=3)
+        results = cached_similarity_search(vectorstore, collection_name, CHROMADB_PATH, query, k=3)
         
         if not results:
             return f"⚠️ No official documentation found for '{mechanic}' in {engine.title()}. This feature may require custom implementation or third-party assets."
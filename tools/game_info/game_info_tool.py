@@ -6,6 +6,7 @@ import json
 import requests
 import structlog
 from config.settings import settings
+from core.single_flight import in_flight, make_key
 
 logger = structlog.get_logger(__name__)
 
@@ -61,6 +62,13 @@ class GameInfoTool:
         response.raise_for_status()
         return response.json()["access_token"]
 
+    def _api_request(self, endpoint: str, query: str) -> bytes:
+        """IGDB request; identical concurrent queries (tool threads) share one call."""
+        return in_flight.call(
+            make_key("igdb", endpoint, query),
+            lambda: self.wrapper.api_request(endpoint, query),
+        )
+
     @tool("search_games")
     def search_games(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -71,7 +79,7 @@ class GameInfoTool:
 
     def search_games_logic(self, query: str) -> List[Dict[str, Any]]:
         try:
-            byte_array = self.wrapper.api_request(
+            byte_array = self._api_request(
                 'games',
                 f'search "{query}"; fields name, summary, genres.name, platforms.name, total_rating, first_release_date; limit 10;'
             )
@@ -82,7 +90,7 @@ class GameInfoTool:
 
     def get_game_details(self, game_id: int) -> Dict[str, Any]:
         try:
-            byte_array = self.wrapper.api_request(
+            byte_array = self._api_request(
                 'games',
                 f'fields name, summary, storyline, genres.name, themes.name, player_perspectives.name, similar_games.name, cover.url, screenshots.url; where id = {game_id};'
             )
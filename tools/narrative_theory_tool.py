@@ -8,10 +8,11 @@ Provides semantic search over indexed narrative theory frameworks
 import structlog
 from typing import List, Dict, Any, Optional
 from langchain_core.tools import tool
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OllamaEmbeddings
 from pathlib import Path
 
+from core.rag.retrieval_cache import cached_similarity_search
+from core.rag.store_registry import get_vectorstore
+
 logger = structlog.get_logger(__name__)
 
 # Narrative theory database configuration
@@ -38,18 +39,13 @@ def query_narrative_theory(query: str, top_k: int = 3) -> str:
     try:
         logger.info("narrative_theory_query", query=query, top_k=top_k)
         
-        # Initialize embeddings (same as used for indexing)
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
-        
-        # Load vector store
-        vectorstore = Chroma(
-            collection_name=NARRATIVE_THEORY_COLLECTION,
-            embedding_function=embeddings,
-            persist_directory=str(CHROMADB_PATH)
-        )
+        # Shared vector store (same embedding model as used for indexing)
+        vectorstore = get_vectorstore(NARRATIVE_THEORY_COLLECTION, CHROMADB_PATH)
         
         # Perform semantic search
-        results = vectorstore.similarity_search_with_score(query, k=top_k)
+        results = cached_similarity_search(
+            vectorstore, NARRATIVE_THEORY_COLLECTION, CHROMADB_PATH, query, k=top_k
+        )
         
         if not results:
             return "No relevant narrative theory found for this query."
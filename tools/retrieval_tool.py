@@ -1,58 +1,117 @@
-from langchain.tools import tool
+import threading
+from typing import Any, Dict, List
+
+from langchain_core.tools import StructuredTool
 from core.rag.rag_engine import RAGEngine
+from core.single_flight import in_flight, make_key
 import structlog
 
 logger = structlog.get_logger(__name__)
 
 # Singleton instance for RAG Engine to be used by tools
 _rag_engine = None
+_rag_engine_lock = threading.Lock()
 
 def get_rag_engine():
     global _rag_engine
-    if _rag_engine is None:
-        _rag_engine = RAGEngine()
+    with _rag_engine_lock:
+        if _rag_engine is None:
+            _rag_engine = RAGEngine()
     return _rag_engine
 
-@tool("search_game_design_patterns")
-def search_design_patterns(query: str) -> str:
+
+def _query(query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+    # Identical lookups from concurrent tool calls share one embedding + search
+    return in_flight.call(
+        make_key("rag", n_results, query),
+        lambda: get_rag_engine().query(query, n_results=n_results),
+    )
+
+
+async def _aquery(query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+    return await in_flight.run(
+        make_key("rag", n_results, query),
+        lambda: get_rag_engine().aquery(query, n_results=n_results),
+    )
+
+
+def _format_results(results: List[Dict[str, Any]], header: str, empty: str) -> str:
+    if not results:
+        return empty
+    formatted_output = f"{header}\n"
+    for res in results:
+        formatted_output += f"- {res['content']} (Source: {res['metadata'].get('source', 'Unknown')})\n"
+    return formatted_output
+
+
+def _search_design_patterns(query: str) -> str:
     """
     Search for game design patterns and mechanics in the knowledge base.
     Useful for finding standard solutions to gameplay problems.
     """
     try:
-        rag = get_rag_engine()
-        results = rag.query(query, n_results=3)
-        if not results:
-            return "No relevant design patterns found."
-        
-        formatted_output = "Found the following design patterns:\n"
-        for res in results:
-            formatted_output += f"- {res['content']} (Source: {res['metadata'].get('source', 'Unknown')})\n"
-        return formatted_output
+        results = _query(query)
+        return _format_results(results, "Found the following design patterns:", "No relevant design patterns found.")
     except Exception as e:
         logger.error("rag_search_failed", error=str(e))
         return f"Error searching design patterns: {str(e)}"
 
-@tool("search_engine_docs")
-def search_engine_docs(query: str) -> str:
+
+async def _asearch_design_patterns(query: str) -> str:
+    try:
+        results = await _aquery(query)
+        return _format_results(results, "Found the following design patterns:", "No relevant design patterns found.")
+    except Exception as e:
+        logger.error("rag_search_failed", error=str(e))
+        return f"Error searching design patterns: {str(e)}"
+
+
+def _search_engine_docs(query: str) -> str:
     """
     Search official Unity/Unreal documentation for technical implementation details.
     ALWAYS use this before suggesting code or technical architecture.
     """
     try:
-        rag = get_rag_engine()
-        results = rag.query(query, n_results=3)
-        if not results:
-            return "No relevant documentation found."
-        
-        formatted_output = "Found the following documentation:\n"
-        for res in results:
-            formatted_output += f"- {res['content']} (Source: {res['metadata'].get('source', 'Unknown')})\n"
-        return formatted_output
+        results = _query(query)
+        return _format_results(results, "Found the following documentation:", "No relevant documentation found.")
     except Exception as e:
         logger.error("rag_search_failed", error=str(e))
         return f"Error searching documentation: {str(e)}"
 
+
+async def _asearch_engine_docs(query: str) -> str:
+    try:
+        results = await _aquery(query)
+        return _format_results(results, "Found the following documentation:", "No relevant documentation found.")
+    except Exception as e:
+        logger.error("rag_search_failed", error=str(e))
+        return f"Error searching documentation: {str(e)}"
+
+
+# Sync + async implementations: ainvoke no longer blocks the event loop
+search_design_patterns = StructuredTool.from_function(
+    func=_search_design_patterns,
+    coroutine=_asearch_design_patterns,
+    name="search_game_design_patterns",
+)
+
+search_engine_docs = StructuredTool.from_function(
+    func=_search_engine_docs,
+    coroutine=_asearch_engine_docs,
+    name="search_engine_docs",
+)
+
+
+async def aquery_many(queries: List[str], n_results: int = 3) -> List[List[Dict[str, Any]]]:
+    """
+    Resolve several knowledge lookups concurrently (one await per node).
+
+    Returns:
+        Raw results per query, in the order of `queries`
+    """
+    return await get_rag_engine().aquery_many(queries, n_results=n_results)
+
+
 class RetrievalTool:
     """
     Wrapper class to expose tools to agents in the expected format.
@@ -60,4 +119,3 @@ class RetrievalTool:
     def __init__(self):
         self.search_design_patterns = search_design_patterns
         self.search_engine_docs = search_engine_docs
-
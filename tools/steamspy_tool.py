@@ -9,12 +9,14 @@ Data Accuracy: Estimates based on statistical sampling, not 100% accurate
 """
 
 import httpx
-import asyncio
 import structlog
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from functools import lru_cache
 
+from core.rate_limiting import get_rate_limiter
+from core.single_flight import in_flight, make_key
+
 logger = structlog.get_logger(__name__)
 
 # Simple in-memory cache with expiry
@@ -28,17 +30,16 @@ class SteamSpyTool:
     RATE_LIMIT_SECONDS = 4  # SteamSpy allows 1 request per 4 seconds
     
     def __init__(self):
-        self.last_request_time: Optional[datetime] = None
+        # Shared by every SteamSpyTool instance (and process, if distributed)
+        self.rate_limiter = get_rate_limiter(
+            "steamspy", rate_per_minute=60 / self.RATE_LIMIT_SECONDS, burst=1
+        )
     
     async def _rate_limit(self):
         """Enforce rate limiting."""
-        if self.last_request_time:
-            elapsed = (datetime.now() - self.last_request_time).total_seconds()
-            if elapsed < self.RATE_LIMIT_SECONDS:
-                wait_time = self.RATE_LIMIT_SECONDS - elapsed
-                logger.debug("steamspy_rate_limit", wait_seconds=wait_time)
-                await asyncio.sleep(wait_time)
-        self.last_request_time = datetime.now()
+        waited = await self.rate_limiter.acquire()
+        if waited:
+            logger.debug("steamspy_rate_limit", wait_seconds=waited)
     
     def _get_cached(self, appid: int) -> Optional[Dict[str, Any]]:
         """Retrieve from cache if not expired."""
@@ -86,6 +87,14 @@ class SteamSpyTool:
         if cached:
             return cached
         
+        # Concurrent misses for the same app share one request
+        return await in_flight.run(
+            make_key("steamspy", "appdetails", appid),
+            lambda: self._fetch_game_details(appid),
+        )
+    
+    async def _fetch_game_details(self, appid: int) -> Dict[str, Any]:
+        """Request appdetails from SteamSpy and cache the result."""
         # Enforce rate limiting
         await self._rate_limit()
         
@@ -0,0 +1,74 @@
+import json
+from typing import Any, Optional
+
+from langchain_core.tools import StructuredTool
+import structlog
+
+from config.settings import settings
+from core.context_manager import count_tokens, truncate_to_tokens
+from core.tool_output_store import get_tool_output_store
+
+logger = structlog.get_logger(__name__)
+
+FETCH_TOOL_NAME = "fetch_tool_output"
+
+
+def _select(text: str, path: Optional[str]) -> str:
+    """Sub-tree of a stored JSON output at a dotted path ('results.0.name')."""
+    if not path:
+        return text
+    value: Any = json.loads(text)
+    for token in path.split("."):
+        if isinstance(value, list):
+            value = value[int(token)]
+        else:
+            value = value[token]
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _page(text: str, offset: int) -> str:
+    """At most settings.TOOL_OUTPUT_FETCH_MAX_TOKENS of `text` from character `offset`."""
+    chunk = truncate_to_tokens(text[offset:], settings.TOOL_OUTPUT_FETCH_MAX_TOKENS)
+    end = offset + len(chunk)
+    if end < len(text):
+        chunk += f"\n[showing characters {offset}-{end} of {len(text)}; call again with offset={end} for more]"
+    return chunk
+
+
+def _render(text: Optional[str], ref: str, path: Optional[str], offset: int) -> str:
+    if text is None:
+        return f"Error: unknown tool output reference '{ref}'"
+    try:
+        selected = _select(text, path)
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        return f"Error: path '{path}' not found in {ref} ({type(e).__name__}: {e})"
+    logger.info("tool_output_fetched", ref=ref, path=path, offset=offset, tokens=count_tokens(selected))
+    return _page(selected, max(offset, 0))
+
+
+def _fetch_tool_output(ref: str, path: Optional[str] = None, offset: int = 0) -> str:
+    """
+    Fetch details of a large tool output that was stored by reference.
+    Use `path` (dotted keys/indices, e.g. "results.0.summary") to read one part
+    of a JSON output, and `offset` to page through long text.
+    """
+    try:
+        text = get_tool_output_store().get(ref)
+    except ValueError as e:
+        return f"Error: {e}"
+    return _render(text, ref, path, offset)
+
+
+async def _afetch_tool_output(ref: str, path: Optional[str] = None, offset: int = 0) -> str:
+    try:
+        text = await get_tool_output_store().aget(ref)
+    except ValueError as e:
+        return f"Error: {e}"
+    return _render(text, ref, path, offset)
+
+
+fetch_tool_output = StructuredTool.from_function(
+    func=_fetch_tool_output,
+    coroutine=_afetch_tool_output,
+    name=FETCH_TOOL_NAME,
+)